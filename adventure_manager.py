@@ -2,6 +2,9 @@ import random
 from typing import Dict
 from user_store import save_user  # Persist user state
 from quiz_manager import QuizManager
+from leveling import award_xp
+from history import record_event
+from owlmind import tracing
 
 # Pre-defined environments with a bit of flavor text
 ENVIRONMENTS = [
@@ -17,14 +20,13 @@ ENVIRONMENTS = [
     "a hidden pre-War government facility"
 ]
 
-# Basic perks granted upon leveling up
-PERKS = [
-    "Quick Learner",      # XP gain boost
-    "Fortitude",         # Resist failure consequences
-    "Silver Tongue",     # Better negotiation
-    "Sharpshooter",      # Improved precision
-    "Lucky"              # Increased chance of success
-]
+# Base XP for a correct quiz answer (Intelligence bonus is added by award_xp)
+QUIZ_XP = 1
+
+# Adventure phases, derived from AdventureState
+IDLE = 'idle'                # no adventure started
+EXPLORING = 'exploring'      # in an environment, free to request a quiz
+AWAITING_QUIZ = 'awaiting_quiz'
 
 class AdventureManager:
     def __init__(self, user_record: Dict) -> None:
@@ -36,11 +38,26 @@ class AdventureManager:
             'awaiting': None,
             'payload': {}
         })
+        # True when state changed since the last write (see checkpoint())
+        self.dirty = False
 
+    @property
+    def phase(self) -> str:
+        if self.state.get('awaiting') == 'quiz':
+            return AWAITING_QUIZ
+        return EXPLORING if self.state.get('env') else IDLE
+
+    @tracing.traced('adventure.save_state')
     def save_state(self) -> None:
         # Persist just the adventure state
         self.user['AdventureState'] = self.state
         save_user(self.user)
+        self.dirty = False
+
+    def checkpoint(self) -> None:
+        # Persist pending (non-critical) changes, e.g. on session eviction
+        if self.dirty:
+            self.save_state()
 
     def start(self) -> str:
         # Pick a random environment and introduce the scene
@@ -48,6 +65,7 @@ class AdventureManager:
         self.state['step'] = 1
         self.state['awaiting'] = None
         self.state['payload'] = {}
+        record_event(self.user, 'adventure_start', env=self.state['env'])
         self.save_state()
         return (
             f"🗺️ **Chapter {self.state['step']}**: You find yourself in {self.state['env']}. "
@@ -55,13 +73,17 @@ class AdventureManager:
             "Prepare yourself and use `/adventure quiz <subject>` to face your first challenge."
         )
 
+    @tracing.traced('adventure.next_quiz')
     def next_quiz(self, subject: str = "fallout lore") -> str:
         # Generate a quiz question and weave it into the narrative
         self.state['awaiting'] = 'quiz'
         self.state['payload']['subject'] = subject
-        qa = QuizManager.create_quiz(subject)
+        qa = QuizManager.create_quiz(subject, uid=self.user.get('discordUserID'))
         self.state['payload'].update(qa)
-        self.save_state()
+        # Entering AWAITING_QUIZ is not a progress transition: keep it in memory
+        # and let the session checkpoint it (answer or eviction), saving a write
+        self.user['AdventureState'] = self.state
+        self.dirty = True
 
         question = qa['question']
         return (
@@ -69,41 +91,42 @@ class AdventureManager:
             f"you are confronted with a mental puzzle:\n\n> {question}"
         )
 
-    def handle_answer(self, user_answer: str) -> str:
+    def handle_answer(self, user_answer: str, evaluation=None) -> str:
+        # evaluation: precomputed QuizManager.evaluate() result (e.g. from a worker pool)
         correct_answer = self.state['payload'].get('answer', '')
         env = self.state.get('env', 'the wasteland')
-        passed = QuizManager.evaluate(user_answer, correct_answer)
+        passed, _ = evaluation or QuizManager.evaluate(user_answer, correct_answer)
 
-        # Award XP and maybe level up
-        xp_gain = 10
-        self.user['XP'] = self.user.get('XP', 0) + (xp_gain if passed else 0)
-        leveled_up = False
-        # Define threshold: e.g., 50 XP per current level
-        threshold = self.user.get('Level', 1) * 50
-        if passed and self.user['XP'] >= threshold:
-            self.user['XP'] -= threshold
-            self.user['Level'] = self.user.get('Level', 1) + 1
-            # Grant a random perk
-            new_perk = random.choice(PERKS)
-            self.user.setdefault('Perks', []).append(new_perk)
-            leveled_up = True
+        # Award XP and maybe level up (possibly several levels at once)
+        award = award_xp(self.user, base_xp=QUIZ_XP) if passed else None
+        record_event(
+            self.user, 'quiz',
+            subject=self.state['payload'].get('subject', ''),
+            passed=passed,
+            xp=award.xp if award else 0,
+        )
+        if award and award.new_level > award.old_level:
+            record_event(self.user, 'level_up', level=award.new_level, perks=award.perks)
 
         # Clear quiz state and advance chapter
         self.state['awaiting'] = None
         self.state['payload'] = {}
         self.state['step'] += 1
-        # Persist both state and user stats
+        # Persist state and XP/Level/Perks in a single write
         self.save_state()
 
         # Build narrative response
         if passed:
             resp = (
-                f"✅ You answered correctly! You gain {xp_gain} XP in the {env}."
+                f"✅ You answered correctly! You gain {award.xp} XP in the {env}."
             )
-            if leveled_up:
-                resp += (
-                    f" 🎉 You reached Level {self.user['Level']} and gained the perk '{new_perk}'!"
-                )
+            if award.new_level > award.old_level:
+                resp += f" 🎉 You reached Level {award.new_level}"
+                if award.perks:
+                    perks = "', '".join(award.perks)
+                    noun = 'perk' if len(award.perks) == 1 else 'perks'
+                    resp += f" and gained the {noun} '{perks}'"
+                resp += "!"
             resp += f" You press onward to Chapter {self.state['step']}. What new trials await?"
         else:
             resp = (
@@ -113,6 +136,4 @@ class AdventureManager:
             # Always reveal the correct answer
             resp += f"\n📖 Correct Answer: {correct_answer}"
 
-        # Save user profile with updated XP/Level/Perks
-        save_user(self.user)
         return resp
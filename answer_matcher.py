@@ -0,0 +1,92 @@
+# answer_matcher.py
+
+import re
+
+# Max typos tolerated by the edit-distance check
+MAX_EDITS = 2
+# Fraction of the correct answer's keywords a reply must contain to pass
+KEYWORD_THRESHOLD = 0.6
+# Keyword scoring only kicks in for answers with at least this many keywords
+KEYWORD_MIN = 4
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+STOPWORDS = frozenset("""
+    a an and are as at be by for from has have in is it its of on or that the
+    their there these this those to was were which with who whom what when where
+""".split())
+
+
+def normalize(text: str) -> str:
+    """ Lowercase, drop punctuation, collapse whitespace """
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub("", text.lower())).strip()
+
+def keywords(normalized: str) -> set:
+    """ Content words of an already-normalized string """
+    return {w for w in normalized.split() if w not in STOPWORDS}
+
+def bounded_levenshtein(s1: str, s2: str, k: int = MAX_EDITS) -> int:
+    """
+    Edit distance between s1 and s2 if it is <= k, otherwise k + 1.
+    Only the diagonal band of width 2k+1 is computed (O(k * n)), and the scan stops
+    as soon as every cell of a row exceeds k.
+    """
+    if abs(len(s1) - len(s2)) > k:
+        return k + 1
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return len(s1)
+
+    over = k + 1
+    n = len(s2)
+    # previous[j] = distance(s1[:i], s2[:j]); cells outside the band hold k + 1
+    previous = [j if j <= k else over for j in range(n + 1)]
+    for i in range(1, len(s1) + 1):
+        c1 = s1[i - 1]
+        lo = max(1, i - k)
+        hi = min(n, i + k)
+        current = [over] * (n + 1)
+        current[0] = i if i <= k else over
+        row_min = current[0]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (c1 != s2[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            if cost > over:
+                cost = over
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > k:
+            return over
+        previous = current
+    return min(previous[n], over)
+
+def keyword_overlap(user_norm: str, correct_norm: str) -> float:
+    """ Fraction of the correct answer's keywords present in the user's answer """
+    expected = keywords(correct_norm)
+    if not expected:
+        return 0.0
+    return len(expected & keywords(user_norm)) / len(expected)
+
+def is_match(user_answer: str, correct_answer: str,
+             max_edits: int = MAX_EDITS, threshold: float = KEYWORD_THRESHOLD) -> bool:
+    """
+    Does the user's answer match the correct one?
+    Passes on a normalized exact match, on <= max_edits typos, or, for
+    paragraph-style answers, when enough of the answer's keywords are present.
+    """
+    user_norm = normalize(user_answer)
+    correct_norm = normalize(correct_answer)
+
+    if user_norm == correct_norm:
+        return True
+    if bounded_levenshtein(user_norm, correct_norm, max_edits) <= max_edits:
+        return True
+    if len(keywords(correct_norm)) >= KEYWORD_MIN:
+        return keyword_overlap(user_norm, correct_norm) >= threshold
+    return False
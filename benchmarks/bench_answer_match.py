@@ -0,0 +1,79 @@
+##
+## bench_answer_match.py :: micro-benchmarks for quiz answer matching
+##
+## Compares the original full-matrix Levenshtein (what QuizManager.evaluate used to run)
+## with answer_matcher's banded, threshold-bounded distance and the full is_match()
+## check, on realistic answer lengths: short terms, one sentence, and LLM paragraphs.
+##
+## Usage: python benchmarks/bench_answer_match.py [--repeat 5]
+##
+
+import os
+import sys
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from answer_matcher import MAX_EDITS, bounded_levenshtein, is_match, normalize
+
+SENTENCE = "The NCR controls Hoover Dam, with Caesar's Legion massing on the east bank."
+PARAGRAPH = (
+    "At the start of Fallout: New Vegas, Hoover Dam is held by the New California Republic, "
+    "which fought off Caesar's Legion there four years earlier in the First Battle of Hoover Dam. "
+    "The Legion has since regrouped at Fortification Hill on the eastern bank of the Colorado River, "
+    "and both factions, along with Mr. House and an independent Courier, are preparing for a second "
+    "battle whose outcome decides who controls the dam's power and water for the Mojave Wasteland."
+)
+
+CASES = [
+    # name, user answer, correct answer
+    ("short typo", "Megatonn", "Megaton"),
+    ("short wrong", "Rivet City", "Megaton"),
+    ("sentence vs sentence", "The NCR holds the dam while the Legion waits on the east bank", SENTENCE),
+    ("short vs paragraph", "The NCR", PARAGRAPH),
+    ("paragraph vs paragraph", PARAGRAPH.replace("Legion", "Legoin"), PARAGRAPH),
+    ("long reply vs sentence", PARAGRAPH * 4, SENTENCE),
+]
+
+
+def levenshtein(s1: str, s2: str) -> int:
+    """ Original implementation from QuizManager.evaluate """
+    if len(s1) < len(s2):
+        return levenshtein(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def bench(fn, repeat):
+    number, _ = timeit.Timer(fn).autorange()
+    best = min(timeit.Timer(fn).repeat(repeat=repeat, number=number))
+    return best / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'case':<24}{'len':>11}{'full us':>12}{'bounded us':>12}{'is_match us':>13}{'speedup':>9}")
+    for name, user, correct in CASES:
+        u, c = normalize(user), normalize(correct)
+        full = bench(lambda: levenshtein(u, c), args.repeat)
+        bounded = bench(lambda: bounded_levenshtein(u, c, MAX_EDITS), args.repeat)
+        matched = bench(lambda: is_match(user, correct), args.repeat)
+        print(f"{name:<24}{f'{len(u)}x{len(c)}':>11}{full:>12.1f}{bounded:>12.1f}{matched:>13.1f}{full / bounded:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
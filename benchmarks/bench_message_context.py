@@ -0,0 +1,122 @@
+##
+## bench_message_context.py :: per-message context construction cost in DiscordBot.on_message
+##
+## Replays a synthetic high-volume channel (mix of plain chat, commands, messages with
+## attachments/reactions, guild threads and DMs) and measures, per message, the
+## allocations (tracemalloc blocks and bytes) and time needed to build the engine context:
+##   - eager: the original BotMessage with ~17 fields built up front
+##   - lazy:  LazyBotMessage + CONTEXT_FIELDS, when the engine reads only 'message'
+##            (the common SimpleEngine path) and when it also reads the layer ids
+##            (rate limiting)
+##
+## Usage: python benchmarks/bench_message_context.py [--messages 20000]
+##
+
+import os
+import sys
+import time
+import random
+import datetime
+import argparse
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import discord
+from owlmind.bot import BotMessage, LazyBotMessage
+from owlmind.discord import CONTEXT_FIELDS
+
+
+def make_corpus(n, seed=11):
+    rng = random.Random(seed)
+    guild = SimpleNamespace(id=1001, name='Vault 101')
+    channel = SimpleNamespace(id=2002, name='general')
+    dm = SimpleNamespace(id=3003)
+    authors = [SimpleNamespace(id=10_000 + i, name=f'dweller{i}', global_name=f'Dweller {i}') for i in range(200)]
+    corpus = []
+    for i in range(n):
+        is_dm = rng.random() < 0.1
+        corpus.append(SimpleNamespace(
+            id=i,
+            guild=None if is_dm else guild,
+            channel=dm if is_dm else channel,
+            author=rng.choice(authors),
+            content=rng.choice(['/help', '/stats', '/adventure quiz physics', 'hello there', 'The NCR'] ),
+            attachments=[SimpleNamespace(url=f'https://cdn/{i}.png')] if rng.random() < 0.05 else [],
+            reactions=[SimpleNamespace(emoji='👍')] if rng.random() < 0.1 else [],
+        ))
+    return corpus
+
+
+def eager(message, bot):
+    attachments = [a.url for a in message.attachments]
+    reactions = [str(r.emoji) for r in message.reactions]
+    return BotMessage(
+        layer1=message.guild.id if message.guild else 0,
+        layer2=message.channel.id if hasattr(message.channel, 'id') else 0,
+        layer3=message.channel.id if isinstance(message.channel, discord.Thread) else 0,
+        layer4=message.author.id,
+        server_name=message.guild.name if message.guild else '#dm',
+        channel_name=message.channel.name if hasattr(message.channel, 'name') else '#dm',
+        thread_name=message.channel.name if isinstance(message.channel, discord.Thread) else '',
+        author_name=message.author.name,
+        author_fullname=message.author.global_name,
+        author=message.author.global_name,
+        bot=bot,
+        timestamp=datetime.datetime.now(),
+        date=datetime.datetime.now().strftime("%d-%b-%Y"),
+        time=datetime.datetime.now().strftime("%H:%M:%S"),
+        message=message.content,
+        attachments=attachments,
+        reactions=reactions
+    )
+
+
+def lazy(message, bot):
+    return LazyBotMessage(message, CONTEXT_FIELDS, bot=bot, timestamp=datetime.datetime.now(), message=message.content)
+
+
+READS = {
+    'message only': ('message',),
+    'message + layers': ('message', 'layer1', 'layer2', 'layer4'),
+}
+
+
+def run(build, reads, corpus, bot):
+    keep = []  # hold contexts so their allocations are counted
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    for message in corpus:
+        ctx = build(message, bot)
+        for key in reads:
+            ctx[key]
+        keep.append(ctx)
+    elapsed = time.perf_counter() - start
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    blocks = sum(s.count_diff for s in stats)
+    size = sum(s.size_diff for s in stats)
+    n = len(corpus)
+    return blocks / n, size / n, elapsed / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    bot = SimpleNamespace(name='VaultDwellersBot')
+
+    print(f"{'context':<8}{'engine reads':<20}{'blocks/msg':>12}{'bytes/msg':>12}{'us/msg':>10}")
+    for name, build in (('eager', eager), ('lazy', lazy)):
+        for label, reads in READS.items():
+            blocks, size, us = run(build, reads, corpus, bot)
+            print(f"{name:<8}{label:<20}{blocks:>12.1f}{size:>12.0f}{us:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+##
+## bench_quiz_parse.py :: parse-success rate and LLM calls per delivered quiz
+##
+## Replays model outputs (clean JSON, markdown fences, chatty preambles, escaped
+## apostrophes, truncation, free-form text) through:
+##   - legacy:     the original brace-fix -> json.loads -> 'Question:' split chain
+##   - extract:    QuizManager.parse_quiz (first-complete-object extraction first)
+##   - structured: QuizManager.generate_quiz with structured output + streaming
+##
+## Outputs come from --corpus, a JSONL file of recorded raw model outputs, one
+## {"mode": "free" | "structured", "raw": "..."} per line (the raw text QuizManager
+## logs at debug level), replayed in order. Without --corpus a built-in weighted mix
+## is SIMULATED: parse rates then only restate the mix weights, while the parser
+## timings and calls/quiz arithmetic are still meaningful.
+##
+## Usage: python benchmarks/bench_quiz_parse.py [--quizzes 2000] [--seed 7] [--corpus outputs.jsonl]
+##
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from owlmind.jsonstream import JSONObjectExtractor
+from quiz_manager import QuizManager
+
+QA = {"question": "Which faction controls Hoover Dam at the start of New Vegas?",
+      "answer": "The NCR, with Caesar's Legion massing on the east bank."}
+BODY = json.dumps(QA, ensure_ascii=False)
+
+# (weight, generator) pairs modelling unconstrained outputs
+FREE_FORM_OUTPUTS = [
+    (40, lambda: BODY),
+    (15, lambda: f"```json\n{BODY}\n```"),
+    (12, lambda: f"Sure! Here is your quiz:\n\n{BODY}\n\nLet me know if you want another."),
+    (8,  lambda: BODY.replace("Caesar's", "Caesar\\'s")),
+    (8,  lambda: BODY[:-1]),                                     # missing closing brace
+    (6,  lambda: BODY[:len(BODY) // 2]),                         # truncated mid-string
+    (6,  lambda: f"Question: {QA['question']}\nAnswer: {QA['answer']}"),
+    (5,  lambda: f"{{\"quiz\": {BODY}}}"),                         # wrong shape
+]
+# Constrained decoding still occasionally hits max tokens
+STRUCTURED_OUTPUTS = [
+    (97, lambda: BODY + "\n\n\n"),
+    (3,  lambda: BODY[:len(BODY) // 2]),
+]
+
+
+def simulated(rng, outputs):
+    """ Endless weighted draws from a built-in output mix """
+    generators, weights = [g for _, g in outputs], [w for w, _ in outputs]
+    return lambda: rng.choices(generators, weights=weights)[0]()
+
+
+def recorded(outputs):
+    """ Endless replay of recorded outputs, in order """
+    return itertools.cycle(outputs).__next__
+
+
+def load_corpus(path):
+    corpus = {'free': [], 'structured': []}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                corpus[record['mode']].append(record['raw'])
+    return corpus
+
+
+class FakeProvider:
+    """ Stands in for ModelProvider; request_json streams in small chunks like the real one """
+    def __init__(self, free, structured, chunk=8):
+        self.free = free
+        self.structured = structured
+        self.chunk = chunk
+        self.chunks_read = 0
+
+    def request(self, prompt, **kwargs):
+        return self.free()
+
+    def request_json(self, prompt, schema=None, **kwargs):
+        text = self.structured()
+        ex = JSONObjectExtractor()
+        for i in range(0, len(text), self.chunk):
+            self.chunks_read += 1
+            if ex.feed(text[i:i + self.chunk]) is not None:
+                break
+        return ex.result, ex.text
+
+
+def legacy_parse(raw):
+    """ The pre-structured-output parsing chain, kept here as the baseline """
+    clean = raw.strip().replace("\\'", "'")
+    opens, closes = clean.count('{'), clean.count('}')
+    if opens > closes:
+        clean += '}' * (opens - closes)
+    try:
+        payload = json.loads(clean)
+        return {"question": payload["question"].strip(), "answer": payload["answer"].strip()}
+    except (ValueError, KeyError):
+        if "Question:" in raw and "Answer:" in raw:
+            part = raw.split("Question:", 1)[1]
+            q_text, a_text = part.split("Answer:", 1)
+            return {"question": q_text.strip(), "answer": a_text.strip()}
+    return {"question": "generic", "answer": "fallback"}
+
+
+def deliver(quizzes, generate, max_calls):
+    """ Generate until `quizzes` non-fallback quizzes are delivered (what QuizBank.refill does) """
+    calls = delivered = 0
+    start = time.perf_counter()
+    while delivered < quizzes and calls < max_calls:
+        calls += 1
+        if generate().get("answer") != "fallback":
+            delivered += 1
+    return calls, delivered, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--quizzes', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--corpus', help='JSONL of recorded model outputs (default: simulated mix)')
+    args = parser.parse_args()
+
+    simulated_mix = {'free': FREE_FORM_OUTPUTS, 'structured': STRUCTURED_OUTPUTS}
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+        print(f"Replaying {len(corpus['free'])} free-form and {len(corpus['structured'])} "
+              f"structured outputs from {args.corpus}")
+    else:
+        corpus = None
+        print("SIMULATED outputs: 'parse ok' restates the built-in mix weights; pass --corpus to measure")
+
+    def source(mode):
+        """ A fresh output source, so every parser sees the same sequence """
+        if corpus is None:
+            return simulated(random.Random(args.seed), simulated_mix[mode])
+        return recorded(corpus[mode]) if corpus[mode] else None
+
+    # A corpus that never parses must not spin forever
+    max_calls = 20 * args.quizzes
+    results = {}
+    if source('free'):
+        free = source('free')
+        results['legacy'] = deliver(args.quizzes, lambda: legacy_parse(free()), max_calls)
+        free = source('free')
+        results['extract'] = deliver(args.quizzes, lambda: QuizManager.parse_quiz(free(), "lore"), max_calls)
+
+    provider = None
+    if source('structured'):
+        QuizManager.stats.clear()
+        provider = FakeProvider(source('free') or (lambda: ''), source('structured'))
+        QuizManager.initialize(provider)
+        QuizManager.structured = True
+        results['structured'] = deliver(args.quizzes, lambda: QuizManager.generate_quiz("lore"), max_calls)
+
+    print(f"{'mode':<12}{'parse ok':>10}{'calls/quiz':>12}{'parse us/call':>15}")
+    for mode, (calls, delivered, elapsed) in results.items():
+        per_quiz = f"{calls / delivered:>12.3f}" if delivered else f"{'-':>12}"
+        print(f"{mode:<12}{delivered / calls:>10.1%}{per_quiz}{elapsed / calls * 1e6:>15.1f}")
+    if provider:
+        print(f"structured mode read {provider.chunks_read / results['structured'][0]:.1f} stream chunks per call")
+    print(f"QuizManager.stats (structured run): {dict(QuizManager.stats)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+##
+## bench_rules.py :: rule-engine benchmarks on synthetic rule bases
+##
+## Generates rule bases of 100 to 100k ContextRecords with a realistic mix of conditions
+##   - literal:  message = 'vault tec rep'
+##   - glob:     message = '*rad*' / 'where is *'
+##   - regex:    message = 'r/^(hello|hi) .*$/'
+##   - nested:   message glob + profile/faction + profile/level regex (sub-Context match)
+## and replays a message corpus (synthetic, or one message per line from --corpus) through:
+##   - match_str: Context._match_str per condition kind
+##   - match:     Context.match of one record condition against a message context
+##   - compile:   Context.compile of a rule action with $var / ${sub/var} references
+##   - repo:      `message in ContextRepo`, as SimpleEngine.match_rules runs it, per size
+## Reports throughput, p50/p99 latency and tracemalloc peak memory (build + replay).
+##
+## Latencies are medians over --repeat passes; throughput is the best batch-timed pass
+## (interference only ever slows a pass down, so the best one is the stable estimate).
+## Baselines: --save results.json writes the results; --compare results.json prints the
+## change against a saved run and exits 1 when throughput regresses past --threshold
+## (a suspected regression is re-measured up to --confirm times before it counts).
+## p50/p99 changes are shown but not gated: per-call timings of sub-microsecond calls are
+## mostly timer overhead, and tails follow whatever else the machine is doing.
+##
+## Usage: python benchmarks/bench_rules.py [--sizes 100,1000,10000,100000] [--messages 2000]
+##                                        [--corpus chat.txt] [--save base.json] [--compare base.json]
+##
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import functools
+import platform
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from owlmind.context import Context, ContextRecord, ContextRepo
+
+Context.DEBUG = False
+
+WORDS = ['vault', 'tec', 'rad', 'away', 'nuka', 'cola', 'brotherhood', 'steel', 'enclave', 'ghoul',
+         'mutant', 'megaton', 'rivet', 'city', 'caps', 'stimpak', 'pip', 'boy', 'power', 'armor',
+         'deathclaw', 'raider', 'wasteland', 'overseer', 'quest', 'level', 'perk', 'special',
+         'strength', 'luck', 'quiz', 'help', 'hello', 'hi', 'where', 'what', 'how', 'is', 'the']
+FACTIONS = ['NCR', 'Legion', 'Brotherhood', 'Enclave', 'Minutemen', 'Institute']
+CHATTER = ['ok', 'lol', 'brb', 'thanks', 'anyone', 'playing', 'tonight', 'gg', 'nice', 'same',
+           'yeah', 'nope', 'maybe', 'later', 'cool', 'wow', 'afk', 'back', 'now', 'see']
+GREETINGS = ['hello', 'hi', 'hey', 'howdy', 'greetings']
+KINDS = ('literal', 'glob', 'regex', 'nested')
+WEIGHTS = (40, 30, 15, 15)
+
+
+##
+## SYNTHETIC DATA
+##
+
+def phrase(rng, lo=2, hi=5, words=WORDS):
+    return ' '.join(rng.choice(words) for _ in range(rng.randint(lo, hi)))
+
+
+def make_rule(rng, kind):
+    """ (condition, action, sample message that matches the condition) """
+    if kind == 'literal':
+        text = phrase(rng)
+        return {'message': text}, 'Literal answer to $message', text
+    if kind == 'glob':
+        word = rng.choice(WORDS)
+        if rng.random() < 0.5:
+            return {'message': f'*{word}*'}, f'Glob answer about {word}', f'{phrase(rng, 1, 3)} {word} {phrase(rng, 1, 3)}'
+        return {'message': f'{word} *'}, 'Prefix answer for $message', f'{word} {phrase(rng)}'
+    if kind == 'regex':
+        words = rng.sample(GREETINGS, 2)
+        return ({'message': f'r/^({words[0]}|{words[1]}) .*$/'}, 'Regex answer, hello ${profile/faction}',
+                f'{words[1]} {phrase(rng)}')
+    faction = rng.choice(FACTIONS)
+    word = rng.choice(WORDS)
+    condition = {'message': f'*{word}*', 'profile/faction': faction, 'profile/level': 'r/[0-9]+/'}
+    return condition, f'Nested answer for a level ${{profile/level}} {faction} member', f'{phrase(rng, 1, 2)} {word} {phrase(rng, 1, 2)}'
+
+
+def make_rules(size, seed=7):
+    rng = random.Random(seed)
+    return [(kind,) + make_rule(rng, kind) for kind in rng.choices(KINDS, WEIGHTS, k=size)]
+
+
+def make_repo(rules):
+    repo = ContextRepo()
+    for _, condition, action, _ in rules:
+        repo += ContextRecord(condition=condition, action=action)
+    return repo
+
+
+def message_context(rng, text):
+    return Context({'message': text, 'profile/faction': rng.choice(FACTIONS), 'profile/level': str(rng.randint(1, 50))})
+
+
+def make_corpus(rules, n, hit_ratio=0.6, seed=11, lines=None):
+    """ Message contexts: samples from the rules (hits) mixed with unrelated chat (mostly misses) """
+    rng = random.Random(seed)
+    if lines:
+        return [message_context(rng, rng.choice(lines)) for _ in range(n)]
+    corpus = []
+    for _ in range(n):
+        text = rng.choice(rules)[3] if rng.random() < hit_ratio else phrase(rng, 3, 8, CHATTER)
+        corpus.append(message_context(rng, text))
+    return corpus
+
+
+##
+## MEASUREMENT
+##
+
+def measure(fn, items, repeat=1, min_pass_s=0.2):
+    """
+    Per-call latency of fn(item): {'ops_per_s', 'p50_us', 'p99_us', 'mean_us', 'n', 'repeat'}.
+    Each repeat is one batch-timed pass (throughput, no per-call timer overhead; it loops over
+    `items` until it lasts `min_pass_s`, as timeit does) plus one pass timing every call
+    (percentiles). Throughput is the best pass, the percentiles the median over repeats.
+    """
+    perf = time.perf_counter
+    started = perf()
+    for item in items:
+        fn(item)    # warm-up (regex cache, lazily created attributes), and sizes the batch
+    loops = max(1, int(min_pass_s / max(perf() - started, 1e-9)))
+    rates, p50s, p99s = [], [], []
+    for _ in range(repeat):
+        started = perf()
+        for _ in range(loops):
+            for item in items:
+                fn(item)
+        rates.append(loops * len(items) / (perf() - started))
+        times = []
+        for item in items:
+            started = perf()
+            fn(item)
+            times.append(perf() - started)
+        times.sort()
+        p50s.append(times[len(times) // 2])
+        p99s.append(times[min(len(times) - 1, int(len(times) * 0.99))])
+    ops = max(rates)
+    return {
+        'n': len(items) * repeat,
+        'repeat': repeat,
+        'ops_per_s': ops,
+        'mean_us': 1e6 / ops,
+        'p50_us': 1e6 * statistics.median(p50s),
+        'p99_us': 1e6 * statistics.median(p99s),
+    }
+
+
+def peak_kb(fn):
+    """ tracemalloc peak while running fn() (separate pass: tracing slows everything down) """
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+# Each bench_* returns {series name: job}; a job measures its series when called (again
+# when --compare re-checks a suspected regression)
+
+def bench_match_str(rules, corpus, args):
+    jobs = {}
+    for kind in KINDS[:3]:
+        pairs = [(condition['message'], sample) for k, condition, _, sample in rules if k == kind][:500]
+        if pairs:
+            jobs[f'match_str/{kind}'] = functools.partial(
+                measure, lambda p: Context._match_str(*p), pairs, repeat=args.repeat)
+    return jobs
+
+
+def bench_match(rules, corpus, args):
+    rng = random.Random(3)
+    jobs = {}
+    for kind in KINDS:
+        records = [ContextRecord(condition=c, action=a) for k, c, a, _ in rules if k == kind][:500]
+        if records:
+            pairs = [(record.context, rng.choice(corpus)) for record in records]
+            jobs[f'match/{kind}'] = functools.partial(measure, lambda p: p[1].match(p[0]), pairs, repeat=args.repeat)
+    return jobs
+
+
+def bench_compile(rules, corpus, args):
+    rng = random.Random(5)
+    pairs = [(rng.choice(corpus), action) for _, _, action, _ in rules[:1000]]
+    return {'compile': functools.partial(measure, lambda p: p[0].compile(p[1]), pairs, repeat=args.repeat)}
+
+
+def bench_repo(size, args, lines=None):
+    rules = make_rules(size)
+    started = time.perf_counter()
+    repo = make_repo(rules)
+    build_s = time.perf_counter() - started
+    # Bigger bases scan more records per message: keep each size to a similar total work
+    n = max(20, min(args.messages, 2_000_000 // size))
+    corpus = make_corpus(rules, n, lines=lines)
+
+    result = measure(lambda msg: msg in repo, corpus, repeat=args.repeat)
+    result['build_s'] = build_s
+    result['hit_ratio'] = sum(1 for msg in corpus if msg.result) / len(corpus)
+    def build_and_replay():
+        repo = make_repo(rules)
+        for msg in corpus[:20]:
+            msg in repo
+
+    result['peak_kb'] = peak_kb(build_and_replay)
+    return result
+
+
+##
+## BASELINES
+##
+
+# (metric, sign, gated): sign +1 means higher is worse. Per-call percentiles carry timer and
+# scheduler noise (sub-microsecond calls are mostly timer): they are shown, not gated
+COMPARED = (('p50_us', 1, False), ('p99_us', 1, False), ('ops_per_s', -1, True))
+
+
+def _changes(result, base, threshold):
+    """ ([% change per COMPARED metric], regressed?) """
+    changes, worse = [], False
+    for metric, sign, gated in COMPARED:
+        change = 100 * (result[metric] - base[metric]) / base[metric] if base[metric] else 0.0
+        changes.append(change)
+        worse |= gated and sign * change > threshold
+    return changes, worse
+
+
+def compare(results, baseline, threshold):
+    """
+    Print changes against baseline; returns the number of regressions.
+    Only the batch-timed throughput can flag a regression; latency changes are shown in parentheses.
+    """
+    regressions = 0
+    print(f"\n{'vs baseline':<22}{'p50':>10}{'p99':>10}{'ops/s':>10}")
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        changes, worse = _changes(result, base, threshold)
+        cells = [f'{c:>+9.1f}%' if gated else f'{f"({c:+.1f}%)":>10}' for c, (_, _, gated) in zip(changes, COMPARED)]
+        regressions += worse
+        print(f"{name:<22}{''.join(cells)}{'  REGRESSION' if worse else ''}")
+    return regressions
+
+
+def confirm(results, jobs, baseline, threshold, rounds):
+    """
+    Re-measure series that look regressed, up to `rounds` times, keeping each one's best run:
+    a slow phase of a shared machine rarely lasts across re-runs, a real regression does.
+    """
+    for _ in range(rounds):
+        suspects = [name for name, result in results.items() if name in baseline.get('results', {})
+                    and _changes(result, baseline['results'][name], threshold)[1]]
+        if not suspects:
+            return
+        print(f"Re-checking {len(suspects)} suspected regression(s): {', '.join(suspects)}")
+        for name in suspects:
+            again = jobs[name]()
+            if again['ops_per_s'] > results[name]['ops_per_s']:
+                results[name] = again
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,1000,10000', help='rule base sizes, e.g. 100,1000,10000,100000')
+    parser.add_argument('--messages', type=int, default=2000, help='messages replayed per size (fewer for big bases)')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions for the micro-benchmarks')
+    parser.add_argument('--corpus', help='replay these messages (one per line) instead of synthetic ones')
+    parser.add_argument('--save', help='write results to this JSON file')
+    parser.add_argument('--compare', help='compare against a JSON file written by --save')
+    parser.add_argument('--threshold', type=float, default=10.0, help='regression threshold, percent')
+    parser.add_argument('--confirm', type=int, default=2, help='re-runs of a suspected regression before it counts')
+    args = parser.parse_args()
+
+    lines = None
+    if args.corpus:
+        with open(args.corpus, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+
+    rules = make_rules(2000)
+    corpus = make_corpus(rules, 1000, lines=lines)
+    jobs = {}
+    for bench in (bench_match_str, bench_match, bench_compile):
+        jobs.update(bench(rules, corpus, args))
+    for size in (int(s) for s in args.sizes.split(',')):
+        jobs[f'repo/{size}'] = functools.partial(bench_repo, size, args, lines)
+    results = {name: job() for name, job in jobs.items()}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        confirm(results, jobs, baseline, args.threshold, args.confirm)
+
+    print(f"{'benchmark':<22}{'n':>8}{'ops/s':>12}{'p50 us':>10}{'p99 us':>10}{'peak KB':>10}{'hits':>6}")
+    for name, r in results.items():
+        peak = f"{r['peak_kb']:>10.0f}" if 'peak_kb' in r else f"{'':>10}"
+        hits = f"{r['hit_ratio']:>6.0%}" if 'hit_ratio' in r else ''
+        print(f"{name:<22}{r['n']:>8}{r['ops_per_s']:>12.0f}{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}{peak}{hits}")
+
+    regressions = compare(results, baseline, args.threshold) if baseline else 0
+    if args.save:
+        meta = {'python': platform.python_version(), 'machine': platform.machine(),
+                'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'sizes': args.sizes}
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f'\nSaved {len(results)} results to {args.save}')
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
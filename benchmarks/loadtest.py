@@ -0,0 +1,441 @@
+##
+## loadtest.py :: end-to-end load test of the bot with fake Discord, model server and DynamoDB
+##
+## Runs the whole stack in one process, without Discord, Ollama or AWS:
+##   - messages:  synthetic discord.Message look-alikes fed to on_message() at --rate per second
+##                (open loop: arrivals do not wait for replies), replies land on fake channels
+##   - model:     ModelProvider points at a local stub HTTP server speaking the Ollama,
+##                OpenWebUI or OpenAI shape (plain, structured and streamed requests), with
+##                configurable latency/jitter, per-token delay and injected HTTP errors
+##   - store:     user_store's DynamoDB tables are swapped for in-memory tables (with an
+##                optional per-call latency) and the history archive for LocalHistoryArchive
+## Scenarios:
+##   - persisting: bot-1.py PersistingBot; users walk through /adventure start, /adventure quiz,
+##                 quiz answers, /stats and /help
+##   - simple:     DiscordBot + SimpleEngine; free chat goes to the model, plus /help and /info
+## Reports throughput, on_message latency (p50/p99/max), event-loop lag, upstream call counts
+## (model server by path/status, store by op, Discord sends) and the owlmind.metrics summary.
+##
+## Usage: python benchmarks/loadtest.py [--scenario persisting|simple|both] [--messages 500]
+##            [--rate 50] [--users 50] [--provider ollama|open-webui|openai] [--model-latency 0.2]
+##            [--jitter 0.1] [--token-delay 0.005] [--error-rate 0.02] [--store-latency 0.005]
+##
+
+import os
+import sys
+import copy
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import importlib.util
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+# boto3 needs a region to build the (never used) DynamoDB resource at import
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+from owlmind import metrics
+from owlmind.pipeline import ModelProvider
+from owlmind.simple import SimpleEngine
+from owlmind.discord import DiscordBot
+from owlmind.ratelimit import RateLimiter, FairScheduler
+import history
+import user_store
+from quiz_manager import QuizManager
+
+SUBJECTS = ['fallout lore', 'physics', 'nuka cola', 'the brotherhood of steel', 'power armor']
+CHAT = ['hello there', 'what is a pip-boy?', 'tell me about vault 101', 'who runs megaton?',
+        'how do I find stimpaks?', 'any tips for deathclaws?', 'what year did the bombs fall?']
+REPLY = 'The wasteland remembers. ' * 8
+
+
+##
+## FAKE MODEL SERVER
+##
+
+class StubModelServer:
+    """
+    Local HTTP server answering like Ollama (/api/generate), OpenWebUI (/api/chat/completions)
+    and OpenAI (/v1/chat/completions). Structured requests get a quiz JSON object; streamed
+    ones get NDJSON (Ollama) or server-sent events (OpenAI shapes), one fragment per token.
+    """
+
+    def __init__(self, latency=0.2, jitter=0.1, token_delay=0.005, error_rate=0.0, seed=1):
+        self.latency, self.jitter, self.token_delay, self.error_rate = latency, jitter, token_delay, error_rate
+        self.rng = random.Random(seed)
+        self.calls = Counter()      # (path, status) -> count
+        self.in_flight = self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='stub-model', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _draw(self):
+        with self._lock:
+            delay = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+            return delay, self.rng.random() < self.error_rate
+
+    @staticmethod
+    def _text(payload):
+        structured = 'format' in payload or 'response_format' in payload
+        if structured:
+            return json.dumps({'question': 'Which vault did the Lone Wanderer grow up in?', 'answer': 'Vault 101'})
+        return REPLY.strip()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _count(self, status):
+                with stub._lock:
+                    stub.calls[(self.path, status)] += 1
+
+            def do_GET(self):
+                self._count(200)
+                self._reply(200, {'models': [{'name': 'stub'}], 'data': [{'id': 'stub'}]})
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                with stub._lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    delay, fail = stub._draw()
+                    time.sleep(delay)
+                    if fail:
+                        self._count(500)
+                        return self._reply(500, {'error': 'injected failure'})
+                    self._count(200)
+                    text = stub._text(payload)
+                    ollama = self.path == '/api/generate'
+                    if not payload.get('stream'):
+                        if ollama:
+                            return self._reply(200, {'response': text, 'done': True})
+                        return self._reply(200, {'choices': [{'message': {'role': 'assistant', 'content': text}}]})
+                    self._stream(text, ollama)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+            def _stream(self, text, ollama):
+                # HTTP/1.0: no length, the body ends when the connection closes
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson' if ollama else 'text/event-stream')
+                self.end_headers()
+                try:
+                    for i in range(0, len(text), 4):
+                        piece = text[i:i + 4]
+                        if ollama:
+                            line = json.dumps({'response': piece, 'done': False})
+                        else:
+                            line = 'data: ' + json.dumps({'choices': [{'delta': {'content': piece}}]})
+                        self.wfile.write(line.encode() + b'\n')
+                        self.wfile.flush()
+                        if stub.token_delay:
+                            time.sleep(stub.token_delay)
+                    if not ollama:
+                        self.wfile.write(b'data: [DONE]\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass    # client closed early (request_json stops at the first object)
+
+        return Handler
+
+
+##
+## FAKE DYNAMODB
+##
+
+class MemoryTable:
+    """ The slice of a boto3 DynamoDB Table used by user_store, in memory """
+
+    def __init__(self, name, key='discordUserID', latency=0.0):
+        self.name = name
+        self.key = key
+        self.latency = latency
+        self.items = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, op):
+        with self._lock:
+            self.calls[op] += 1
+        if self.latency:
+            time.sleep(self.latency)    # boto3 calls block the calling thread
+
+    def get_item(self, Key):
+        self._call('get_item')
+        with self._lock:
+            item = self.items.get(Key[self.key])
+        return {'Item': copy.deepcopy(item)} if item is not None else {}
+
+    def put_item(self, Item):
+        self._call('put_item')
+        with self._lock:
+            self.items[Item[self.key]] = copy.deepcopy(Item)
+        return {}
+
+    def delete_item(self, Key):
+        self._call('delete_item')
+        with self._lock:
+            self.items.pop(Key[self.key], None)
+        return {}
+
+
+def install_memory_store(latency):
+    """ Point user_store at in-memory tables; returns them for call counts """
+    tables = {
+        'users': MemoryTable('VaultUsers', latency=latency),
+        'beliefs': MemoryTable('VaultAgentBeliefs', key='agentID', latency=latency),
+    }
+    user_store.table = tables['users']
+    user_store.belief_table = user_store.belief_checkpoints.table = tables['beliefs']
+    user_store.history_archive = history.LocalHistoryArchive()
+    return tables
+
+
+##
+## FAKE DISCORD
+##
+
+class FakeChannel:
+    def __init__(self, id, name='general'):
+        self.id = id
+        self.name = name
+        self.sent = 0
+        self.chars = 0
+
+    async def send(self, text):
+        await asyncio.sleep(0.001)      # a fast Discord round trip
+        self.sent += 1
+        self.chars += len(text)
+
+
+class Traffic:
+    """
+    Synthetic message stream: --users authors in --users // 5 guild channels, mentioning the bot.
+    Each author follows `script` (a list of message texts, cycled), so stateful flows like
+    quiz -> answer arrive in order per author.
+    """
+
+    def __init__(self, bot_user, users, script, seed=3):
+        self.rng = random.Random(seed)
+        self.bot_user = bot_user
+        self.guild = SimpleNamespace(id=900, name='Vault 101')
+        self.channels = [FakeChannel(1000 + i, f'general-{i}') for i in range(max(1, users // 5))]
+        self.authors = [SimpleNamespace(id=10_000 + i, name=f'dweller{i}', global_name=f'Dweller {i}', bot=False)
+                        for i in range(users)]
+        self.script = script
+        self.position = Counter()
+        self.next_id = 1_200_000_000_000_000_000
+
+    def message(self):
+        author = self.rng.choice(self.authors)
+        step = self.script[self.position[author.id] % len(self.script)]
+        self.position[author.id] += 1
+        text = step(self.rng) if callable(step) else step
+        self.next_id += 1
+        return SimpleNamespace(
+            id=self.next_id, author=author, guild=self.guild,
+            channel=self.channels[author.id % len(self.channels)],
+            mentions=[self.bot_user], content=f'<@{self.bot_user.id}> {text}',
+            attachments=[], reactions=[],
+        )
+
+
+PERSISTING_SCRIPT = [
+    '/start',
+    '5,4,4,4,4,4,3',
+    '/adventure start',
+    lambda rng: f'/adventure quiz {rng.choice(SUBJECTS)}',
+    lambda rng: rng.choice(['Vault 101', 'vault 101', 'no idea', 'Megaton']),
+    '/stats',
+    lambda rng: f'/adventure quiz {rng.choice(SUBJECTS)}',
+    'Vault 101',
+    '/help',
+]
+
+SIMPLE_SCRIPT = [
+    lambda rng: rng.choice(CHAT),
+    lambda rng: rng.choice(CHAT),
+    lambda rng: rng.choice(CHAT),
+    '/help',
+    '/info',
+]
+
+
+def load_bot_module():
+    """ bot-1.py is not importable by name """
+    spec = importlib.util.spec_from_file_location('bot_1', os.path.join(ROOT, 'bot-1.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    logging.getLogger().setLevel(logging.WARNING)   # bot-1 configures DEBUG logging at import
+    return module
+
+
+def make_bot(scenario, provider, args):
+    engine = SimpleEngine(id='loadtest')
+    engine.model_provider = provider
+    options = dict(
+        token='loadtest', engine=engine, promiscuous=False, debug=False,
+        limiter=RateLimiter() if args.limiter else None,
+        scheduler=FairScheduler(concurrency=args.llm_concurrency),
+    )
+    if scenario == 'persisting':
+        bot = load_bot_module().PersistingBot(**options)
+        script = PERSISTING_SCRIPT
+    else:
+        bot = DiscordBot(**options)
+        script = SIMPLE_SCRIPT
+    # Not logged in: give the client the identity on_message compares authors/mentions with
+    bot_user = SimpleNamespace(id=1, name='VaultDwellersBot', global_name='VaultDwellersBot', bot=True)
+    bot._connection.user = bot_user
+    return bot, Traffic(bot_user, args.users, script, seed=args.seed)
+
+
+##
+## DRIVER
+##
+
+class LoopLag:
+    """ Event-loop lag: how late a sleep(interval) wakes up """
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def drive(bot, traffic, args):
+    latencies, errors = [], Counter()
+    lag = LoopLag()
+
+    async def one(message):
+        started = time.perf_counter()
+        try:
+            await bot.on_message(message)
+        except Exception as e:
+            errors[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - started)
+
+    loop = asyncio.get_running_loop()
+    lag.start()
+    start = loop.time()
+    tasks = []
+    for i in range(args.messages):
+        delay = start + i / args.rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(traffic.message())))
+    await asyncio.gather(*tasks)
+    handled = loop.time() - start
+    await bot.outbound.drain(timeout=60)
+    delivered = loop.time() - start
+    await lag.stop()
+    return latencies, errors, lag.samples, handled, delivered
+
+
+def report(scenario, args, latencies, errors, lag, handled, delivered, server, tables, traffic, bot):
+    ms = lambda s: f'{1000 * s:.1f}ms'
+    print(f'\n=== {scenario}: {args.messages} messages at {args.rate}/s, {args.users} users, provider={args.provider}')
+    print(f'throughput:   {len(latencies) / handled:.1f} msg/s handled, all replies delivered after {delivered:.1f}s')
+    print(f'on_message:   p50={ms(percentile(latencies, 0.5))} p99={ms(percentile(latencies, 0.99))} '
+          f'max={ms(max(latencies, default=0))}' + (f'  errors={dict(errors)}' if errors else ''))
+    print(f'loop lag:     p50={ms(percentile(lag, 0.5))} p99={ms(percentile(lag, 0.99))} max={ms(max(lag, default=0))}')
+    model = ', '.join(f'{path} {status}: {n}' for (path, status), n in sorted(server.calls.items()))
+    print(f'model server: {model or "no calls"} (max {server.max_in_flight} in flight)')
+    store = ', '.join(f'{name}.{op}: {n}' for name, table in tables.items() for op, n in sorted(table.calls.items()))
+    print(f'store:        {store or "no calls"}')
+    sends = sum(c.sent for c in traffic.channels)
+    print(f'discord:      {sends} sends, {sum(c.chars for c in traffic.channels)} chars, outbound {dict(bot.outbound.stats)}')
+    print(f'executor:     {bot.executor.stats()}')
+
+
+async def run(scenario, args):
+    server = StubModelServer(args.model_latency, args.jitter, args.token_delay, args.error_rate, seed=args.seed).start()
+    tables = install_memory_store(args.store_latency)
+    provider = ModelProvider(type=args.provider, base_url=server.url, api_key='loadtest', model='stub')
+    QuizManager.initialize(provider)
+    metrics.REGISTRY.clear()
+    bot, traffic = make_bot(scenario, provider, args)
+    try:
+        results = await drive(bot, traffic, args)
+        report(scenario, args, *results, server, tables, traffic, bot)
+        if args.metrics:
+            print(metrics.summary())
+    finally:
+        if hasattr(bot, 'sessions'):
+            await asyncio.to_thread(bot.sessions.flush)
+        bot.executor.shutdown(wait=False)
+        server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', choices=('persisting', 'simple', 'both'), default='both')
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=50.0, help='messages per second (open loop)')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--provider', choices=('ollama', 'open-webui', 'openai'), default='ollama')
+    parser.add_argument('--model-latency', type=float, default=0.2, help='seconds to first byte')
+    parser.add_argument('--jitter', type=float, default=0.1, help='stddev of the model latency')
+    parser.add_argument('--token-delay', type=float, default=0.005, help='seconds between streamed fragments')
+    parser.add_argument('--error-rate', type=float, default=0.02, help='fraction of model calls answered with HTTP 500')
+    parser.add_argument('--store-latency', type=float, default=0.005, help='seconds per DynamoDB call')
+    parser.add_argument('--llm-concurrency', type=int, default=4)
+    parser.add_argument('--limiter', action='store_true', help='enable the default RateLimiter')
+    parser.add_argument('--no-metrics', dest='metrics', action='store_false', help='skip the metrics summary')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    metrics.enable(args.metrics)
+    for scenario in (('persisting', 'simple') if args.scenario == 'both' else (args.scenario,)):
+        asyncio.run(run(scenario, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,40 +1,77 @@
 import os
 import re
-import random
+import time
+import asyncio
 import logging
 from dotenv import dotenv_values
 import discord
 
 from owlmind.pipeline import ModelProvider
 from owlmind.simple import SimpleEngine
-from owlmind.discord import DiscordBot
-from user_store import get_or_create_user, save_user, table
-from adventure_manager import AdventureManager
+from owlmind.discord import DiscordBot, MESSAGE_SECONDS
+from owlmind.bot import BotMessage
+from owlmind.commands import CommandRouter
+from owlmind.ratelimit import RateLimiter, FairScheduler
+from owlmind.sharding import ShardConfig, ShardRunner
+from owlmind.watchdog import LoopWatchdog, set_activity
+from owlmind import metrics, tracing
+from user_store import get_or_create_user, save_user, delete_user
+from adventure_manager import AdventureManager, AWAITING_QUIZ
 from quiz_manager import QuizManager
+from session_manager import SessionRegistry
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# XP needed to level up
-LEVEL_XP = 5
-# Basic perks pool
-PERKS_POOL = [
-    "Novice Scholar",
-    "Insightful",
-    "Quick Thinker",
-    "Resourceful",
-    "Lucky Streak"
-]
+# Pre-generated quizzes survive restarts here
+QUIZ_BANK_PATH = "quiz_bank.json"
+# Idle sessions are checkpointed and evicted after this many seconds
+SESSION_IDLE_TIMEOUT = 900
+
+MENTION_RE = re.compile(r"<@!?\d+>")
+SPECIAL_RE = re.compile(r"\d+(,\s*\d+){6}")
+SPECIAL_LABELS = ["Strength", "Perception", "Endurance", "Charisma", "Intelligence", "Agility", "Luck"]
 
 class PersistingBot(DiscordBot):
+    def __init__(self, *args, cache_sessions=True, **kwargs):
+        super().__init__(*args, **kwargs)
+        # cache_sessions=False: load and save the user on every message (see build_bot)
+        self.sessions = SessionRegistry(
+            get_or_create_user, AdventureManager, idle_timeout=SESSION_IDLE_TIMEOUT, cache=cache_sessions
+        )
+        self._evictor = None
+        self._register_commands()
+
+    async def _evict_sessions(self):
+        while not self.is_closed():
+            await asyncio.sleep(SESSION_IDLE_TIMEOUT / 4)
+            evicted = await asyncio.to_thread(self.sessions.evict_idle)
+            if evicted:
+                logger.debug("Evicted %d idle session(s).", evicted)
+
+    async def close(self):
+        await asyncio.to_thread(self.sessions.flush)
+        await super().close()
+
     async def on_ready(self):
         logger.debug("Bot is ready and connected.")
+        if self._evictor is None:
+            self._evictor = asyncio.create_task(self._evict_sessions())
         if QuizManager.provider is None:
             logger.debug("Initializing QuizManager provider.")
             QuizManager.initialize(self.engine.model_provider)
+            # One bank file per worker process when sharded
+            bank_path = QUIZ_BANK_PATH
+            if self.shard_ids:
+                bank_path = QUIZ_BANK_PATH.replace(".json", f"-{self.shard_ids[0]}.json")
+            QuizManager.enable_bank(path=bank_path, warm=["fallout lore"])
             logger.debug("QuizManager provider initialized.")
 
+    def clean_text(self, message):
+        text = MENTION_RE.sub("", message.content).strip()
+        return text.replace(f"@{self.user.name}", "").strip()
+
     async def on_message(self, message):
         if message.author == self.user or (
             not self.promiscuous and
@@ -42,121 +79,167 @@ class PersistingBot(DiscordBot):
         ):
             return
 
-        text = re.sub(r"<@!?\d+>", "", message.content).strip()
-        text = text.replace(f"@{self.user.name}", "").strip()
+        text = self.clean_text(message)
         if not text:
             return
 
         logger.debug(f"Received message: {text}")
+        started = time.perf_counter()
         uid = str(message.author.id)
-        user = get_or_create_user(uid)
-        manager = AdventureManager(user)
-
-        # Help command
-        if text.lower().startswith("/help"):
-            reply = (
-                "**VaultDwellersBot Commands**\n"
-                "• /adventure start — Begin a new adventure\n"
-                "• /adventure quiz <subject> — Face a skill check on any topic\n"
-                "• /reset or /restart — Wipe your profile and start over\n"
-                "• /stats — View your SPECIAL, XP, and Level\n"
-                "• /start — Allocate your SPECIAL points (initial setup)"
-            )
-            return await message.channel.send(reply)
 
-        # Reset/restart
-        if text.lower().startswith("/reset") or text.lower().startswith("/restart"):
-            table.delete_item(Key={"discordUserID": uid})
-            return await message.channel.send(
-                "🔄 Your VaultDweller profile has been reset. Run `/adventure start` to begin again!"
-            )
+        # Head-sampled: unsampled messages get no-op spans all the way down
+        with tracing.trace("discord.message", key=message.id, channel=message.channel.id) as span:
+            spec, args = self.commands.route(text)
+            # Stall reports from the loop watchdog name the handler and command
+            set_activity(f"PersistingBot.on_message {spec.name if spec else 'text'}")
 
-        # Start adventure
-        if text.lower().startswith("/adventure start"):
-            resp = manager.start()
-            save_user(user)
-            return await message.channel.send(resp)
-
-        # Quiz command
-        if text.lower().startswith("/adventure quiz"):
-            parts = text.split(" ", 2)
-            subject = parts[2] if len(parts) >= 3 else "fallout lore"
-            resp = manager.next_quiz(subject)
-            logger.debug("<< Quiz payload: %r", manager.state['payload'])
-            save_user(user)
-            return await message.channel.send(resp)
-
-        # Stats command
-        if text.lower().strip() == "/stats":
-            xp = user.get("XP", 0)
-            level = user.get("Level", 1)
-            stats = user.get("SPECIAL", {})
-            perks = user.get("Perks", [])
-            reply = f"**Vault Dweller Profile**\n• XP: {xp}   Level: {level}\n• SPECIAL:\n"
-            reply += "\n".join(f"  – {k}: {v}" for k, v in stats.items())
-            reply += f"\n• Perks: {', '.join(perks) or 'None'}"
-            return await message.channel.send(reply)
+            # Throttle model-bound commands and free text (quiz answers write to the store)
+            costly = spec.needs_llm if spec else not text.startswith("/")
+            if costly and self.limiter:
+                throttle = self.limiter.check(
+                    author=uid,
+                    channel=message.channel.id,
+                    guild=message.guild.id if message.guild else None,
+                )
+                if not throttle.allowed:
+                    if throttle.notify:
+                        self.outbound.send(message.channel, self.SLOW_DOWN.format(retry=max(1, throttle.retry_after)))
+                    MESSAGE_SECONDS.observe(time.perf_counter() - started, outcome="throttled")
+                    span.set("outcome", "throttled")
+                    return
 
-        # Handle quiz answer if awaiting
-        if manager.state.get("awaiting") == "quiz":
-            user_answer = text.strip()
-            logger.debug(f"User answer: {user_answer}")
+            session = None
+            if spec:
+                # Stateless commands never touch the user store
+                session = await self.sessions.aget(uid) if spec.needs_user else None
+                reply = await spec.handler(message, args, session)
+            elif text.startswith("/"):
+                reply = f"Unknown command `{text.split()[0]}`. Send `/help` for the list of commands."
+            else:
+                session = await self.sessions.aget(uid)
+                reply = await self.handle_text(text, session)
+            if session:
+                await self.sessions.arelease(session)
 
-            passed, fallback = QuizManager.evaluate(user_answer, manager.state['payload'].get('answer', ''))
-            correct_answer_text = manager.state['payload'].get('answer', '')
+            if reply:
+                self.outbound.send(message.channel, reply)
+            outcome = spec.name if spec else ("unknown" if text.startswith("/") else "text")
+            MESSAGE_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+            span.set("outcome", outcome)
 
-            # If fallback question (open-ended), always count as passed
-            if fallback:
-                passed = True
+    ##
+    ## COMMANDS
+    ##
 
-            level_msg = ''
-            if passed:
-                user['XP'] = user.get('XP', 0) + 1
-                if user['XP'] % LEVEL_XP == 0:
-                    user['Level'] = user.get('Level', 1) + 1
-                    perk = random.choice(PERKS_POOL)
-                    user.setdefault('Perks', []).append(perk)
-                    level_msg = f"🎉 You leveled up to Level {user['Level']}! Perk gained: {perk}."
+    def _register_commands(self):
+        self.commands = CommandRouter()
+        register = self.commands.register
+        register("/help", self.cmd_help, help="show this help")
+        register("/adventure start", self.cmd_adventure_start, needs_user=True,
+                 help="Begin a new adventure")
+        register("/adventure quiz", self.cmd_adventure_quiz, needs_user=True, needs_llm=True,
+                 help="Face a skill check on any topic: `/adventure quiz <subject>`")
+        register("/reset", self.cmd_reset, aliases=["/restart"],
+                 help="Wipe your profile and start over")
+        register("/stats", self.cmd_stats, needs_user=True, help="View your SPECIAL, XP, and Level")
+        register("/start", self.cmd_start, needs_user=True,
+                 help="Allocate your SPECIAL points (initial setup)")
+        # Engine commands (/info, /reload, ...) the bot doesn't override
+        if self.engine and hasattr(self.engine, "commands"):
+            for spec in self.engine.commands:
+                if spec.name not in self.commands:
+                    register(spec.name, self.cmd_engine, aliases=spec.aliases, needs_user=spec.needs_user,
+                             needs_llm=spec.needs_llm, help=spec.help, admin=spec.admin)
 
-            story = manager.handle_answer(user_answer)
+    async def cmd_help(self, message, args, session):
+        # Generated from the help= text of every registered command (engine ones included)
+        return f"**VaultDwellersBot Commands**\n{self.commands.help()}"
 
-            # Only show correct answer if it was NOT a fallback
-            if not passed and not fallback:
-                story += f"\n📖 Correct Answer: {correct_answer_text}"
+    async def cmd_engine(self, message, args, session):
+        # Delegate to the engine's own command handling
+        # layer4 (author id) lets the engine check admin-only commands
+        context = BotMessage(message=self.clean_text(message), layer4=message.author.id)
+        return await self.engine.handle(context)
 
-            if level_msg:
-                story += f"\n{level_msg}"
+    async def cmd_reset(self, message, args, session):
+        uid = str(message.author.id)
+        await asyncio.to_thread(self._reset_user, uid)
+        return "🔄 Your VaultDweller profile has been reset. Run `/adventure start` to begin again!"
 
-            save_user(user)
-            return await message.channel.send(story)
-
-        # Initial SPECIAL allocation (/start)
-        if text.lower().startswith("/start"):
-            if user.get("XP", 0) != 0 or user.get('SPECIAL'):
-                return await message.channel.send("You’ve already set up your SPECIAL stats.")
-            return await message.channel.send(
-                "Welcome to VaultDwellersBot! You have **28** points to assign across your SPECIAL stats.\n"
-                "Reply with 7 comma-separated integers (must sum to 28) in order:\n"
-                "`Strength, Perception, Endurance, Charisma, Intelligence, Agility, Luck`"
+    def _reset_user(self, uid):
+        # Blocking: drop() waits out a checkpoint being written, so it can't recreate the profile
+        self.sessions.drop(uid)
+        delete_user(uid)
+
+    async def cmd_adventure_start(self, message, args, session):
+        return session.adventure.start()
+
+    async def cmd_adventure_quiz(self, message, args, session):
+        subject = args or "fallout lore"
+        # Generation may hit the model: run it off the event loop, fair-queued per user
+        async with self.llm_slot(session.uid):
+            resp = await self.executor.run('quiz.generate', session.adventure.next_quiz, subject)
+        logger.debug("<< Quiz payload: %r", session.adventure.state['payload'])
+        return resp
+
+    async def cmd_stats(self, message, args, session):
+        user = session.user
+        xp = user.get("XP", 0)
+        level = user.get("Level", 1)
+        stats = user.get("SPECIAL", {})
+        perks = user.get("Perks", [])
+        reply = f"**Vault Dweller Profile**\n• XP: {xp}   Level: {level}\n• SPECIAL:\n"
+        reply += "\n".join(f"  – {k}: {v}" for k, v in stats.items())
+        reply += f"\n• Perks: {', '.join(perks) or 'None'}"
+        return reply
+
+    async def cmd_start(self, message, args, session):
+        # Initial SPECIAL allocation
+        user = session.user
+        if user.get("XP", 0) != 0 or user.get('SPECIAL'):
+            return "You’ve already set up your SPECIAL stats."
+        return (
+            "Welcome to VaultDwellersBot! You have **28** points to assign across your SPECIAL stats.\n"
+            "Reply with 7 comma-separated integers (must sum to 28) in order:\n"
+            "`Strength, Perception, Endurance, Charisma, Intelligence, Agility, Luck`"
+        )
+
+    ##
+    ## FREE TEXT (quiz answers, SPECIAL allocation)
+    ##
+
+    async def handle_text(self, text, session):
+        user, manager = session.user, session.adventure
+
+        # Handle quiz answer if awaiting
+        if manager.phase == AWAITING_QUIZ:
+            logger.debug(f"User answer: {text}")
+            # Matching long answers is CPU work: the executor runs small ones inline
+            answer = manager.state['payload'].get('answer', '')
+            evaluation = await self.executor.run(
+                'quiz.evaluate', QuizManager.evaluate, text, answer, size=len(text) + len(answer)
             )
+            if manager.phase != AWAITING_QUIZ or manager.state['payload'].get('answer') != answer:
+                return None  # another message answered this quiz while we were matching
+            # XP, leveling and perks are handled (and persisted) by the manager
+            return manager.handle_answer(text, evaluation=evaluation)
 
         # Handle SPECIAL allocation
-        if re.fullmatch(r"\d+(,\s*\d+){6}", text):
+        if SPECIAL_RE.fullmatch(text):
             parts = [int(x) for x in text.split(",")]
             if sum(parts) != 28:
-                return await message.channel.send("❌ That doesn’t sum to 28—try again.")
-            labels = ["Strength", "Perception", "Endurance", "Charisma", "Intelligence", "Agility", "Luck"]
-            stats = dict(zip(labels, parts))
+                return "❌ That doesn’t sum to 28—try again."
+            stats = dict(zip(SPECIAL_LABELS, parts))
             user['SPECIAL'] = stats
             user['XP'] = 0
             user['Level'] = 1
             user['Perks'] = []
             save_user(user)
-            return await message.channel.send(
-                f"SPECIAL set to {stats}!\nYou can now send `/stats` or just chat."
-            )
+            return f"SPECIAL set to {stats}!\nYou can now send `/stats` or just chat."
+        return None
 
-if __name__ == "__main__":
+def build_bot(shard_ids=None, shard_count=None):
+    """ Build a PersistingBot for the given shards (also used by sharded worker processes) """
     cfg = dotenv_values(".env")
     TOKEN = cfg.get("DISCORD_TOKEN")
     URL = cfg.get("SERVER_URL")
@@ -172,8 +255,40 @@ if __name__ == "__main__":
         api_key=cfg.get("SERVER_API_KEY"),
         model=MODEL
     )
+    if cfg.get("METRICS"):
+        # Latency histograms: /metrics on HEALTH_PORT plus a periodic log summary
+        metrics.enable()
+        metrics.Reporter(interval=float(cfg.get("METRICS_LOG_INTERVAL") or 60)).start()
+    if cfg.get("TRACE_SAMPLE_RATE"):
+        # Per-message span trees, to a collector (OTLP/JSON over HTTP) or a local JSONL file
+        if cfg.get("TRACE_OTLP_URL"):
+            exporter = tracing.OTLPExporter(cfg["TRACE_OTLP_URL"], service="bot-1")
+        else:
+            exporter = tracing.JsonlExporter(cfg.get("TRACE_PATH") or "traces.jsonl")
+        tracing.configure(sample_rate=float(cfg["TRACE_SAMPLE_RATE"]), exporter=exporter)
+
     engine = SimpleEngine(id="bot-1")
     engine.model_provider = provider
+    if cfg.get("RULES_PATH"):
+        # Rule-first: greetings and canned answers skip the model
+        engine.load(cfg["RULES_PATH"])
+        if cfg.get("RULE_THRESHOLD"):
+            engine.rule_threshold = float(cfg["RULE_THRESHOLD"])
+    # Users are not shard-local (DMs go to shard 0, a user's guilds can sit on other
+    # workers): a worker owning only some shards must not cache user records
+    owns_all_shards = not shard_ids or len(shard_ids) >= (shard_count or 0)
 
-    bot = PersistingBot(token=TOKEN, engine=engine, promiscuous=False, debug=True)
-    bot.run()
+    # Discord user ids allowed to run admin commands such as /profile
+    engine.admins = {uid.strip() for uid in (cfg.get("ADMIN_IDS") or "").split(",") if uid.strip()}
+
+    return PersistingBot(
+        token=TOKEN, engine=engine, promiscuous=False, debug=True,
+        limiter=RateLimiter(),
+        scheduler=FairScheduler(concurrency=int(cfg.get("LLM_CONCURRENCY") or 4)),
+        shard_ids=shard_ids, shard_count=shard_count, cache_sessions=owns_all_shards,
+        watchdog=LoopWatchdog(threshold=float(cfg["LOOP_WATCHDOG_MS"]) / 1000) if cfg.get("LOOP_WATCHDOG_MS") else None,
+    )
+
+if __name__ == "__main__":
+    cfg = dotenv_values(".env")
+    ShardRunner(build_bot, ShardConfig.from_config(cfg)).run()
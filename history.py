@@ -0,0 +1,131 @@
+# history.py
+
+import os
+import json
+import time
+import threading
+from collections import defaultdict
+
+# Number of most-recent events kept inline on the user item ('History')
+HISTORY_INLINE_LIMIT = 20
+# Default page size for read_history()
+HISTORY_PAGE_SIZE = 20
+
+
+def record_event(user: dict, kind: str, **data) -> dict:
+    """
+    Append an event to the user's inline History ring.
+    Events carry a per-user monotonically increasing 'seq' used as the archive sort key.
+    The ring is trimmed (spilled to the archive) by compact(), normally on save.
+    """
+    seq = int(user.get('HistorySeq', 0)) + 1
+    user['HistorySeq'] = seq
+    event = {'seq': seq, 'ts': int(time.time()), 'type': kind, **data}
+    user.setdefault('History', []).append(event)
+    return event
+
+def _normalize(user: dict) -> list:
+    """
+    Give sequence numbers to legacy History entries written before events were sequenced.
+    """
+    history = user.get('History') or []
+    if all(isinstance(e, dict) and 'seq' in e for e in history):
+        return history
+
+    seq = int(user.get('HistorySeq', 0))
+    normalized = []
+    for event in history:
+        if not (isinstance(event, dict) and 'seq' in event):
+            seq += 1
+            event = dict(event, seq=seq) if isinstance(event, dict) else {'seq': seq, 'type': 'legacy', 'value': event}
+        normalized.append(event)
+    user['HistorySeq'] = max([seq] + [int(e['seq']) for e in normalized])
+    user['History'] = normalized
+    return normalized
+
+def compact(user: dict, archive, limit: int = HISTORY_INLINE_LIMIT) -> int:
+    """
+    Keep only the newest `limit` events inline; spill older ones to `archive`.
+    Returns the number of events spilled.
+    """
+    history = _normalize(user)
+    overflow = len(history) - limit
+    if overflow <= 0:
+        return 0
+
+    # Archive first: appends are idempotent (keyed by seq), so a failed
+    # user write afterwards never loses events.
+    archive.append(user['discordUserID'], history[:overflow])
+    user['History'] = history[overflow:]
+    return overflow
+
+def read_history(user: dict, archive, limit: int = HISTORY_PAGE_SIZE, before: int = None):
+    """
+    Paginated read of a user's history, newest first, across the inline ring and the archive.
+    Returns (events, cursor); pass `cursor` as `before` to fetch the next page (None when exhausted).
+    """
+    inline = [e for e in reversed(_normalize(user)) if before is None or e['seq'] < before]
+    events = inline[:limit]
+
+    if len(events) < limit:
+        # Everything in the archive is older than the oldest inline event
+        bounds = [int(user['History'][0]['seq'])] if user.get('History') else []
+        bounds += [before] if before is not None else []
+        bound = min(bounds) if bounds else None
+        events += archive.read(user['discordUserID'], before=bound, limit=limit - len(events))
+
+    cursor = int(events[-1]['seq']) if len(events) == limit else None
+    return events, cursor
+
+
+# --- Archives ---
+
+class LocalHistoryArchive:
+    """
+    Append-only history archive kept in memory, optionally backed by one JSONL file per user.
+    Implements the same append()/read()/delete() interface as user_store.DynamoHistoryArchive.
+    """
+    def __init__(self, path: str = None):
+        self.path = path
+        self._events = defaultdict(dict)
+        self._loaded = set()
+        self._lock = threading.Lock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, uid):
+        return os.path.join(self.path, f'{uid}.jsonl')
+
+    def _load(self, uid):
+        if not self.path or uid in self._loaded:
+            return
+        self._loaded.add(uid)
+        if os.path.exists(self._file(uid)):
+            with open(self._file(uid), encoding='utf-8') as f:
+                for line in f:
+                    event = json.loads(line)
+                    self._events[uid][event['seq']] = event
+
+    def append(self, uid, events):
+        with self._lock:
+            self._load(uid)
+            new = [e for e in events if int(e['seq']) not in self._events[uid]]
+            for event in new:
+                self._events[uid][int(event['seq'])] = event
+            if self.path and new:
+                with open(self._file(uid), 'a', encoding='utf-8') as f:
+                    for event in new:
+                        f.write(json.dumps(event, default=str) + '\n')
+
+    def read(self, uid, before: int = None, limit: int = HISTORY_PAGE_SIZE):
+        with self._lock:
+            self._load(uid)
+            seqs = sorted((s for s in self._events[uid] if before is None or s < before), reverse=True)
+            return [self._events[uid][s] for s in seqs[:limit]]
+
+    def delete(self, uid):
+        with self._lock:
+            self._events.pop(uid, None)
+            self._loaded.discard(uid)
+            if self.path and os.path.exists(self._file(uid)):
+                os.remove(self._file(uid))
@@ -0,0 +1,82 @@
+# leveling.py
+
+import random
+from bisect import bisect_right
+from collections import namedtuple
+
+# LEVEL_THRESHOLDS: The XP thresholds required for each level.
+LEVEL_THRESHOLDS = {
+     1:    5,
+     2:   10,
+     3:   15,
+     4:   20,
+     5:   25,
+     6:   30,
+     7:   35,
+     8:   40,
+     9:   45,
+    10:   50,
+}
+
+# Perks granted upon leveling up
+PERKS = [
+    "Quick Learner",      # XP gain boost
+    "Fortitude",         # Resist failure consequences
+    "Silver Tongue",     # Better negotiation
+    "Sharpshooter",      # Improved precision
+    "Lucky"              # Increased chance of success
+]
+
+# Precomputed level table, sorted by XP requirement, for bisect lookups
+_LEVEL_TABLE = sorted(LEVEL_THRESHOLDS.items(), key=lambda item: item[1])
+_REQUIRED_XP = [req for _, req in _LEVEL_TABLE]
+_LEVELS = [lvl for lvl, _ in _LEVEL_TABLE]
+
+# Result of award_xp(); 'perks' lists the perks granted by this award
+XPAward = namedtuple('XPAward', ['xp', 'old_level', 'new_level', 'perks'])
+
+
+def level_for_xp(xp: int, floor: int = 1) -> int:
+    """
+    Return the highest level whose threshold is reached by `xp` (or `floor` if none).
+    """
+    i = bisect_right(_REQUIRED_XP, xp)
+    return max(floor, _LEVELS[i - 1]) if i else floor
+
+def grant_random_perk(user: dict, level: int):
+    """
+    Default perk hook: grant one random perk the user doesn't own yet
+    (any perk once they own them all). Returns the perk granted.
+    """
+    owned = user.setdefault('Perks', [])
+    choices = [p for p in PERKS if p not in owned] or PERKS
+    perk = random.choice(choices)
+    owned.append(perk)
+    return perk
+
+def award_xp(user: dict, base_xp: int = 1, perk_hook=grant_random_perk) -> XPAward:
+    """
+    Grants XP = base_xp + (Intelligence // 3) and updates Level in place.
+    A single award can jump several levels; `perk_hook(user, level)` is called
+    once per level gained (pass None to skip perks).
+    Users are never demoted below their current Level.
+    The caller is responsible for persisting the user record.
+    """
+    # DynamoDB hands numbers back as Decimal
+    intel = int(user.get("SPECIAL", {}).get("Intelligence", 0))
+    total = base_xp + intel // 3
+
+    user["XP"] = user.get("XP", 0) + total
+
+    old = int(user.get("Level", 1))
+    new = level_for_xp(user["XP"], floor=old)
+    user["Level"] = new
+
+    perks = []
+    if perk_hook:
+        for level in range(old + 1, new + 1):
+            perk = perk_hook(user, level)
+            if perk:
+                perks.append(perk)
+
+    return XPAward(total, old, new, perks)
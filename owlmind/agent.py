@@ -24,8 +24,17 @@
 # Generative AI has been used extensively while developing this package.
 # 
 
-from collections import deque
+import re
+import time
+import random
+import asyncio
+import inspect
+from collections import deque, namedtuple, OrderedDict
 from .context import Context, ContextRecord, ContextRepo
+from .beliefs import BeliefStore
+
+# One entry of Agent.trace; kind is 'deliberate', 'act' or 'halt'
+Step = namedtuple('Step', ['n', 'kind', 'target', 'elapsed', 'result'])
 
 class Belief(Context):
     def __init__(self, facts):
@@ -99,27 +108,48 @@ class Agent():
                condition = {'code': '*'},
                action = '@print($code)')
     
-    ag += Command(goal='print_code', parameters={'code' : 'COT6930'})
-    ag.run()
+    ag += Command(goal='print_code', context={'code' : 'COT6930'})
+    trace = ag.deliberate()      #-> prints COT6930; trace lists each step with its timing
+
+    Actions are '@capability(arg, ...)' strings or ('@capability', arg, ...) tuples; a Plan
+    action that is a list yields several actions, executed concurrently. Any other string
+    is a sub-goal, deliberated on in the same local context. Capabilities that return
+    knowledge (Plan, Belief, Command, ...) have it learned by the agent.
 
     """
 
     DEBUG : bool = False
     STEPS : int  = 100
+    MEMO_SIZE : int = 1024
+    BUDGET : float = 10.0   # wall-clock seconds per process()
     BASE : str = None
 
-    def __init__(self, id):
+    def __init__(self, id, checkpoints=None):
         """
         Initialization
         param: id as agent identifier.
+        param: checkpoints, optional backend for durable belief checkpoints (see BeliefStore);
+               the last checkpoint is restored here.
         """
         self.id = id
-        self.beliefs = Context()
+        self.beliefs = BeliefStore(checkpoints=checkpoints, key=id)
+        self._snapshot = None   # beliefs as of the current deliberation round
         self.plans = PlanBase()
         self.capabilities = CapabilityBase()
         self._current_command : Command = None
         self._delib_queue : deque = deque()
         self._action_queue : deque = deque()
+        self.trace : list = []
+        # @goal -> [Capability], in registration order
+        self._capability_index : dict = {}
+        # (goal, command fingerprint) -> alternatives of compiled actions
+        self._plan_memo : OrderedDict = OrderedDict()
+        # belief name -> memo keys whose actions read it (through $vars)
+        self._memo_deps : dict = {}
+        self.memo_stats = {'hits': 0, 'misses': 0, 'invalidated': 0}
+        self.beliefs.subscribe(self._beliefs_changed)
+        if checkpoints:
+            self.beliefs.restore()
         return 
     
     def __iadd__(self, knowledge):
@@ -128,8 +158,12 @@ class Agent():
         """
         if isinstance(knowledge, Plan):
             self.plans += knowledge
+            self.forget_plans()
         elif isinstance(knowledge, Capability):
+            before = len(self.capabilities)
             self.capabilities += knowledge
+            if len(self.capabilities) > before:
+                self._capability_index.setdefault(knowledge.namespace, []).append(knowledge)
         elif isinstance(knowledge, Command):
             self._delib_queue.append(knowledge)
         elif isinstance(knowledge, Belief) or isinstance(knowledge, dict):
@@ -147,48 +181,230 @@ class Agent():
     ## DELIBERATION LOGIC
     ##
 
+    ACTION_RE = re.compile(r'^(@[\w.\-]+)\s*(?:\((.*)\))?$', re.DOTALL)
+
     @staticmethod
     def is_action(goal): 
         return (isinstance(goal, str) and goal.startswith('@')) or \
                (isinstance(goal, tuple) and goal[0].startswith('@'))
-    
-    def deliberate(self):
-        """ 
-        Deliberation process
-        """
 
-        #
-        # (1) Execute 'Requests for Deliberation' (Commands) in the deliberation queue
+    @staticmethod
+    def parse_action(action):
+        """
+        Split an action into (name, args).
+        Accepts ('@name', arg, ...) tuples and '@name' / '@name(arg, ...)' strings.
+        """
+        if isinstance(action, tuple):
+            return action[0], list(action[1:])
+        m = Agent.ACTION_RE.match(action.strip())
+        if not m:
+            return action, []
+        args = m.group(2)
+        return m.group(1), [a.strip() for a in args.split(',')] if args and args.strip() else []
+
+    def _compile(self, action, cmd):
+        """ Plan action -> [('act', name, args) | ('goal', goal)], with $vars resolved in cmd's scope """
+        entries = []
+        for step in (action if isinstance(action, list) else [action]):
+            if Agent.is_action(step):
+                name, args = Agent.parse_action(step)
+                entries.append(('act', name, cmd.compile(args)))
+            else:
+                entries.append(('goal', cmd.compile(step)))
+        return entries
 
-        while self._delib_queue:
-            cmd : Command = self._delib_queue.popleft()
-            self._local_context = cmd
-            goal = cmd.namespace
+    VAR_RE = re.compile(r"\$(\w+)|\$\{([\w/]+)\}")   # as in Context.compile
 
-            if Agent.is_action(goal):
-                goal = self.beliefs.compile(sentence=goal)
-                self._action_queue.append(goal)
-            elif cmd in self.plans:
-                for action, weight in cmd.result:
-                    self += Command(goal=action, context=self._local_context)
+    @staticmethod
+    def _reads(action) -> set:
+        """ Top-level names an action's $vars may read from beliefs """
+        text = repr(action)
+        return {(m.group(1) or m.group(2)).split('/', 1)[0] for m in Agent.VAR_RE.finditer(text)}
+
+    def _memo_key(self, cmd):
+        # Keyed on the facts themselves, not their hash: a collision must not serve another plan
+        try:
+            key = (cmd.namespace, tuple(sorted(cmd.items())))
+            hash(key)
+            return key
+        except TypeError:
+            return None     # unhashable facts: no memo
+
+    def _beliefs_changed(self, changes):
+        """ Drop only the memoized selections whose actions read a changed belief """
+        for root in changes.roots():
+            for key in self._memo_deps.pop(root, ()):
+                if self._plan_memo.pop(key, None) is not None:
+                    self.memo_stats['invalidated'] += 1
+
+    def _select(self, cmd):
+        """
+        Compiled actions of the best-matching Plan for cmd (ties broken at random).
+        Memoized on (goal, command facts): repeated commands skip rule matching.
+        Adding a Plan clears the memo; a belief change drops the entries whose actions read it.
+        """
+        key = self._memo_key(cmd)
+        alternatives = self._plan_memo.get(key) if key else None
+        if alternatives is not None:
+            self._plan_memo.move_to_end(key)
+            self.memo_stats['hits'] += 1
+        else:
+            self.memo_stats['misses'] += 1
+            matches = self.plans.matches(cmd)
+            best = [record.action for record, score in matches if score == matches[0][1]]
+            alternatives = [self._compile(action, cmd) for action in best]
+            # don't memoize what was compiled against beliefs that already changed
+            if key and self._snapshot.version == self.beliefs.version:
+                self._plan_memo[key] = alternatives
+                for root in set().union(*map(Agent._reads, best)):
+                    self._memo_deps.setdefault(root, set()).add(key)
+                if len(self._plan_memo) > Agent.MEMO_SIZE:
+                    self._plan_memo.popitem(last=False)
+        return random.choice(alternatives) if alternatives else []
+
+    def forget_plans(self):
+        """ Drop memoized plan selections """
+        self._plan_memo.clear()
+        self._memo_deps.clear()
+
+    def _resolve(self, name, scope):
+        """ Capability for an @goal: the first one registered under that name whose condition fits scope """
+        for capability in self._capability_index.get(name, ()):
+            if not len(capability.context) or capability.context in scope:
+                return capability
+        return None
+
+    def _plan(self, cmd):
+        """ One deliberation: route cmd to the action queue or expand it through the Plan base """
+        goal = cmd.namespace
+        cmd.parent = self._snapshot   # $vars resolve in the command, then in beliefs
+
+        if Agent.is_action(goal):
+            name, args = Agent.parse_action(goal)
+            self._action_queue.append((name, cmd.compile(args), cmd))
+            return name
+
+        entries = self._select(cmd)
+        if not entries:
+            if Agent.DEBUG: print(f'Agent.deliberate(): there are no Plans for this Command, {cmd}')
+            return None
+
+        for entry in entries:
+            if entry[0] == 'act':
+                self._action_queue.append((entry[1], entry[2], cmd))
             else:
-                if Context.DEBUG: print(f'Agent.run(): there are no Plans for this Command, {cmd}')
-
-        #
-        # (2) Execute 'Requests to Act' (Actions) in the action queue, if any
-        
-        while self._action_queue:
-            action, params = self._action_queue.popleft()
-            print('--->', action)
-        return 
-    
-    def process(self, goal=None, context=None):
+                # Sub-goal: deliberate on it with the same local context
+                self._delib_queue.append(Command(goal=entry[1], context=dict(cmd)))
+        return entries
+
+    async def _act(self, name, args, scope, timeout):
+        """ Run one action; returns its result, or the exception it raised """
+        capability = self._resolve(name, scope)
+        if capability is None or not callable(capability.action):
+            return LookupError(f'no capability for {name}')
+        fn = capability.action
+        try:
+            if inspect.iscoroutinefunction(fn):
+                result = await asyncio.wait_for(fn(*args), timeout)
+            else:
+                # I/O-bound capabilities: keep the loop free for the other actions in the batch
+                # (on timeout the thread is abandoned, not interrupted)
+                result = await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+        except Exception as e:
+            return e
+        if isinstance(result, (Plan, Capability, Command, Belief)):
+            self += result      # internal actions: learn what the capability returned
+        return result
+
+    def drop_pending(self):
+        """ Forget queued Commands and actions """
+        self._delib_queue.clear()
+        self._action_queue.clear()
+
+    @property
+    def busy(self) -> bool:
+        """ Are there Commands or actions waiting? """
+        return bool(self._delib_queue or self._action_queue)
+
+    async def adeliberate(self, steps: int = None, budget: float = None, keep_pending: bool = False):
         """
-        Deliberate about a Goal within an specific Context
+        Deliberation process.
+        Alternates (1) deliberating on queued Commands and (2) executing queued actions, the actions
+        of one batch running concurrently. Each Command and each action batch is one step;
+        stops after `steps` (default Agent.STEPS) or `budget` seconds (default Agent.BUDGET)
+        and returns the trace of this run.
+        Work left when it stops is dropped, unless keep_pending (time-sliced callers resume it).
+        """
+        steps = Agent.STEPS if steps is None else steps
+        budget = Agent.BUDGET if budget is None else budget
+        started = time.perf_counter()
+        deadline = started + budget if budget else None
+        trace, n = [], 0
+
+        def halt(reason):
+            trace.append(Step(n, 'halt', reason, time.perf_counter() - started, None))
+
+        while self._delib_queue or self._action_queue:
+            #
+            # (1) Execute 'Requests for Deliberation' (Commands) in the deliberation queue
+
+            # Only the Commands queued so far: sub-goals wait until this round's actions ran.
+            # The round reads one O(1) snapshot of beliefs; what actions learn shows up next round.
+            self._snapshot = self.beliefs.snapshot()
+            for _ in range(len(self._delib_queue)):
+                if n >= steps or (deadline and time.perf_counter() >= deadline):
+                    break
+                cmd: Command = self._delib_queue.popleft()
+                n += 1
+                t0 = time.perf_counter()
+                result = self._plan(cmd)
+                trace.append(Step(n, 'deliberate', cmd.namespace, time.perf_counter() - t0, result))
+
+            #
+            # (2) Execute 'Requests to Act' (Actions) in the action queue, concurrently
+
+            if self._action_queue and n < steps and not (deadline and time.perf_counter() >= deadline):
+                batch = list(self._action_queue)
+                self._action_queue.clear()
+                n += 1
+                timeout = deadline - time.perf_counter() if deadline else None
+
+                async def timed(name, args, scope):
+                    t0 = time.perf_counter()
+                    result = await self._act(name, args, scope, timeout)
+                    return Step(n, 'act', (name, *args), time.perf_counter() - t0, result)
+
+                trace.extend(await asyncio.gather(*[timed(*action) for action in batch]))
+
+            if n >= steps:
+                if self._delib_queue or self._action_queue:
+                    halt(f'steps exhausted ({steps})')
+                break
+            if deadline and time.perf_counter() >= deadline:
+                halt(f'budget exhausted ({budget}s)')
+                break
+
+        if not keep_pending:
+            # Work left over from a halted run is dropped, so the next process() starts clean
+            self.drop_pending()
+        self.trace = trace
+        return trace
+
+    def deliberate(self, steps: int = None, budget: float = None):
+        """ Synchronous deliberate; from async code, await adeliberate() instead """
+        return asyncio.run(self.adeliberate(steps=steps, budget=budget))
+
+    def process(self, goal=None, context=None, steps: int = None, budget: float = None):
+        """
+        Deliberate about a Goal within an specific Context; returns the trace
         """
         self += Command(goal=goal, context=context)
-        self.deliberate()
-        return
+        return self.deliberate(steps=steps, budget=budget)
+
+    async def aprocess(self, goal=None, context=None, steps: int = None, budget: float = None):
+        """ process() for callers already running an event loop """
+        self += Command(goal=goal, context=context)
+        return await self.adeliberate(steps=steps, budget=budget)
     
 
 ###
@@ -200,8 +416,6 @@ def process(context):
     print('Here!')
 
 if __name__ == "__main__":
-    import random
-
     ag = Agent(id='ag-1')
     ag += Capability(goal='@print', action=print)
     ag += Capability(goal='@process', action=process)
@@ -0,0 +1,323 @@
+##
+## OwlMind - Platform for Education and Experimentation with Hybrid Intelligent Systems
+## beliefs.py :: Versioned, copy-on-write Belief Store
+##
+## Agent beliefs as a persistent map: snapshots are O(1) and share structure with
+## the live store, every write bumps a version and emits a change set.
+##
+
+import json
+import os
+import threading
+from collections import deque
+from .context import Context
+
+_MISSING = object()
+
+
+class ChangeSet:
+    """
+    Facts changed by one write to a BeliefStore.
+    changed maps key (as written, e.g. 'user/name') -> new value; removed is a set of keys.
+    """
+    __slots__ = ('version', 'changed', 'removed')
+
+    def __init__(self, version: int, changed: dict = None, removed: set = None):
+        self.version = version
+        self.changed = changed or {}
+        self.removed = removed or set()
+
+    def roots(self) -> set:
+        """ Top-level belief names touched ('user' for 'user/name') """
+        return {key.split('/', 1)[0] for key in (*self.changed, *self.removed)}
+
+    def __bool__(self):
+        return bool(self.changed or self.removed)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(v{self.version}, changed={list(self.changed)}, removed={sorted(self.removed)})'
+
+
+class BeliefSnapshot(Context):
+    """
+    Read-only view of a BeliefStore at one version.
+    Behaves as a Context for lookups (c['key'], c['sub/key'], find, compile, matching),
+    but reads from a facts dict it shares with the store; taking one copies nothing.
+    """
+
+    def __init__(self, facts: dict = None, version: int = 0):
+        super().__init__()
+        self._facts = facts if facts is not None else {}
+        self.version = version
+
+    ## Reads go to the shared facts, not to the (empty) dict storage
+
+    def _lookup(self, key):
+        value = self._facts
+        for part in key.split('/'):
+            if not isinstance(value, dict) or part not in value:
+                return _MISSING
+            value = value[part]
+        return value
+
+    def __getitem__(self, key):
+        if key is None:
+            return None
+        elif key == '.':
+            return self
+        elif key == '..':
+            return self.parent
+        value = self._lookup(key)
+        return None if value is _MISSING else value
+
+    def __contains__(self, test):
+        if isinstance(test, str):
+            return self._lookup(test) is not _MISSING
+        return super().__contains__(test)
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def __len__(self):
+        return len(self._facts)
+
+    def __iter__(self):
+        return iter(self._facts)
+
+    def keys(self):
+        return self._facts.keys()
+
+    def values(self):
+        return self._facts.values()
+
+    def items(self):
+        return self._facts.items()
+
+    def __eq__(self, other):
+        return dict(self.items()) == (dict(other.items()) if isinstance(other, dict) else other)
+
+    def __hash__(self):
+        return hash((id(self._facts), self.version))
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(v{self.version}, {self._facts!r})'
+
+    def to_dict(self) -> dict:
+        """ Deep copy of the facts as plain dicts """
+        return json.loads(json.dumps(self._facts, default=str))
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f'{self.__class__.__name__} is read-only')
+
+    __setitem__ = __delitem__ = __iadd__ = _readonly
+
+
+class BeliefStore(BeliefSnapshot):
+    """
+    Versioned copy-on-write belief store.
+
+    - snapshot() is O(1): the snapshot keeps the current facts dict, and the store copies
+      it (shallow) on its next write. Writes to 'sub/key' copy only the dicts on that path,
+      so unchanged sub-trees stay shared between versions.
+    - version increases by one on every write that changes something.
+    - Each such write emits a ChangeSet to subscribers (fn(changes)); changes_since(version)
+      replays recent ones for caches that poll instead.
+    - checkpoint()/restore() persist the facts through an optional backend with
+      save(key, version, facts) / load(key) -> (version, facts) or None,
+      e.g. LocalBeliefCheckpoints or user_store.DynamoBeliefCheckpoints.
+
+    Example:
+    beliefs = BeliefStore()
+    beliefs += {'name': 'FK', 'user/level': '3'}
+    snap = beliefs.snapshot()
+    beliefs['user/level'] = '4'
+    print(snap['user/level'], beliefs['user/level'], beliefs.version)   #-> 3 4 2
+    beliefs.rollback(snap)
+    """
+
+    LOG_SIZE = 256
+
+    def __init__(self, facts: dict = None, checkpoints=None, key: str = None):
+        super().__init__()
+        self._shared = False
+        self._lock = threading.RLock()
+        self._subscribers = []
+        self._log = deque(maxlen=BeliefStore.LOG_SIZE)
+        self.checkpoints = checkpoints
+        self.key = key
+        self.checkpointed = 0
+        if facts:
+            self.update(facts)
+
+    ##
+    ## VERSIONS
+    ##
+
+    def snapshot(self) -> BeliefSnapshot:
+        with self._lock:
+            self._shared = True
+            return BeliefSnapshot(self._facts, self.version)
+
+    def subscribe(self, fn):
+        """ Call fn(ChangeSet) after every change """
+        self._subscribers.append(fn)
+        return fn
+
+    def changes_since(self, version: int):
+        """ ChangeSets after `version`, oldest first; None if the log no longer reaches back that far """
+        with self._lock:
+            if version >= self.version:
+                return []
+            if not self._log or self._log[0].version > version + 1:
+                return None
+            return [c for c in self._log if c.version > version]
+
+    def _commit(self, changes: ChangeSet):
+        if not changes:
+            return changes
+        self._log.append(changes)
+        for fn in self._subscribers:
+            fn(changes)
+        return changes
+
+    ##
+    ## WRITES
+    ##
+
+    def _own(self):
+        """ Un-share the top-level facts dict before mutating it """
+        if self._shared:
+            self._facts = dict(self._facts)
+            self._shared = False
+
+    def _write(self, key, value, changes):
+        parts = key.split('/')
+        current = self._lookup(key)
+        if value is _MISSING:
+            if current is _MISSING:
+                return
+            changes.removed.add(key)
+        elif current is not _MISSING and (current is value or current == value):
+            return
+        else:
+            changes.changed[key] = value
+
+        self._own()
+        node = self._facts
+        for part in parts[:-1]:
+            # path copy: never mutate a sub-dict a snapshot may share
+            child = node.get(part)
+            child = dict(child) if isinstance(child, dict) else {}
+            node[part] = child
+            node = child
+        if value is _MISSING:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = value
+
+    def update(self, facts) -> ChangeSet:
+        """ Write several facts as one version """
+        with self._lock:
+            changes = ChangeSet(self.version + 1)
+            for key in facts.keys():
+                self._write(key, facts[key], changes)
+            if changes:
+                self.version += 1
+        return self._commit(changes)
+
+    def delete(self, *keys) -> ChangeSet:
+        with self._lock:
+            changes = ChangeSet(self.version + 1)
+            for key in keys:
+                self._write(key, _MISSING, changes)
+            if changes:
+                self.version += 1
+        return self._commit(changes)
+
+    def __setitem__(self, key, fact):
+        self.update({key: fact})
+
+    def __delitem__(self, key):
+        self.delete(key)
+
+    def __iadd__(self, facts):
+        if isinstance(facts, dict):
+            self.update(facts)
+        elif Context.DEBUG:
+            print(f'ERROR: BeliefStore.__iadd__: fact is missing or invalid type, {type(facts)}')
+        return self
+
+    def rollback(self, snapshot: BeliefSnapshot) -> ChangeSet:
+        """ Return to the facts of `snapshot`, as a new version """
+        return self._replace(snapshot._facts, shared=True)
+
+    def _replace(self, facts: dict, shared: bool, version: int = 0) -> ChangeSet:
+        with self._lock:
+            changes = ChangeSet(max(self.version + 1, version))
+            for key in self._facts.keys() - facts.keys():
+                changes.removed.add(key)
+            for key, value in facts.items():
+                old = self._facts.get(key, _MISSING)
+                if old is _MISSING or not (old is value or old == value):
+                    changes.changed[key] = value
+            self._facts = facts
+            self._shared = shared
+            if changes or version > self.version:
+                self.version = changes.version
+        return self._commit(changes)
+
+    ##
+    ## CHECKPOINTS
+    ##
+
+    @property
+    def dirty(self) -> bool:
+        """ Changed since the last checkpoint/restore """
+        return self.version != self.checkpointed
+
+    def checkpoint(self) -> bool:
+        """ Save the facts to the checkpoint backend if they changed; returns True if saved """
+        if not (self.checkpoints and self.dirty):
+            return False
+        snap = self.snapshot()
+        self.checkpoints.save(self.key, snap.version, snap.to_dict())
+        self.checkpointed = snap.version
+        return True
+
+    def restore(self) -> bool:
+        """ Load the last checkpoint, if any; the store's version never goes backwards """
+        saved = self.checkpoints.load(self.key) if self.checkpoints else None
+        if not saved:
+            return False
+        version, facts = saved
+        self._replace(dict(facts), shared=False, version=int(version))
+        self.checkpointed = self.version
+        return True
+
+
+class LocalBeliefCheckpoints:
+    """
+    Belief checkpoints as one JSON file per key under `path`.
+    Implements the same save()/load() interface as user_store.DynamoBeliefCheckpoints.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, f'{key}.json')
+
+    def save(self, key, version: int, facts: dict):
+        tmp = self._file(key) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'facts': facts}, f, default=str)
+        os.replace(tmp, self._file(key))
+
+    def load(self, key):
+        if not os.path.exists(self._file(key)):
+            return None
+        with open(self._file(key), encoding='utf-8') as f:
+            data = json.load(f)
+        return data['version'], data['facts']
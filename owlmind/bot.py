@@ -1,19 +1,169 @@
+# owlmind/bot.py
+
+import time
+import inspect
+from . import metrics, tracing
+
+# Middleware stages, in the order BotEngine.handle() runs them
+STAGES = ('pre_process', 'rules', 'cache', 'model', 'post_process')
+
+STAGE_SECONDS = metrics.histogram('owlmind_engine_stage_seconds', 'BotEngine middleware latency', ('engine', 'middleware'))
+HANDLE_SECONDS = metrics.histogram('owlmind_engine_seconds', 'BotEngine.handle() latency, by the middleware that answered', ('engine', 'handled_by'))
+
+
+class StageTimer:
+    """
+    Call count and latency accounting for one middleware.
+    """
+    __slots__ = ('calls', 'hits', 'total', 'max')
+
+    def __init__(self):
+        self.calls = self.hits = 0
+        self.total = self.max = 0.0
+
+    def record(self, elapsed: float, hit: bool = False):
+        self.calls += 1
+        self.hits += hit
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def as_dict(self) -> dict:
+        return {
+            'calls': self.calls,
+            'hits': self.hits,
+            'avg_ms': 1000 * self.total / self.calls if self.calls else 0.0,
+            'max_ms': 1000 * self.max,
+        }
+
+
 class BotEngine:
     """
     Base class for all Bot Engines.
+
+    handle(context) is the async entry point. It runs the middleware chain
+        pre_process -> rules -> cache -> model -> post_process
+    where each middleware is fn(context), sync or async. In every stage but post_process,
+    a middleware that returns a response (anything but None) short-circuits: it becomes
+    context.response and the chain jumps to post_process. post_process middleware always
+    run; a non-None return replaces the response.
+
+    The last step of the model stage is the engine's own process(context) (or respond(),
+    when overridden). Engines that implement a synchronous process() keep working
+    unchanged: it runs in self.executor when the message needs the model (or inline otherwise).
+
+    Example:
+    engine = SimpleEngine(id='bot')
+    engine.use('cache', lambda ctx: cache.get(ctx['message']))
+
+    @engine.use('post_process')
+    def sign(ctx):
+        return ctx.response + ' -- owl'
+
+    await engine.handle(context)
     """
+
     def __init__(self, id):
         self.id = id
         self.debug = False
         self.model_provider = None
         self.announcement = None
+        self.executor = None  # WorkExecutor set by the runner, for offloading heavy work
+        self.middleware = {stage: [] for stage in STAGES}
+        self.timings = {}     # middleware name -> StageTimer
+        self.model_gate = None  # fn(context) -> async context manager held around the model stage
+
+    def use(self, stage: str, fn=None, name: str = None):
+        """
+        Add middleware fn(context) to `stage`; runs after those already there.
+        Without fn, returns a decorator.
+        """
+        if stage not in self.middleware:
+            raise ValueError(f'BotEngine.use: unknown stage {stage!r}, expected one of {STAGES}')
+        if fn is None:
+            return lambda f: self.use(stage, f, name)
+        name = name or f'{stage}.{getattr(fn, "__name__", "middleware")}'
+        self.middleware[stage].append((name, fn))
+        self.timings.setdefault(name, StageTimer())
+        return fn
+
+    async def _call(self, name, fn, context):
+        started = time.perf_counter()
+        with tracing.span(name) as span:
+            result = fn(context)
+            if inspect.isawaitable(result):
+                result = await result
+            span.set('hit', result is not None)
+        elapsed = time.perf_counter() - started
+        self.timings.setdefault(name, StageTimer()).record(elapsed, hit=result is not None)
+        context.timings[name] = elapsed
+        STAGE_SECONDS.observe(elapsed, engine=self.id, middleware=name)
+        return result
+
+    async def _process(self, context):
+        """ Compatibility shim: the engine's model step, sync or async, as the final model middleware """
+        step = self.respond if type(self).respond is not BotEngine.respond else self.process
+        if inspect.iscoroutinefunction(step):
+            await step(context)
+        elif self.executor and self.needs_llm(context):
+            await self.executor.run('engine.process', step, context)
+        else:
+            step(context)
+        return context.response
+
+    async def _run_stage(self, stage, context):
+        chain = self.middleware[stage]
+        if stage == 'model':
+            chain = chain + [('model.process', self._process)]
+        for name, fn in chain:
+            response = await self._call(name, fn, context)
+            if response is not None:
+                context.response = response
+                context.handled_by = name
+                return True
+        return False
+
+    async def handle(self, context):
+        """ Run the middleware chain on context; returns (and sets) context.response """
+        started = time.perf_counter()
+        context.timings = {}
+        context.handled_by = None
+        for stage in STAGES[:-1]:
+            if stage == 'model' and self.model_gate:
+                # only messages that get this far wait for a model slot
+                async with self.model_gate(context):
+                    done = await self._run_stage(stage, context)
+            else:
+                done = await self._run_stage(stage, context)
+            if done:
+                break
+
+        for name, fn in self.middleware['post_process']:
+            response = await self._call(name, fn, context)
+            if response is not None:
+                context.response = response
+        HANDLE_SECONDS.observe(time.perf_counter() - started, engine=self.id, handled_by=context.handled_by)
+        return context.response
+
+    def stage_stats(self) -> dict:
+        return {name: timer.as_dict() for name, timer in self.timings.items()}
 
     def process(self, context):
-        raise NotImplementedError("You must implement process() in subclass.")
+        raise NotImplementedError("You must implement process() or middleware in subclass.")
+
+    def respond(self, context):
+        """
+        Model-only step run by handle(). Override it when process() also does work that
+        middleware already covers; by default handle() ends with process() itself.
+        """
+        return self.process(context)
 
     def reset(self):
         return None
 
+    def needs_llm(self, context) -> bool:
+        """ Will process(context) call the model? Used for rate limiting; assume yes. """
+        return True
+
     def is_action(self, text: str):
         return text.startswith('@')
 
@@ -22,6 +172,49 @@ class BotMessage(dict):
     Very simple subclass of dict for BotMessages.
     """
     VERSION = "1.0"
+    response = None     # set by the engine
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+
+
+class LazyBotMessage(BotMessage):
+    """
+    BotMessage whose fields are computed on first access.
+    `resolvers` maps field name -> fn(context, source); the result is cached in the dict,
+    so fields the engine never reads are never built.
+    Iteration, len() and repr() only see fields resolved so far; call materialize()
+    to resolve everything.
+    """
+
+    def __init__(self, source, resolvers: dict, **kwargs):
+        super().__init__(**kwargs)
+        self._source = source
+        self._resolvers = resolvers
+
+    def __missing__(self, key):
+        resolver = self._resolvers.get(key)
+        if resolver is None:
+            raise KeyError(key)
+        value = resolver(self, self._source)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._resolvers
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        return self.__missing__(key) if key in self._resolvers else default
+
+    def materialize(self):
+        """ Resolve every lazy field """
+        for key in self._resolvers:
+            if not dict.__contains__(self, key):
+                self.__missing__(key)
+        return self
+
+    def __repr__(self):
+        pending = [k for k in self._resolvers if not dict.__contains__(self, k)]
+        return f'{self.__class__.__name__}({dict.__repr__(self)}, lazy={pending})'
@@ -0,0 +1,107 @@
+# owlmind/commands.py
+
+class CommandSpec:
+    """
+    Declarative description of a slash command.
+    needs_user: handler needs the user's record/session (i.e. a database read)
+    needs_llm:  handler calls the model provider
+    """
+    __slots__ = ('name', 'handler', 'aliases', 'needs_user', 'needs_llm', 'help', 'admin')
+
+    def __init__(self, name, handler, aliases=(), needs_user=False, needs_llm=False, help='', admin=False):
+        self.name = name
+        self.handler = handler
+        self.aliases = tuple(aliases)
+        self.needs_user = needs_user
+        self.needs_llm = needs_llm
+        self.help = help
+        self.admin = admin
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r}, needs_user={self.needs_user}, needs_llm={self.needs_llm})'
+
+
+class CommandRouter:
+    """
+    Table-driven command dispatch.
+    Commands are stored in a token trie ('/adventure' -> 'quiz'), so routing is one
+    split() plus one dict lookup per command word, regardless of how many commands exist.
+    Matching is case-insensitive and picks the longest registered command; the rest of
+    the original text (case preserved) is returned as the argument string.
+
+    Example:
+    router = CommandRouter()
+    router.register('/adventure quiz', handler, needs_user=True, needs_llm=True)
+    spec, args = router.route('/Adventure QUIZ Nuclear Physics')
+    print(spec.name, args) #-> /adventure quiz Nuclear Physics
+    """
+
+    _SPEC = None  # key holding the CommandSpec inside a trie node
+
+    def __init__(self):
+        self._root = {}
+        self._specs = {}
+        self._depth = 0
+
+    def __len__(self):
+        return len(self._specs)
+
+    def __iter__(self):
+        return iter(self._specs.values())
+
+    def __contains__(self, name):
+        return name.lower() in self._specs
+
+    def register(self, name, handler=None, aliases=(), **meta):
+        """
+        Register a command; usable directly or as a decorator when handler is omitted.
+        """
+        if handler is None:
+            def decorator(fn):
+                self.register(name, fn, aliases=aliases, **meta)
+                return fn
+            return decorator
+
+        spec = CommandSpec(name.lower(), handler, aliases=aliases, **meta)
+        for alias in (name, *aliases):
+            words = alias.lower().split()
+            node = self._root
+            for word in words:
+                node = node.setdefault(word, {})
+            node[CommandRouter._SPEC] = spec
+            self._depth = max(self._depth, len(words))
+        self._specs[spec.name] = spec
+        return spec
+
+    def include(self, other, override=False):
+        """ Merge commands from another router (existing names win unless override) """
+        for spec in other:
+            if override or spec.name not in self._specs:
+                self.register(spec.name, spec.handler, aliases=spec.aliases, needs_user=spec.needs_user,
+                              needs_llm=spec.needs_llm, help=spec.help, admin=spec.admin)
+        return self
+
+    def route(self, text):
+        """
+        Returns (CommandSpec, args) for the longest matching command, or (None, None).
+        """
+        if not text or text[0] != '/':
+            return None, None
+
+        words = text.split(None, self._depth)
+        node, spec, used = self._root, None, 0
+        for i, word in enumerate(words[:self._depth]):
+            node = node.get(word.lower())
+            if node is None:
+                break
+            if CommandRouter._SPEC in node:
+                spec, used = node[CommandRouter._SPEC], i + 1
+
+        if spec is None:
+            return None, None
+        args = text.split(None, used)[used] if len(words) > used else ''
+        return spec, args.strip()
+
+    def help(self):
+        """ One line per command, in registration order (admin commands are not listed) """
+        return '\n'.join(f'* `{s.name}` – {s.help}' for s in self._specs.values() if s.help and not s.admin)
@@ -28,6 +28,10 @@
 import re
 import random
 from collections.abc import Iterable
+from . import metrics
+
+RULES_SECONDS = metrics.histogram('owlmind_rules_match_seconds', 'ContextRepo rule matching (test in repo)')
+RULES_RESULTS = metrics.counter('owlmind_rules_match_total', 'ContextRepo rule matches by result', ('result',))
 
 class Context(dict):
     """
@@ -242,7 +246,9 @@ class Context(dict):
 
             score = 0
             testing = test[key]
-            target = self[key] if dict.__contains__(self, key) else None
+            # Via __contains__/__getitem__, not dict's: subclasses that keep their facts
+            # elsewhere (beliefs.BeliefSnapshot) override them
+            target = self[key] if key in self else None
 
             ##  @TODO must be able to match values of different types (https://github.com/GenILab-FAU/owlmind/issues/6)
             ##
@@ -419,8 +425,30 @@ class ContextRepo():
             raise ValueError(f"ContextRepo.__contains__: expected Context or str, got {type(test)}")
 
         # PROCESSING
-        matching_plans = []
+        with RULES_SECONDS.time():
+            matching_plans = [(record.context.compile(sentence=record.action), score) for record, score in self.matches(test)]
+        RULES_RESULTS.inc(result='hit' if matching_plans else 'miss')
+
+        # Initialize and load results
+        test.score = 0
+        test.matching = test.alternatives = test.result = None
+        
+        if len(matching_plans):
+            test.score = matching_plans[0][1] 
+            test.matching = matching_plans
+            test.alternatives = [plan[0] for plan in matching_plans if plan[1] == test.score] # alternatives with highest-score
+            test.result = random.choice(test.alternatives) # pick one alternative
+
+        return bool(test.result)
+
+    def matches(self, test:Context):
+        """
+        Records in test.namespace whose condition fits test, as (record, score), best first.
+        Unlike `test in repo`, this leaves test untouched and returns the records themselves
+        (actions not compiled), for callers that compile against their own scope.
+        """
         namespace = test.namespace or Context._
+        found = []
 
         # @NOTE:
         # This logic needs to be improved; we should be storing already sorted by 'potential match score' and 
@@ -434,22 +462,10 @@ class ContextRepo():
                 # If so, record.context was loaded with:
                 #       record.context.score : matching score
                 if record.context in test:
-                    test.result = record.context.compile(sentence=record.action)
-                    test.score = record.context.score
-                    matching_plans.append( (test.result, test.score) )
+                    found.append( (record, record.context.score) )
 
-        # Initialize and load results
-        test.score = 0
-        test.matching = test.alternatives = test.result = None
-        
-        if len(matching_plans):
-            matching_plans.sort(key=lambda x: x[1], reverse=True)  
-            test.score = matching_plans[0][1] 
-            test.matching = matching_plans
-            test.alternatives = [plan[0] for plan in matching_plans if plan[1] == test.score] # alternatives with highest-score
-            test.result = random.choice(test.alternatives) # pick one alternative
-
-        return bool(test.result)
+        found.sort(key=lambda x: x[1], reverse=True)
+        return found
 
     def __repr__(self):
         """ Return string representation """
@@ -1,23 +1,75 @@
 import re
+import time
+import contextlib
 import discord
 import datetime
 import io
-from owlmind.bot import BotMessage, BotEngine  # Absolute import
+from owlmind.bot import BotEngine, LazyBotMessage  # Absolute import
+from owlmind.ratelimit import RateLimiter, FairScheduler
+from owlmind.outbound import OutboundQueue
+from owlmind.executor import WorkExecutor
+from owlmind.watchdog import LoopWatchdog, set_activity
+from owlmind import metrics, tracing
 
-class DiscordBot(discord.Client):
+MESSAGE_SECONDS = metrics.histogram('owlmind_message_seconds', 'on_message latency, until the reply is queued', ('outcome',))
+
+def _is_thread(channel):
+    return isinstance(channel, discord.Thread)
+
+# BotMessage fields resolved on first access from the discord.Message (see LazyBotMessage)
+CONTEXT_FIELDS = {
+    'layer1':          lambda ctx, m: m.guild.id if m.guild else 0,
+    'layer2':          lambda ctx, m: m.channel.id if hasattr(m.channel, 'id') else 0,
+    'layer3':          lambda ctx, m: m.channel.id if _is_thread(m.channel) else 0,
+    'layer4':          lambda ctx, m: m.author.id,
+    'server_name':     lambda ctx, m: m.guild.name if m.guild else '#dm',
+    'channel_name':    lambda ctx, m: m.channel.name if hasattr(m.channel, 'name') else '#dm',
+    'thread_name':     lambda ctx, m: m.channel.name if _is_thread(m.channel) else '',
+    'author_name':     lambda ctx, m: m.author.name,
+    'author_fullname': lambda ctx, m: m.author.global_name,
+    'author':          lambda ctx, m: m.author.global_name,
+    'date':            lambda ctx, m: ctx['timestamp'].strftime("%d-%b-%Y"),
+    'time':            lambda ctx, m: ctx['timestamp'].strftime("%H:%M:%S"),
+    'attachments':     lambda ctx, m: [a.url for a in m.attachments],
+    'reactions':       lambda ctx, m: [str(r.emoji) for r in m.reactions],
+}
+
+class DiscordBot(discord.AutoShardedClient):
     """
     DiscordBot provides logic to connect the Discord Runner with OwlMind's BotMind, 
     forming a multi-layered context in BotMessage by collecting elements of the Discord conversation
     (layer1=user, layer2=thread, layer3=channel, layer4=guild), and aggregating attachments, reactions, and other elements.
     """
 
-    def __init__(self, token, engine: BotEngine, promiscuous: bool = False, debug: bool = False):
+    SLOW_DOWN = "⏳ Slow down! Try again in {retry:.0f}s."
+
+    def __init__(self, token, engine: BotEngine, promiscuous: bool = False, debug: bool = False,
+                 limiter: RateLimiter = None, scheduler: FairScheduler = None,
+                 shard_ids: list = None, shard_count: int = None, executor: WorkExecutor = None,
+                 watchdog: LoopWatchdog = None):
+        """
+        limiter:   throttles LLM-backed messages per author/channel/guild (None disables)
+        scheduler: caps concurrent model-bound engine calls, fair-queued per author
+        executor:  runs blocking/CPU-heavy work off the event loop (default: a WorkExecutor)
+        watchdog:  reports event-loop stalls with the blocking stack and handler (None disables)
+        shard_ids, shard_count: explicit shards for this process (see owlmind.sharding);
+                   leave unset to let discord.py pick the shard count
+        """
         self.token = token
         self.promiscuous = promiscuous
         self.debug = debug
         self.engine = engine
+        self.limiter = limiter
+        self.scheduler = scheduler
+        self.executor = executor or WorkExecutor()
+        self.watchdog = watchdog
+        # Replies are queued per channel and delivered in the background
+        self.outbound = OutboundQueue()
         if self.engine:
             self.engine.debug = debug
+            self.engine.executor = self.executor
+            # Model calls are fair-queued per author; rule/cache hits never wait for a slot
+            self.engine.model_gate = lambda ctx: self.llm_slot(ctx.get('layer4'))
 
         # Discord intents
         intents = discord.Intents.default()
@@ -26,10 +78,20 @@ class DiscordBot(discord.Client):
         intents.message_content = True
 
         # Initialize the parent class correctly
-        super().__init__(intents=intents)
+        if shard_count:
+            super().__init__(intents=intents, shard_ids=shard_ids, shard_count=shard_count)
+        else:
+            super().__init__(intents=intents)
+
+    async def setup_hook(self):
+        # Runs once on the client's loop, before connecting
+        if self.watchdog:
+            self.watchdog.start()
 
     async def on_ready(self):
         print(f'Bot is running as: {self.user.name}.')
+        if self.shard_ids:
+            print(f'Shards: {self.shard_ids} of {self.shard_count}.')
         if self.debug:
             print(f'Debug is on!')
         if self.engine:
@@ -38,6 +100,10 @@ class DiscordBot(discord.Client):
                 print(self.engine.announcement)
             self.engine.debug = self.debug
 
+    def llm_slot(self, key):
+        """ Async context manager guarding one model-bound job for `key` (no-op without a scheduler) """
+        return self.scheduler.slot(key) if self.scheduler else contextlib.nullcontext()
+
     async def on_message(self, message):
         if message.author == self.user or (
             not self.promiscuous and
@@ -45,50 +111,52 @@ class DiscordBot(discord.Client):
         ):
             return
 
+        started = time.perf_counter()
+        set_activity('DiscordBot.on_message')
         # Strip out any @mention tags
         text = re.sub(r"<@\d+>", "", message.content).strip()
 
-        # Build context
-        attachments = [a.url for a in message.attachments]
-        reactions = [str(r.emoji) for r in message.reactions]
-        context = BotMessage(
-            layer1=message.guild.id if message.guild else 0,
-            layer2=message.channel.id if hasattr(message.channel, 'id') else 0,
-            layer3=message.channel.id if isinstance(message.channel, discord.Thread) else 0,
-            layer4=message.author.id,
-            server_name=message.guild.name if message.guild else '#dm',
-            channel_name=message.channel.name if hasattr(message.channel, 'name') else '#dm',
-            thread_name=message.channel.name if isinstance(message.channel, discord.Thread) else '',
-            author_name=message.author.name,
-            author_fullname=message.author.global_name,
-            author=message.author.global_name,
+        # Build context: only message/timestamp/bot up front, the rest on first access
+        context = LazyBotMessage(
+            message, CONTEXT_FIELDS,
             bot=self.user,
             timestamp=datetime.datetime.now(),
-            date=datetime.datetime.now().strftime("%d-%b-%Y"),
-            time=datetime.datetime.now().strftime("%H:%M:%S"),
             message=text,
-            attachments=attachments,
-            reactions=reactions
         )
 
-        if self.debug:
-            print(f'PROCESSING: ctx={context}')
+        # Head-sampled per message; engine stages, model calls and the send become child spans
+        with tracing.trace('discord.message', key=message.id, channel=getattr(message.channel, 'id', 0)) as span:
+            if self.debug:
+                print(f'PROCESSING: ctx={context}')
 
-        if self.engine:
-            self.engine.process(context)
+            if self.engine:
+                if self.limiter and self.engine.needs_llm(context):
+                    throttle = self.limiter.check_context(context)
+                    if not throttle.allowed:
+                        # Cheap reply: no model call, no engine work
+                        if throttle.notify:
+                            self.outbound.send(message.channel, self.SLOW_DOWN.format(retry=max(1, throttle.retry_after)))
+                        MESSAGE_SECONDS.observe(time.perf_counter() - started, outcome='throttled')
+                        span.set('outcome', 'throttled')
+                        return
+
+                # Sync engines' process() runs in the executor (see BotEngine.handle)
+                await self.engine.handle(context)
 
-        # Send back the response, chunked if over 2000 chars
-        if context.response:
-            resp = str(context.response)
-            max_len = 2000
+            # Queue the response; the outbound queue chunks and paces it
+            if context.response:
+                self.outbound.send(message.channel, context.response)
 
-            if len(resp) <= max_len:
-                await message.channel.send(resp)
-            else:
-                for i in range(0, len(resp), max_len):
-                    await message.channel.send(resp[i:i + max_len])
+            outcome = 'replied' if context.response else 'silent'
+            MESSAGE_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+            span.set('outcome', outcome)
 
-        return
+    async def close(self):
+        if self.watchdog:
+            self.watchdog.stop()
+        await self.outbound.drain(timeout=10)
+        await super().close()
+        self.executor.shutdown(wait=False)
 
     def run(self):
         super().run(self.token)
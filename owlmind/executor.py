@@ -0,0 +1,156 @@
+# owlmind/executor.py
+
+import time
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+INLINE = 'inline'
+THREAD = 'thread'
+PROCESS = 'process'
+
+
+def _timed(fn, args, kwargs):
+    """ Runs in the worker (thread or process): report when the job actually started """
+    started = time.time()
+    return started, fn(*args, **kwargs)
+
+
+class PoolStats:
+    """
+    Queue depth and wait/run time accounting for one pool.
+    Pools are FIFO with `workers` slots, so of the jobs in flight at most `workers`
+    are running and the rest are queued.
+    """
+    __slots__ = ('workers', 'submitted', 'completed', 'wait_total', 'wait_max', 'run_total')
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.submitted = self.completed = 0
+        self.wait_total = self.wait_max = self.run_total = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        return self.submitted - self.completed
+
+    @property
+    def running(self) -> int:
+        return min(self.in_flight, self.workers)
+
+    @property
+    def queued(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    def record(self, submitted: float, started: float, finished: float):
+        wait = max(0.0, started - submitted)
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.run_total += finished - started
+
+    def as_dict(self) -> dict:
+        return {
+            'workers': self.workers,
+            'submitted': self.submitted,
+            'queued': self.queued,
+            'running': self.running,
+            'completed': self.completed,
+            'wait_avg': self.wait_total / self.completed if self.completed else 0.0,
+            'wait_max': self.wait_max,
+            'run_avg': self.run_total / self.completed if self.completed else 0.0,
+        }
+
+
+class WorkExecutor:
+    """
+    Runs handler work off the event loop, per operation:
+        INLINE  - on the loop (cheap work)
+        THREAD  - thread pool (blocking I/O: model calls, DynamoDB)
+        PROCESS - process pool (CPU-heavy, GIL-bound work; fn and args must be picklable, fn importable by a spawned interpreter)
+    Each operation can keep an inline fast path for small inputs: when the caller's
+    `size` is below the operation's `inline_below`, the work runs inline.
+
+    Example:
+    executor = WorkExecutor()
+    executor.configure('quiz.evaluate', PROCESS, inline_below=2000)
+    passed, fallback = await executor.run('quiz.evaluate', QuizManager.evaluate, reply, answer, size=len(reply))
+    """
+
+    # operation -> (mode, inline_below)
+    DEFAULT_POLICIES = {
+        'engine.process': (THREAD, 0),
+        'quiz.generate':  (THREAD, 0),
+        # size: characters compared. The bounded matcher is cheap: a process round trip costs more
+        # (and loses the child's metrics); configure PROCESS explicitly for heavier matchers
+        'quiz.evaluate':  (THREAD, 2000),
+        'rules.match':    (THREAD, 500),     # size: records in the namespace
+    }
+
+    def __init__(self, threads: int = 8, processes: int = 2, policies: dict = None):
+        self.threads = threads
+        self.processes = processes
+        self.policies = dict(WorkExecutor.DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        self._pools = {}
+        self.pool_stats = {THREAD: PoolStats(threads), PROCESS: PoolStats(processes)}
+        self.op_stats = Counter()
+
+    def configure(self, op: str, mode: str, inline_below: int = 0):
+        if mode not in (INLINE, THREAD, PROCESS):
+            raise ValueError(f'WorkExecutor.configure: invalid mode {mode!r}')
+        self.policies[op] = (mode, inline_below)
+
+    def _pool(self, mode):
+        pool = self._pools.get(mode)
+        if pool is None:
+            if mode == THREAD:
+                pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='owlmind-work')
+            else:
+                # Spawned, not forked: by now the process runs threads (boto3, quiz bank refill,
+                # health server, reporters) whose held locks a forked child would inherit
+                pool = ProcessPoolExecutor(max_workers=self.processes,
+                                           mp_context=multiprocessing.get_context('spawn'))
+            self._pools[mode] = pool
+        return pool
+
+    def mode_for(self, op: str, size: int = None) -> str:
+        mode, inline_below = self.policies.get(op, (THREAD, 0))
+        if size is not None and size < inline_below:
+            return INLINE
+        return mode
+
+    async def run(self, op: str, fn, *args, size: int = None, **kwargs):
+        """
+        Run fn(*args, **kwargs) according to the policy for `op`.
+        `size` is an optional input-size hint compared against the inline threshold.
+        """
+        mode = self.mode_for(op, size)
+        self.op_stats[f'{op}.{mode}'] += 1
+        if mode == INLINE:
+            return fn(*args, **kwargs)
+
+        stats = self.pool_stats[mode]
+        submitted = time.time()
+        stats.submitted += 1
+        loop = asyncio.get_running_loop()
+        job = functools.partial(_timed, fn, args, kwargs)
+        if mode == THREAD:
+            # carry context variables (e.g. the current trace span) into the worker thread
+            job = functools.partial(contextvars.copy_context().run, job)
+        try:
+            started, result = await loop.run_in_executor(self._pool(mode), job)
+            # wall clock, so process-pool start times are comparable
+            stats.record(submitted, started, time.time())
+            return result
+        finally:
+            stats.completed += 1
+
+    def stats(self) -> dict:
+        return {mode: s.as_dict() for mode, s in self.pool_stats.items()}
+
+    def shutdown(self, wait: bool = True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
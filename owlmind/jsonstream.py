@@ -0,0 +1,94 @@
+# owlmind/jsonstream.py
+
+import re
+import json
+
+# Characters that can change the scanner state
+_SPECIAL = re.compile(r'[{}"\\]')
+
+class JSONObjectExtractor:
+    """
+    Incrementally pulls the first complete JSON object out of (streamed) model text.
+    Leading prose, markdown fences and trailing chatter are ignored.
+
+    Example:
+    ex = JSONObjectExtractor()
+    for chunk in ['Sure! ```json\\n{"question": "Wh', 'y?", "answer": "Because"}\\n```']:
+        obj = ex.feed(chunk)
+    print(obj) #-> {'question': 'Why?', 'answer': 'Because'}
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.result = None
+        self._pos = 0          # next index to scan
+        self._start = None     # index of the '{' opening the current candidate
+        self._depth = 0
+        self._in_string = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    @staticmethod
+    def _loads(candidate: str):
+        for text in (candidate, candidate.replace("\\'", "'")):
+            try:
+                obj = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(obj, dict):
+                return obj
+        return None
+
+    def feed(self, chunk: str):
+        """
+        Add text; returns the first complete object once available, else None.
+        """
+        if self.result is not None:
+            return self.result
+        self.text += chunk
+
+        skip = self._pos
+        for m in _SPECIAL.finditer(self.text, self._pos):
+            i = m.start()
+            if i < skip:
+                continue
+            ch = m.group()
+
+            if self._in_string:
+                if ch == '\\':
+                    if i + 1 >= len(self.text):
+                        # escape split across chunks: rescan from here next time
+                        self._pos = i
+                        return None
+                    skip = i + 2
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '{':
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif self._depth == 0:
+                continue
+            elif ch == '"':
+                self._in_string = True
+            elif ch == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._loads(self.text[self._start:i + 1])
+                    if obj is not None:
+                        self.result = obj
+                        self._pos = i + 1
+                        return obj
+                    self._start = None
+
+        self._pos = len(self.text)
+        return None
+
+
+def extract_json(text: str):
+    """
+    Return the first complete JSON object in `text`, or None.
+    """
+    return JSONObjectExtractor().feed(text or '')
@@ -0,0 +1,300 @@
+# owlmind/metrics.py
+
+import os
+import time
+import bisect
+import logging
+import functools
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds: sub-millisecond rule/cache hits up to slow generations
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Checked on every update; when False, inc()/observe()/time() do nothing
+_enabled = os.environ.get('OWLMIND_METRICS', '').lower() in ('1', 'true', 'yes')
+
+
+def enable(on: bool = True):
+    global _enabled
+    _enabled = on
+
+def enabled() -> bool:
+    return _enabled
+
+
+class _NullTimer:
+    """ Shared no-op timer, handed out while metrics are disabled """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'started')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metric:
+    """
+    Base for Counter and Histogram: a named family of series keyed by label values.
+    """
+    TYPE = None
+
+    def __init__(self, name: str, help: str = '', labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, '')) for label in self.labels)
+
+    def _label_text(self, key, extra: str = '') -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Counter(Metric):
+    """
+    Monotonic counter.
+
+    Example:
+    HITS = metrics.counter('owlmind_rule_hits_total', 'Rule-base answers', ('engine',))
+    HITS.inc(engine='bot-1')
+    """
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._series.get(self._key(labels), 0)
+
+    def total(self) -> float:
+        return sum(self._series.values())
+
+    def render(self) -> list:
+        return [f'{self.name}{self._label_text(key)} {value}' for key, value in sorted(self._series.items())]
+
+    def summary(self) -> list:
+        return [f'{self.name}{self._label_text(key)}: {value:g}' for key, value in sorted(self._series.items())]
+
+
+_INF_LABEL = 'le="+Inf"'
+
+
+class _HistogramSeries:
+    __slots__ = ('counts', 'sum', 'count', 'max')
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)   # last slot: above the top bucket
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+
+class Histogram(Metric):
+    """
+    Fixed-bucket latency histogram (seconds), Prometheus style.
+
+    Example:
+    MODEL = metrics.histogram('owlmind_model_seconds', 'Model call latency', ('stream',))
+    with MODEL.time(stream='false'):
+        resp = requests.post(...)
+    """
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help: str = '', labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(self.buckets)
+            series.counts[bisect.bisect_left(self.buckets, value)] += 1
+            series.sum += value
+            series.count += 1
+            series.max = max(series.max, value)
+
+    def time(self, **labels):
+        """ Context manager observing the time spent in its block """
+        return _Timer(self, labels) if _enabled else _NULL_TIMER
+
+    def quantile(self, q: float, **labels) -> float:
+        return self._quantile(self._series.get(self._key(labels)), q)
+
+    def _quantile(self, series, q: float) -> float:
+        """ Estimate from the buckets, interpolating linearly inside the bucket """
+        if not series or not series.count:
+            return 0.0
+        rank = q * series.count
+        seen = 0
+        for i, n in enumerate(series.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else series.max
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return series.max
+
+    def render(self) -> list:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, series.counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                lines.append(f'{self.name}_bucket{self._label_text(key, le)} {cumulative}')
+            lines.append(f'{self.name}_bucket{self._label_text(key, _INF_LABEL)} {series.count}')
+            lines.append(f'{self.name}_sum{self._label_text(key)} {series.sum:.6f}')
+            lines.append(f'{self.name}_count{self._label_text(key)} {series.count}')
+        return lines
+
+    def summary(self) -> list:
+        return [
+            f'{self.name}{self._label_text(key)}: n={s.count} avg={1000 * s.sum / s.count:.1f}ms '
+            f'p50={1000 * self._quantile(s, 0.5):.1f}ms p99={1000 * self._quantile(s, 0.99):.1f}ms '
+            f'max={1000 * s.max:.1f}ms'
+            for key, s in sorted(self._series.items()) if s.count
+        ]
+
+
+class Registry:
+    """
+    Named metrics of one process. counter()/histogram() return the existing metric
+    when the name is already registered, so modules can declare theirs at import time.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f'Registry: {name!r} is already a {metric.TYPE}')
+            return metric
+
+    def counter(self, name: str, help: str = '', labels: tuple = ()) -> Counter:
+        return self._get(Counter, name, help, labels)
+
+    def histogram(self, name: str, help: str = '', labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def __iter__(self):
+        return iter(sorted(self._metrics.values(), key=lambda m: m.name))
+
+    def render(self) -> str:
+        """ All metrics in the Prometheus text exposition format """
+        lines = []
+        for metric in self:
+            samples = metric.render()
+            if samples:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.TYPE}')
+                lines.extend(samples)
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def summary(self) -> str:
+        """ Human-readable one-line-per-series summary, for logs """
+        return '\n'.join(line for metric in self for line in metric.summary())
+
+    def clear(self):
+        for metric in self:
+            metric.clear()
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+render = REGISTRY.render
+summary = REGISTRY.summary
+
+
+def timed(histogram: Histogram, **labels):
+    """
+    Decorator observing the wall time of each call.
+
+    Example:
+    @metrics.timed(STORE, op='get_user')
+    def get_or_create_user(uid): ...
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, **labels)
+        return wrapper
+    return decorate
+
+
+class Reporter:
+    """
+    Logs REGISTRY.summary() every `interval` seconds from a daemon thread.
+    """
+
+    def __init__(self, interval: float = 60.0, registry: Registry = REGISTRY, log=logger.info):
+        self.interval = interval
+        self.registry = registry
+        self.log = log
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            text = self.registry.summary()
+            if text:
+                self.log('metrics summary:\n%s', text)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='metrics-reporter', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
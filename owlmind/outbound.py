@@ -0,0 +1,208 @@
+# owlmind/outbound.py
+
+import time
+import asyncio
+import logging
+from collections import Counter, deque
+from .ratelimit import TokenBucket
+from . import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+SEND_SECONDS = metrics.histogram('owlmind_discord_send_seconds', 'Discord channel.send() latency per chunk')
+
+# Discord's hard limit for a single message
+MAX_MESSAGE = 2000
+FENCE = '```'
+
+
+def _is_fence(line: str) -> bool:
+    return line.lstrip().startswith(FENCE)
+
+def _open_fence(text: str, opener: str = None):
+    """
+    Scan `text` starting with `opener` as the currently open fence (None if outside).
+    Returns the opening fence line still open at the end of `text`, or None.
+    """
+    for line in text.splitlines():
+        if _is_fence(line):
+            opener = None if opener else line.strip()
+    return opener
+
+def _cut_point(window: str, inside: bool) -> int:
+    """
+    Best index to split `window` at, preferring (in order) a paragraph break outside
+    code, any line break outside code, any line break, a space, and finally a hard cut.
+    """
+    best = {}
+    pos = 0
+    prev_blank = False
+    for line in window.splitlines(keepends=True):
+        if pos:
+            if not inside:
+                if prev_blank:
+                    best['paragraph'] = pos
+                best['outside'] = pos
+            best['line'] = pos
+        if _is_fence(line):
+            inside = not inside
+        prev_blank = not line.strip()
+        pos += len(line)
+
+    floor = len(window) // 3  # don't produce silly short chunks
+    for kind in ('paragraph', 'outside', 'line'):
+        if best.get(kind, 0) > floor:
+            return best[kind]
+    space = window.rfind(' ')
+    return space + 1 if space > floor else len(window)
+
+def chunk_message(text: str, limit: int = MAX_MESSAGE) -> list:
+    """
+    Split text into Discord-sized messages on paragraph/line/word boundaries.
+    A code block cut in two is closed at the end of one chunk and reopened
+    (with its language tag) at the start of the next.
+    """
+    chunks = []
+    opener = None
+    close = '\n' + FENCE
+    while text:
+        prefix = opener + '\n' if opener else ''
+        if len(prefix) + len(text) <= limit:
+            chunks.append(prefix + text)
+            break
+
+        window = text[:limit - len(prefix) - len(close)]
+        cut = _cut_point(window, inside=bool(opener))
+        piece, text = text[:cut].rstrip('\n'), text[cut:].lstrip('\n')
+
+        opener = _open_fence(piece, opener)
+        chunk = prefix + piece
+        chunks.append(chunk + close if opener else chunk)
+    return chunks
+
+
+class _ChannelState:
+    __slots__ = ('channel', 'pending', 'task', 'bucket', 'blocked_until')
+
+    def __init__(self, channel, rate, burst):
+        self.channel = channel
+        self.pending = deque()
+        self.task = None
+        self.bucket = TokenBucket(rate, burst)
+        self.blocked_until = 0.0
+
+
+class OutboundQueue:
+    """
+    Per-channel outbound message queue.
+
+    send() never blocks: text is queued and a per-channel worker delivers it in order.
+    The worker merges pending short replies into one message, chunks long ones with
+    chunk_message(), paces sends with a per-channel token bucket (Discord allows about
+    5 messages / 5 seconds per channel), and backs off when a send fails with a
+    rate-limit error carrying `retry_after` (as discord.RateLimited/HTTPException do).
+
+    Example:
+    outbound = OutboundQueue()
+    outbound.send(message.channel, response)
+    """
+    PRUNE_EVERY = 1024
+
+    def __init__(self, limit: int = MAX_MESSAGE, rate: float = 1.0, burst: int = 5,
+                 max_retries: int = 3, merge: bool = True):
+        self.limit = limit
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.merge = merge
+        self._channels = {}
+        self._sends = 0
+        self.stats = Counter()
+
+    def send(self, channel, text):
+        """ Queue text for channel; returns immediately """
+        if not text:
+            return
+        self._sends += 1
+        if self._sends % OutboundQueue.PRUNE_EVERY == 0:
+            self._prune(time.monotonic())
+        key = getattr(channel, 'id', id(channel))
+        state = self._channels.get(key)
+        if state is None:
+            state = self._channels[key] = _ChannelState(channel, self.rate, self.burst)
+        text = str(text)
+        # the span stays open until delivery, so queueing delay is part of the message's trace
+        span = tracing.span('discord.send', chars=len(text))
+        state.pending.append((text, span))
+        self.stats['queued'] += 1
+        if state.task is None or state.task.done():
+            state.task = asyncio.get_running_loop().create_task(self._worker(state))
+
+    def _prune(self, now):
+        """ Forget channels with nothing queued, no worker and a full bucket: they carry no state """
+        for key in [k for k, s in self._channels.items()
+                    if not s.pending and (s.task is None or s.task.done())
+                    and s.blocked_until <= now and s.bucket.idle(now)]:
+            del self._channels[key]
+
+    @property
+    def pending(self) -> int:
+        return sum(len(s.pending) for s in self._channels.values())
+
+    def _next_batch(self, state):
+        """ Pop the next message: consecutive short replies are merged while they fit """
+        text, span = state.pending.popleft()
+        spans = [span]
+        while self.merge and state.pending and len(text) + 2 + len(state.pending[0][0]) <= self.limit:
+            more, span = state.pending.popleft()
+            text += '\n\n' + more
+            spans.append(span)
+            self.stats['merged'] += 1
+        return text, spans
+
+    async def _pace(self, state):
+        while True:
+            now = time.monotonic()
+            wait = max(state.blocked_until - now, state.bucket.wait_time(now))
+            if wait <= 0:
+                state.bucket.take(now)
+                return
+            await asyncio.sleep(wait)
+
+    async def _deliver(self, state, chunk, span=tracing.NOOP):
+        for attempt in range(self.max_retries + 1):
+            await self._pace(state)
+            try:
+                with SEND_SECONDS.time():
+                    await state.channel.send(chunk)
+                self.stats['sent'] += 1
+                return
+            except Exception as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after is None or attempt == self.max_retries:
+                    self.stats['failed'] += 1
+                    logger.warning("OutboundQueue: send failed on channel %s: %s", getattr(state.channel, 'id', '?'), e)
+                    span.set('failed', True)
+                    return
+                self.stats['rate_limited'] += 1
+                span.add('retries')
+                state.blocked_until = time.monotonic() + float(retry_after)
+
+    async def _worker(self, state):
+        while state.pending:
+            text, spans = self._next_batch(state)
+            span = spans[0]
+            chunks = chunk_message(text, self.limit)
+            span.set('chunks', len(chunks)).set('merged', len(spans) - 1)
+            try:
+                for chunk in chunks:
+                    await self._deliver(state, chunk, span)
+            finally:
+                for span in spans:
+                    span.end()
+
+    async def drain(self, timeout: float = None):
+        """ Wait until everything queued so far has been delivered """
+        tasks = [s.task for s in self._channels.values() if s.task and not s.task.done()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
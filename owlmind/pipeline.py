@@ -1,8 +1,15 @@
 # owlmind/pipeline.py
 
+import json
 import requests
 import time
 from urllib.parse import urljoin
+from .jsonstream import JSONObjectExtractor
+from . import metrics, tracing
+
+MODEL_SECONDS = metrics.histogram('owlmind_model_seconds', 'Model server call latency (until headers, when streaming)', ('model', 'stream'))
+MODEL_JSON_SECONDS = metrics.histogram('owlmind_model_json_seconds', 'Streamed structured requests, until the first complete object', ('model',))
+MODEL_RESPONSES = metrics.counter('owlmind_model_responses_total', 'Model server responses by HTTP status', ('model', 'status'))
 
 # --- Request Maker Base ---
 class ModelRequestMaker:
@@ -18,6 +25,43 @@ class ModelRequestMaker:
     def unpackage(self, response):
         raise NotImplementedError("unpackage() must be overridden")
 
+    def structured(self, payload, schema=None):
+        """ Ask for JSON output: `schema` is a JSON Schema dict, or None for any JSON object """
+        raise NotImplementedError("structured() must be overridden")
+
+    def streaming(self, payload):
+        """ Switch a packaged payload to streaming mode """
+        payload["stream"] = True
+        return payload
+
+    def unpackage_chunk(self, line):
+        """ Text delta carried by one line of a streamed response (None if none) """
+        raise NotImplementedError("unpackage_chunk() must be overridden")
+
+
+# --- OpenAI-compatible helpers (OpenAI, OpenWebUI) ---
+def _openai_structured(payload, schema=None):
+    if schema is None:
+        payload["response_format"] = {"type": "json_object"}
+    else:
+        payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "response", "schema": schema, "strict": True},
+        }
+    return payload
+
+def _openai_chunk(line):
+    # Server-sent events: 'data: {...}' lines, terminated by 'data: [DONE]'
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    choices = json.loads(data).get("choices", [])
+    if choices:
+        return choices[0].get("delta", {}).get("content")
+    return None
+
 
 # --- Ollama ---
 class OllamaRequest(ModelRequestMaker):
@@ -40,6 +84,14 @@ class OllamaRequest(ModelRequestMaker):
     def unpackage(self, response):
         return response.get("response")
 
+    def structured(self, payload, schema=None):
+        payload["format"] = schema if schema is not None else "json"
+        return payload
+
+    def unpackage_chunk(self, line):
+        # Newline-delimited JSON objects, each carrying a 'response' fragment
+        return json.loads(line).get("response")
+
 
 # --- OpenWebUI ---
 class OpenWebUIRequest(ModelRequestMaker):
@@ -63,6 +115,12 @@ class OpenWebUIRequest(ModelRequestMaker):
             return choices[0].get("message", {}).get("content")
         return None
 
+    def structured(self, payload, schema=None):
+        return _openai_structured(payload, schema)
+
+    def unpackage_chunk(self, line):
+        return _openai_chunk(line)
+
 
 # --- OpenAI (official API) ---
 class OpenAIRequest(ModelRequestMaker):
@@ -85,6 +143,12 @@ class OpenAIRequest(ModelRequestMaker):
             return choices[0].get("message", {}).get("content")
         return None
 
+    def structured(self, payload, schema=None):
+        return _openai_structured(payload, schema)
+
+    def unpackage_chunk(self, line):
+        return _openai_chunk(line)
+
 
 # --- ModelProvider ---
 class ModelProvider:
@@ -109,13 +173,16 @@ class ModelProvider:
             raise ValueError(f"Unsupported provider type: {self.type!r}")
         self.req_maker = makers[self.type]()
 
-    def _call(self, url, payload=None):
+    def _call(self, url, payload=None, stream=False):
         headers = {"Content-Type": "application/json"}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
         start = time.time()
-        resp = requests.post(url, json=payload, headers=headers)
+        with MODEL_SECONDS.time(model=self.model, stream=str(stream).lower()):
+            resp = requests.post(url, json=payload, headers=headers, stream=stream)
         self.delta = round(time.time() - start, 3)
+        MODEL_RESPONSES.inc(model=self.model, status=resp.status_code)
+        tracing.current().set('status', resp.status_code)
         return resp
 
     def models(self):
@@ -125,9 +192,21 @@ class ModelProvider:
             return resp.json()
         return resp.text
 
-    def request(self, prompt, **kwargs):
+    def request(self, prompt, structured=False, schema=None, **kwargs):
+        """
+        Send a prompt and return the response text.
+        structured: ask the backend for JSON output (constrained by `schema`, if given).
+        """
+        with tracing.span('model.request', model=self.model, prompt_chars=len(prompt)) as span:
+            text = self._request(prompt, structured, schema, **kwargs)
+            span.set('response_chars', len(text or ''))    # None: the reply carried no text
+            return text
+
+    def _request(self, prompt, structured=False, schema=None, **kwargs):
         url     = self.req_maker.url_chat(self.base_url)
         payload = self.req_maker.package(self.model, prompt, **kwargs)
+        if structured or schema is not None:
+            payload = self.req_maker.structured(payload, schema)
         resp    = self._call(url, payload)
 
         if resp.status_code == 401:
@@ -135,3 +214,38 @@ class ModelProvider:
         if resp.status_code != 200:
             return f"!!ERROR!! HTTP {resp.status_code}: {resp.text}"
         return self.req_maker.unpackage(resp.json())
+
+    def request_json(self, prompt, schema=None, **kwargs):
+        """
+        Request structured output and stream it until the first complete JSON object arrives;
+        the connection is closed right away, so trailing tokens are never generated.
+        Returns (obj, raw_text); obj is None when no complete object could be extracted.
+        """
+        with tracing.span('model.request_json', model=self.model, prompt_chars=len(prompt)) as span:
+            obj, text = self._request_json(prompt, schema, **kwargs)
+            span.set('response_chars', len(text)).set('parsed', obj is not None)
+            return obj, text
+
+    def _request_json(self, prompt, schema=None, **kwargs):
+        url     = self.req_maker.url_chat(self.base_url)
+        payload = self.req_maker.package(self.model, prompt, **kwargs)
+        payload = self.req_maker.structured(payload, schema)
+        payload = self.req_maker.streaming(payload)
+        extractor = JSONObjectExtractor()
+
+        with MODEL_JSON_SECONDS.time(model=self.model), self._call(url, payload, stream=True) as resp:
+            if resp.status_code == 401:
+                return None, "!!ERROR!! Authentication failed"
+            if resp.status_code != 200:
+                return None, f"!!ERROR!! HTTP {resp.status_code}: {resp.text}"
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                try:
+                    chunk = self.req_maker.unpackage_chunk(line)
+                except ValueError:
+                    continue
+                if chunk and extractor.feed(chunk) is not None:
+                    break
+
+        return extractor.result, extractor.text
@@ -0,0 +1,240 @@
+# owlmind/profiler.py
+
+import os
+import re
+import sys
+import time
+import asyncio
+import sysconfig
+import threading
+from collections import Counter
+from .watchdog import activity_of
+
+MAX_SECONDS = 120.0
+DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s|m)?\s*$', re.IGNORECASE)
+
+# Innermost Python frame of an event loop waiting for I/O is in selectors.py
+_SELECTOR_FRAME = '(selectors.py:'
+# Frames from these trees are library code: summaries attribute time to the calling app frame
+_LIBRARY_PATHS = tuple({sysconfig.get_paths()[key] for key in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+
+def parse_duration(text: str, default: float = 30.0) -> float:
+    """ '30s' / '30' / '1.5m' / '500ms' -> seconds; ValueError when unreadable or out of range """
+    if not text or not text.strip():
+        return default
+    match = DURATION_RE.match(text)
+    if not match:
+        raise ValueError(f'cannot read duration {text!r}, try 30s')
+    value, unit = float(match.group(1)), (match.group(2) or 's').lower()
+    seconds = value / 1000 if unit == 'ms' else value * 60 if unit == 'm' else value
+    if not 0 < seconds <= MAX_SECONDS:
+        raise ValueError(f'duration must be between 0 and {MAX_SECONDS:.0f}s')
+    return seconds
+
+
+class SamplingProfiler:
+    """
+    Low-overhead wall-clock sampling profiler for the whole bot process.
+    A daemon thread wakes every `interval` seconds and records, as collapsed stacks:
+    - every thread's Python stack, marked 'cpu' or 'wait' by the thread's CPU clock
+      (a worker blocked in requests.post is 'wait', one in Levenshtein is 'cpu');
+      the event loop thread counts as idle while it waits in its selector;
+    - coroutine-aware: the await chain of every suspended task labelled with
+      watchdog.set_activity() (message handlers), marked 'await', so a handler waiting on
+      ModelProvider shows up as such even though no thread is running it.
+    Stacks are rooted at 'cpu;loop <activity>', 'wait;thread <name>', 'await;task <activity>', ...
+
+    Example:
+    profiler = SamplingProfiler(interval=0.005)
+    await profiler.profile(30)
+    profiler.write('profiles/now.collapsed')    # flamegraph.pl / speedscope input
+    print(profiler.summary(top=10))
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()     # (kind, root, frame, ...) -> samples
+        self.ticks = 0
+        self.idle = 0               # ticks the loop spent waiting in its selector
+        self.elapsed = 0.0
+        self._labels = {}           # code -> frame label
+        self._app = set()
+        self._cpu = {}              # thread id -> last CPU clock reading
+        self._loop = None
+        self._loop_thread = None
+        self._owner = None          # the task running profile(): always just sleeping
+        self._switch = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    ##
+    ## CONTROL
+    ##
+
+    def start(self, loop=None):
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._owner = asyncio.current_task(self._loop)
+        # A busy loop drops the GIL mostly in select(); without a short switch interval the
+        # sampler would only ever get to run there and see an idle loop
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval / 10))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._switch is not None:
+            sys.setswitchinterval(self._switch)
+            self._switch = None
+
+    async def profile(self, seconds: float):
+        """ Sample the process for `seconds` without blocking the loop """
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.stop()
+        return self
+
+    ##
+    ## SAMPLING
+    ##
+
+    def _run(self):
+        me = threading.get_ident()
+        started = last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            try:
+                self._sample(me, now - last)
+            except RuntimeError:
+                pass    # task set changed while we iterated; skip this tick
+            last = now
+        self.elapsed = time.perf_counter() - started
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            is_app = not (filename.startswith(_LIBRARY_PATHS) or filename.startswith('<'))
+            name = getattr(code, 'co_qualname', code.co_name)
+            label = self._labels[code] = f'{name} ({os.path.basename(filename)}:{code.co_firstlineno})'
+            if is_app:
+                self._app.add(label)
+        return label
+
+    def _frames(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def _busy(self, ident, wall) -> bool:
+        """ Whether the thread used at least half of the last tick on CPU (None if unknown) """
+        try:
+            clock = time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError, OverflowError):
+            return None
+        last, self._cpu[ident] = self._cpu.get(ident), clock
+        return last is not None and clock - last >= wall / 2
+
+    def _sample(self, me, wall):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        loop_task = None
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = self._frames(frame)
+            busy = self._busy(ident, wall)
+            if ident == self._loop_thread:
+                if stack and _SELECTOR_FRAME in stack[-1] and not busy:
+                    self.idle += 1
+                    continue
+                # Off the selector: running a callback, on CPU or stuck in blocking I/O
+                loop_task = asyncio.current_task(self._loop)
+                root = f'loop {activity_of(loop_task) or (loop_task.get_name() if loop_task else "callback")}'
+                self.stacks[('cpu' if busy is not False else 'wait', root, *stack)] += 1
+            elif busy is not False or not _idle_worker(stack):
+                kind = 'cpu' if busy else 'wait'
+                self.stacks[(kind, f'thread {names.get(ident, ident)}', *stack)] += 1
+        for task in asyncio.all_tasks(self._loop):
+            label = activity_of(task)
+            if label and task is not loop_task and task is not self._owner:
+                self.stacks[('await', f'task {label}', *self._await_chain(task))] += 1
+        self.ticks += 1
+
+    def _await_chain(self, task):
+        chain = []
+        coro = task.get_coro()
+        while coro is not None and len(chain) < self.max_depth:
+            frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'gi_frame', None)
+            if frame is None:
+                break
+            chain.append(self._label(frame.f_code))
+            awaited = getattr(coro, 'cr_await', None) or getattr(coro, 'gi_yieldfrom', None)
+            if awaited is not None and not hasattr(awaited, 'cr_frame') and not hasattr(awaited, 'gi_frame'):
+                chain.append(f'<{type(awaited).__name__}>')
+                break
+            coro = awaited
+        return chain
+
+    ##
+    ## OUTPUT
+    ##
+
+    def collapsed(self) -> str:
+        """ Brendan Gregg's collapsed-stack format: 'frame;frame;frame count' per line """
+        return ''.join(f'{";".join(stack)} {count}\n' for stack, count in self.stacks.most_common())
+
+    def write(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed())
+        return path
+
+    def _top(self, kinds, top):
+        """ Inclusive samples per app function (library-only stacks count for their leaf) """
+        totals = Counter()
+        for stack, count in self.stacks.items():
+            if stack[0] not in kinds:
+                continue
+            frames = [f for f in stack[2:] if f in self._app] or list(stack[-1:])
+            for frame in set(frames):
+                totals[frame] += count
+        return totals.most_common(top)
+
+    def summary(self, top: int = 10) -> str:
+        ticks = max(1, self.ticks)
+        by_kind = Counter()
+        for stack, count in self.stacks.items():
+            by_kind[stack[0], stack[1].split(' ', 1)[0]] += count
+        pct = lambda n: f'{100 * n / ticks:5.1f}%'
+        lines = [
+            f'### Profile: {self.elapsed:.1f}s, {self.ticks} samples every {1000 * self.interval:g}ms',
+            f'* event loop: busy {pct(by_kind["cpu", "loop"]).strip()}, blocked in sync I/O '
+            f'{pct(by_kind["wait", "loop"]).strip()}, idle {pct(self.idle).strip()}',
+            f'* worker threads: on CPU {pct(by_kind["cpu", "thread"]).strip()}, '
+            f'blocked {pct(by_kind["wait", "thread"]).strip()} (thread-time, summed over threads)',
+            f'* handlers awaiting: {by_kind["await", "task"] / ticks:.2f} on average',
+        ]
+        for title, kinds in (('CPU', ('cpu',)), ('Blocked / awaiting', ('wait', 'await'))):
+            rows = self._top(kinds, top)
+            if rows:
+                lines.append(f'**Top {title}** (inclusive, % of samples)')
+                lines.extend(f'`{pct(n)}` {frame}' for frame, n in rows)
+        return '\n'.join(lines)
+
+
+def _idle_worker(stack) -> bool:
+    """ A pool/daemon thread parked waiting for work """
+    return bool(stack) and stack[-1].startswith(('_worker (thread.py', 'Queue.get', 'Condition.wait', 'Event.wait'))
@@ -0,0 +1,204 @@
+# owlmind/ratelimit.py
+
+import time
+import asyncio
+import contextlib
+from collections import Counter, OrderedDict, deque, namedtuple
+
+# Result of RateLimiter.check(): notify is False when the caller was already
+# warned during the current throttling window (so spam gets no reply at all)
+Throttle = namedtuple('Throttle', ['allowed', 'retry_after', 'notify'])
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `burst` tokens, refilled at `rate` tokens/second.
+    """
+    __slots__ = ('rate', 'burst', 'tokens', 'stamp')
+
+    def __init__(self, rate: float, burst: float, now: float = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.stamp = time.monotonic() if now is None else now
+
+    def _refill(self, now):
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    def wait_time(self, now: float, cost: float = 1.0) -> float:
+        """ Seconds until `cost` tokens are available (0 if available now) """
+        self._refill(now)
+        missing = cost - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, now: float, cost: float = 1.0):
+        self._refill(now)
+        self.tokens -= cost
+
+    def idle(self, now: float) -> bool:
+        """ A full bucket carries no state and can be dropped """
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting keyed by the BotMessage layer ids.
+    `limits` maps a layer ('author', 'channel', 'guild') to (burst, refill_per_second).
+    A request passes only if every layer has a token; tokens are taken from all layers at once.
+
+    Example:
+    limiter = RateLimiter({'author': (5, 0.2), 'channel': (20, 1.0)})
+    result = limiter.check(author=123, channel=456)
+    if not result.allowed:
+        print(f'Slow down, retry in {result.retry_after:.0f}s')
+    """
+
+    DEFAULT_LIMITS = {
+        'author':  (5, 1 / 6),     # 5 at once, then 10/minute
+        'channel': (20, 1.0),
+        'guild':   (60, 3.0),
+    }
+    PRUNE_EVERY = 1024
+
+    def __init__(self, limits: dict = None):
+        self.limits = dict(RateLimiter.DEFAULT_LIMITS if limits is None else limits)
+        self._buckets = {layer: {} for layer in self.limits}
+        self._warned = {}
+        self._calls = 0
+        self.stats = Counter()
+
+    def check(self, now: float = None, cost: float = 1.0, **ids) -> Throttle:
+        """
+        Check (and, if allowed, consume) one request for the given layer ids,
+        e.g. check(author=..., channel=..., guild=...). Layers without a limit are ignored.
+        """
+        now = time.monotonic() if now is None else now
+        self._calls += 1
+        if self._calls % RateLimiter.PRUNE_EVERY == 0:
+            self._prune(now)
+
+        buckets = []
+        wait = 0.0
+        for layer, key in ids.items():
+            if layer not in self.limits or key is None:
+                continue
+            bucket = self._buckets[layer].get(key)
+            if bucket is None:
+                burst, rate = self.limits[layer]
+                bucket = self._buckets[layer][key] = TokenBucket(rate, burst, now)
+            buckets.append(bucket)
+            wait = max(wait, bucket.wait_time(now, cost))
+
+        if wait > 0:
+            self.stats['throttled'] += 1
+            who = tuple(ids.items())
+            notify = self._warned.get(who, 0) <= now
+            if notify:
+                self._warned[who] = now + wait
+            return Throttle(False, wait, notify)
+
+        for bucket in buckets:
+            bucket.take(now, cost)
+        self.stats['allowed'] += 1
+        return Throttle(True, 0.0, False)
+
+    def check_context(self, context, now: float = None, cost: float = 1.0) -> Throttle:
+        """ check() using a BotMessage's layer ids (layer1=guild, layer2=channel, layer4=author) """
+        return self.check(now=now, cost=cost, guild=context.get('layer1') or None,
+                          channel=context.get('layer2') or None, author=context.get('layer4'))
+
+    def _prune(self, now):
+        for buckets in self._buckets.values():
+            for key in [k for k, b in buckets.items() if b.idle(now)]:
+                del buckets[key]
+        self._warned = {k: t for k, t in self._warned.items() if t > now}
+
+
+class FairScheduler:
+    """
+    Caps concurrent work (e.g. model calls) and, once saturated, hands free slots to
+    waiting keys (users) in round-robin order, so one user's backlog can't starve others.
+    Each key runs at most `per_key` jobs at once.
+
+    Example:
+    scheduler = FairScheduler(concurrency=4)
+    async with scheduler.slot(author_id):
+        response = await asyncio.to_thread(provider.request, prompt)
+    """
+
+    def __init__(self, concurrency: int = 4, per_key: int = 1):
+        self.concurrency = concurrency
+        self.per_key = per_key
+        self._active = 0
+        self._active_by_key = Counter()
+        self._waiting = OrderedDict()   # key -> deque of futures, in round-robin order
+        self.stats = Counter()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(q) for q in self._waiting.values())
+
+    def _runnable(self, key) -> bool:
+        return self._active < self.concurrency and self._active_by_key[key] < self.per_key
+
+    def _acquire(self, key):
+        self._active += 1
+        self._active_by_key[key] += 1
+
+    def _release(self, key):
+        self._active -= 1
+        self._active_by_key[key] -= 1
+        if not self._active_by_key[key]:
+            del self._active_by_key[key]
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._active < self.concurrency:
+            for key, queue in self._waiting.items():
+                if self._active_by_key[key] < self.per_key:
+                    break
+            else:
+                return
+            fut = queue.popleft()
+            if queue:
+                self._waiting.move_to_end(key)
+            else:
+                del self._waiting[key]
+            if not fut.done():
+                self._acquire(key)
+                fut.set_result(None)
+
+    def _discard(self, key, fut):
+        queue = self._waiting.get(key)
+        if queue and fut in queue:
+            queue.remove(fut)
+            if not queue:
+                del self._waiting[key]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        if key not in self._waiting and self._runnable(key):
+            self._acquire(key)
+        else:
+            self.stats['queued'] += 1
+            fut = asyncio.get_running_loop().create_future()
+            self._waiting.setdefault(key, deque()).append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut.done() and not fut.cancelled():
+                    self._release(key)
+                else:
+                    self._discard(key, fut)
+                raise
+        self.stats['started'] += 1
+        try:
+            yield
+        finally:
+            self._release(key)
@@ -0,0 +1,264 @@
+# owlmind/scheduler.py
+
+import time
+import asyncio
+import logging
+from .agent import Agent, Capability, Command
+
+logger = logging.getLogger(__name__)
+
+
+class Mailbox:
+    """
+    Bounded inbox of Commands for one agent.
+    offer() never waits: it returns False (and counts a drop) when the mailbox is full,
+    so producers can shed or retry; put() waits for room, up to `timeout` seconds.
+    """
+
+    def __init__(self, size: int = 100):
+        self.size = size
+        self._queue = asyncio.Queue(maxsize=size)
+        self.received = self.dropped = self.high_water = 0
+        self.pending = 0    # accepted and not yet done()
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    @property
+    def full(self) -> bool:
+        return self._queue.full()
+
+    def _accepted(self):
+        self.received += 1
+        self.pending += 1
+        self.high_water = max(self.high_water, self._queue.qsize())
+
+    def offer(self, cmd: Command) -> bool:
+        try:
+            self._queue.put_nowait((time.perf_counter(), cmd))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self._accepted()
+        return True
+
+    async def put(self, cmd: Command, timeout: float = None) -> bool:
+        try:
+            await asyncio.wait_for(self._queue.put((time.perf_counter(), cmd)), timeout)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            return False
+        self._accepted()
+        return True
+
+    async def get(self):
+        """ Next (enqueued_at, Command) """
+        return await self._queue.get()
+
+    def done(self):
+        self.pending -= 1
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+
+class AgentStats:
+    """
+    Scheduling counters for one hosted agent.
+    """
+    __slots__ = ('messages', 'slices', 'steps', 'busy', 'slice_max', 'lag_total', 'lag_max', 'halted', 'failed')
+
+    def __init__(self):
+        self.messages = self.slices = self.steps = self.halted = self.failed = 0
+        self.busy = self.slice_max = self.lag_total = self.lag_max = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'messages': self.messages,
+            'slices': self.slices,
+            'steps': self.steps,
+            'halted': self.halted,
+            'failed': self.failed,
+            'busy_ms': 1000 * self.busy,
+            'slice_avg_ms': 1000 * self.busy / self.slices if self.slices else 0.0,
+            'slice_max_ms': 1000 * self.slice_max,
+            'lag_avg_ms': 1000 * self.lag_total / self.messages if self.messages else 0.0,
+            'lag_max_ms': 1000 * self.lag_max,
+        }
+
+
+class AgentScheduler:
+    """
+    Hosts many Agents cooperatively on one event loop.
+    Each agent has a Mailbox and a task that deliberates on one message at a time in slices
+    of at most `slice_steps` steps, yielding to the loop between slices, so busy agents take
+    turns round-robin instead of starving the rest (agents awaiting actions yield anyway).
+    As in Agent.process(), a message gets at most Agent.STEPS steps and Agent.BUDGET seconds.
+
+    Agents talk through the `@send(to, goal, key=value, ...)` capability installed on each
+    hosted agent: the receiver gets Command(goal, {'sender': <id>, key: value, ...}).
+    A send waits up to `send_timeout` seconds for room in the receiver's mailbox, so a slow
+    agent slows down its producers instead of queueing without bound.
+
+    Example:
+    scheduler = AgentScheduler(slice_steps=5)
+    scheduler.add(Agent(id='alice'))
+    scheduler.add(Agent(id='bob'), mailbox_size=10)
+    await scheduler.start()
+    scheduler.post('alice', 'greet', {'who': 'bob'})
+    await scheduler.join()
+    print(scheduler.stats())
+    await scheduler.stop()
+    """
+
+    def __init__(self, slice_steps: int = 10, mailbox_size: int = 100, send_timeout: float = 1.0):
+        self.slice_steps = slice_steps
+        self.mailbox_size = mailbox_size
+        self.send_timeout = send_timeout
+        self.agents = {}       # id -> Agent
+        self.mailboxes = {}    # id -> Mailbox
+        self.agent_stats = {}  # id -> AgentStats
+        self._tasks = {}
+        self._running = False
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __contains__(self, agent_id):
+        return agent_id in self.agents
+
+    def add(self, agent: Agent, mailbox_size: int = None) -> Agent:
+        if agent.id in self.agents:
+            raise ValueError(f'AgentScheduler.add: agent {agent.id!r} already hosted')
+        self.agents[agent.id] = agent
+        self.mailboxes[agent.id] = Mailbox(mailbox_size or self.mailbox_size)
+        self.agent_stats[agent.id] = AgentStats()
+        agent += Capability(goal='send', action=self._sender(agent))
+        if self._running:
+            self._spawn(agent.id)
+        return agent
+
+    async def remove(self, agent_id):
+        task = self._tasks.pop(agent_id, None)
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.mailboxes.pop(agent_id, None)
+        self.agent_stats.pop(agent_id, None)
+        return self.agents.pop(agent_id, None)
+
+    ##
+    ## MESSAGING
+    ##
+
+    def post(self, agent_id, goal, context: dict = None) -> bool:
+        """ Deliver a Command without waiting; False if the agent is unknown or its mailbox is full """
+        mailbox = self.mailboxes.get(agent_id)
+        return mailbox is not None and mailbox.offer(Command(goal=goal, context=context))
+
+    async def send(self, agent_id, goal, context: dict = None, timeout: float = None) -> bool:
+        """ Deliver a Command, waiting up to `timeout` seconds for room in the mailbox """
+        mailbox = self.mailboxes.get(agent_id)
+        return mailbox is not None and await mailbox.put(Command(goal=goal, context=context), timeout)
+
+    def _sender(self, agent):
+        async def send(to, goal, *params):
+            context = {'sender': agent.id}
+            for param in params:
+                key, _, value = param.partition('=')
+                context[key.strip()] = value.strip()
+            if to not in self.mailboxes:
+                raise LookupError(f'@send: no agent {to!r}')
+            if not await self.send(to, goal, context, timeout=self.send_timeout):
+                raise TimeoutError(f'@send: mailbox of {to!r} is full')
+            return to
+        return send
+
+    ##
+    ## SCHEDULING
+    ##
+
+    def _spawn(self, agent_id):
+        self._tasks[agent_id] = asyncio.create_task(self._serve(agent_id), name=f'agent-{agent_id}')
+
+    async def _serve(self, agent_id):
+        agent, mailbox, stats = self.agents[agent_id], self.mailboxes[agent_id], self.agent_stats[agent_id]
+        while True:
+            enqueued, cmd = await mailbox.get()
+            try:
+                lag = time.perf_counter() - enqueued
+                stats.messages += 1
+                stats.lag_total += lag
+                stats.lag_max = max(stats.lag_max, lag)
+
+                agent += cmd
+                steps, deadline = 0, enqueued + lag + Agent.BUDGET
+                while agent.busy:
+                    started = time.perf_counter()
+                    if steps >= Agent.STEPS or started >= deadline:
+                        stats.halted += 1
+                        agent.drop_pending()
+                        break
+                    trace = await agent.adeliberate(
+                        steps=min(self.slice_steps, Agent.STEPS - steps),
+                        budget=deadline - started, keep_pending=True)
+                    elapsed = time.perf_counter() - started
+                    used = max((step.n for step in trace), default=0)
+                    steps += used
+                    stats.steps += used
+                    stats.slices += 1
+                    stats.busy += elapsed
+                    stats.slice_max = max(stats.slice_max, elapsed)
+                    # Yield so every other ready agent gets its slice first
+                    await asyncio.sleep(0)
+            except Exception as e:
+                # One bad message (e.g. a plan that fails to compile) must not stop the agent
+                stats.failed += 1
+                agent.drop_pending()
+                logger.warning("AgentScheduler: agent %s failed on %r: %s", agent_id, cmd, e, exc_info=True)
+            finally:
+                mailbox.done()
+
+    async def start(self):
+        self._running = True
+        for agent_id in self.agents:
+            if agent_id not in self._tasks:
+                self._spawn(agent_id)
+
+    async def join(self):
+        """ Wait until every mailbox is drained, including messages agents send each other """
+        while any(m.pending for m in self.mailboxes.values()):
+            await asyncio.gather(*[m.join() for m in list(self.mailboxes.values())])
+
+    async def stop(self):
+        self._running = False
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """ Aggregate scheduling metrics over all hosted agents """
+        per_agent = [s.as_dict() for s in self.agent_stats.values()]
+        mailboxes = self.mailboxes.values()
+        slices = sum(s['slices'] for s in per_agent)
+        messages = sum(s['messages'] for s in per_agent)
+        return {
+            'agents': len(self.agents),
+            'active': sum(1 for a in self.agents.values() if a.busy),
+            'queued': sum(len(m) for m in mailboxes),
+            'mailbox_high_water': max((m.high_water for m in mailboxes), default=0),
+            'received': sum(m.received for m in mailboxes),
+            'dropped': sum(m.dropped for m in mailboxes),
+            'messages': messages,
+            'halted': sum(s['halted'] for s in per_agent),
+            'failed': sum(s['failed'] for s in per_agent),
+            'slices': slices,
+            'steps': sum(s['steps'] for s in per_agent),
+            'slice_avg_ms': sum(s['busy_ms'] for s in per_agent) / slices if slices else 0.0,
+            'slice_max_ms': max((s['slice_max_ms'] for s in per_agent), default=0.0),
+            'lag_avg_ms': sum(s['lag_avg_ms'] * s['messages'] for s in per_agent) / messages if messages else 0.0,
+            'lag_max_ms': max((s['lag_max_ms'] for s in per_agent), default=0.0),
+        }
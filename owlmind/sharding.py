@@ -0,0 +1,214 @@
+# owlmind/sharding.py
+
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+def _parse_ids(text: str) -> list:
+    """ '0,2,5-7' -> [0, 2, 5, 6, 7] """
+    ids = []
+    for part in text.replace(' ', '').split(','):
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-', 1)
+            ids.extend(range(int(lo), int(hi) + 1))
+        else:
+            ids.append(int(part))
+    return ids
+
+
+class ShardConfig:
+    """
+    Shard layout for ShardRunner, read from the same .env as DISCORD_TOKEN:
+
+    SHARD_COUNT=4          # total shards for the bot (across every host); unset = no sharding
+    SHARD_IDS=0-3          # shards run by this host (default: all of them)
+    SHARD_PROCESSES=2      # worker processes on this host (default: one per shard)
+    HEALTH_PORT=8300       # worker i serves /health and /metrics on HEALTH_PORT + i (unset = off)
+    """
+
+    def __init__(self, count: int = None, ids: list = None, processes: int = None, health_port: int = None):
+        self.count = count
+        self.ids = list(ids) if ids is not None else (list(range(count)) if count else None)
+        self.processes = max(1, min(processes or len(self.ids or [None]), len(self.ids or [None])))
+        self.health_port = health_port
+        if self.ids and count and any(i < 0 or i >= count for i in self.ids):
+            raise ValueError(f'ShardConfig: shard ids {self.ids} out of range for SHARD_COUNT={count}')
+
+    @classmethod
+    def from_config(cls, cfg: dict):
+        count = int(cfg['SHARD_COUNT']) if cfg.get('SHARD_COUNT') else None
+        ids = _parse_ids(cfg['SHARD_IDS']) if cfg.get('SHARD_IDS') else None
+        processes = int(cfg['SHARD_PROCESSES']) if cfg.get('SHARD_PROCESSES') else None
+        port = int(cfg['HEALTH_PORT']) if cfg.get('HEALTH_PORT') else None
+        if ids and not count:
+            raise ValueError('ShardConfig: SHARD_IDS requires SHARD_COUNT')
+        return cls(count=count, ids=ids, processes=processes, health_port=port)
+
+    @property
+    def sharded(self) -> bool:
+        return bool(self.count)
+
+    def assignments(self) -> list:
+        """ Shard ids per worker process, spread round-robin """
+        if not self.sharded:
+            return [None]
+        return [self.ids[i::self.processes] for i in range(self.processes)]
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(count={self.count}, ids={self.ids}, processes={self.processes})'
+
+
+class HealthServer:
+    """
+    Minimal per-worker HTTP endpoint, served from a daemon thread:
+        GET /health  -> JSON from health()  (HTTP 503 unless health()['ready'])
+        GET /metrics -> text from metrics() (Prometheus exposition format)
+    """
+
+    def __init__(self, port: int, health, metrics=None, host: str = '127.0.0.1'):
+        self.health = health
+        self.metrics = metrics or (lambda: '')
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith('/health'):
+                    data = server.health()
+                    body = json.dumps(data, default=str).encode()
+                    self._reply(200 if data.get('ready') else 503, 'application/json', body)
+                elif self.path.startswith('/metrics'):
+                    self._reply(200, 'text/plain; version=0.0.4', server.metrics().encode())
+                else:
+                    self._reply(404, 'text/plain', b'not found\n')
+
+            def _reply(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f'health-{self.port}', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def bot_health(bot, started: float) -> dict:
+    """ Health snapshot for a DiscordBot """
+    ready = bot.is_ready()
+    return {
+        'ready': ready,
+        'shard_ids': getattr(bot, 'shard_ids', None),
+        'shard_count': getattr(bot, 'shard_count', None),
+        'latency': round(bot.latency, 4) if ready else None,
+        'guilds': len(bot.guilds) if ready else 0,
+        'uptime': round(time.time() - started, 1),
+    }
+
+def bot_metrics(bot) -> str:
+    """ Counters the bot already keeps (outbound queue, limiter, scheduler), Prometheus style """
+    lines = []
+    shard = ','.join(str(s) for s in (getattr(bot, 'shard_ids', None) or [])) or 'all'
+    for prefix, source in (('outbound', getattr(bot, 'outbound', None)),
+                           ('ratelimit', getattr(bot, 'limiter', None)),
+                           ('scheduler', getattr(bot, 'scheduler', None))):
+        for name, value in sorted(getattr(source, 'stats', {}).items()):
+            lines.append(f'owlmind_{prefix}_{name}_total{{shard="{shard}"}} {value}')
+    if bot.is_ready():
+        lines.append(f'owlmind_gateway_latency_seconds{{shard="{shard}"}} {bot.latency:.4f}')
+    return '\n'.join(lines) + '\n'
+
+
+def _worker(factory, shard_ids, shard_count, health_port):
+    """ Worker process entry point: build the bot for its shards, serve health, run """
+    bot = factory(shard_ids=shard_ids, shard_count=shard_count)
+    if health_port is not None:
+        started = time.time()
+        HealthServer(health_port, lambda: bot_health(bot, started),
+                     lambda: bot_metrics(bot) + metrics.render()).start()
+    bot.run()
+
+
+class ShardRunner:
+    """
+    Runs a DiscordBot across shards and worker processes.
+
+    `factory(shard_ids=..., shard_count=...)` must build a ready-to-run bot and be
+    importable from a fresh interpreter (worker processes are spawned, not forked).
+    Every worker talks to the same model server and user store. Users are not
+    shard-local: DMs go to shard 0 and a user's guilds can sit on shards owned by
+    other workers, so a worker that owns only some shards must not cache user
+    records across messages (bot-1 then runs SessionRegistry(cache=False)).
+    The quiz bank is per process.
+
+    Example:
+    ShardRunner(build_bot, ShardConfig.from_config(cfg)).run()
+    """
+
+    RESTART_DELAY = 5.0
+
+    def __init__(self, factory, config: ShardConfig):
+        self.factory = factory
+        self.config = config
+
+    def _args(self, index, shard_ids):
+        port = self.config.health_port + index if self.config.health_port is not None else None
+        return (self.factory, shard_ids, self.config.count, port)
+
+    def run(self):
+        assignments = self.config.assignments()
+        logger.info('ShardRunner: %r -> %s', self.config, assignments)
+
+        # Single worker: run in this process
+        if len(assignments) == 1:
+            return _worker(*self._args(0, assignments[0]))
+
+        ctx = multiprocessing.get_context('spawn')
+        workers = {}
+        for index, shard_ids in enumerate(assignments):
+            workers[index] = ctx.Process(target=_worker, args=self._args(index, shard_ids),
+                                         name=f'shard-worker-{index}')
+            workers[index].start()
+
+        try:
+            while workers:
+                time.sleep(1.0)
+                for index, proc in list(workers.items()):
+                    if proc.is_alive():
+                        continue
+                    if proc.exitcode == 0:
+                        del workers[index]
+                        continue
+                    logger.warning('ShardRunner: worker %d (shards %s) exited with %s; restarting',
+                                   index, assignments[index], proc.exitcode)
+                    time.sleep(ShardRunner.RESTART_DELAY)
+                    workers[index] = ctx.Process(target=_worker, args=self._args(index, assignments[index]),
+                                                 name=f'shard-worker-{index}')
+                    workers[index].start()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for proc in workers.values():
+                if proc.is_alive():
+                    proc.terminate()
+            for proc in workers.values():
+                proc.join(timeout=10)
@@ -1,49 +1,214 @@
 # owlmind/simple.py
 
-from .base import BotEngine, BotMessage
+import os
+import csv
+import time
+import inspect
+import threading
+from .bot import BotEngine, BotMessage
+from .commands import CommandRouter
+from .context import Context
+from .agent import Plan, PlanBase
+from .profiler import SamplingProfiler, parse_duration
+from . import metrics
+
+PROCESS_SECONDS = metrics.histogram('owlmind_simple_process_seconds', 'SimpleEngine.process() latency (sync path)', ('engine',))
+RULE_HITS = metrics.counter('owlmind_rule_answers_total', 'Messages answered from the rule base vs. passed to the model', ('engine', 'result'))
 
 class SimpleEngine(BotEngine):
     """
-    Chat-only engine: honors /help, /info, /reload,
-    otherwise shunts the text straight to your ModelProvider.
+    Chat engine: honors /help, /info, /reload, answers from its rule base when a
+    rule matches well enough, otherwise shunts the text to your ModelProvider.
+    Commands are dispatched through `self.commands` (a CommandRouter);
+    handlers take (context, args) and return the response.
+    Under handle(), commands answer in the pre_process stage and rules in the
+    rules stage, ahead of any cache middleware and the model.
+
+    Admin commands (CommandSpec.admin, e.g. /profile) answer only to user ids in `admins`.
+
+    Rules are loaded from CSV: one column per condition (e.g. `message`, using
+    Context wildcards) plus a `response` column; lines starting with # are comments.
+    A rule answers only when its match quality (per clause, 0..1, see Context._match_str)
+    reaches `rule_threshold`; weak matches (e.g. *hi* inside a long question) go to the model.
+
+    Example:
+    engine = SimpleEngine(id='bot')
+    engine.load('rules.csv')
+    await engine.handle(BotMessage(message='hello'))
+    print(engine.rule_stats())
     """
-    VERSION = "1.2"
+    VERSION = "1.3"
+    RULE_THRESHOLD = 0.6
+    PROFILE_DIR = 'profiles'
 
     def __init__(self, id):
         super().__init__(id)
         self.model_provider = None
+        self.plans = PlanBase()
+        self.rule_fields = set()
+        self.rule_threshold = SimpleEngine.RULE_THRESHOLD
+        self.rules_path = None
+        self._rules_lock = threading.Lock()  # matching scores records in place
+        self.admins = set()                  # Discord user ids (str) allowed to run admin commands
+        self.profile_dir = SimpleEngine.PROFILE_DIR
+        self._profiler = None
+        self.commands = CommandRouter()
+        self.commands.register('/help', self.cmd_help, help='show this help')
+        self.commands.register('/info', self.cmd_info, help='show engine info')
+        self.commands.register('/reload', self.cmd_reload, help='reload the rule base')
+        self.commands.register('/profile', self.cmd_profile, admin=True,
+                               help='sample the bot process, e.g. `/profile 30s`')
+        self.use('pre_process', self.run_command, name='commands')
+        self.use('rules', self.run_rules, name='rules')
 
-    def process(self, context: BotMessage):
-        msg = context['message']
+    ##
+    ## RULES
+    ##
 
-        if msg == '/help':
-            context.response = (
-                f'### Version: {BotMessage.VERSION}\n'
-                '### Help\n'
-                '* `/info` – show engine info\n'
-                '* `/reload` – no-op in chat-only mode\n'
+    def load(self, path: str) -> int:
+        """ Load rules from a CSV file into self.plans; returns the number of rules read """
+        with open(path, newline='') as f:
+            lines = [line for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+        count = 0
+        for row in csv.DictReader(lines, skipinitialspace=True):
+            response = (row.pop('response', None) or '').strip()
+            condition = {k.strip(): v.strip() for k, v in row.items() if k and v and v.strip()}
+            if not (response and condition):
+                continue
+            self.plans += Plan(action=response, condition=condition)
+            self.rule_fields.update(condition)
+            count += 1
+
+        self.rules_path = path
+        return count
+
+    def match_rules(self, context):
+        """ Best rule response for context, or None if no rule clears rule_threshold """
+        if not len(self.plans):
+            return None
+        test = Context({k: context.get(k) for k in self.rule_fields if isinstance(context.get(k), str)})
+        with self._rules_lock:
+            matched = test in self.plans
+        if matched:
+            # score = clauses * MAX_CLAUSE + sum of per-clause match quality
+            clauses = int(test.score // Context.MAX_CLAUSE)
+            matched = (test.score - clauses * Context.MAX_CLAUSE) / max(1, clauses) >= self.rule_threshold
+        RULE_HITS.inc(engine=self.id, result='hit' if matched else 'miss')
+        return test.result if matched else None
+
+    async def run_rules(self, context):
+        """ Middleware: answer from the rule base; large rule bases scan in the executor """
+        if self.executor:
+            return await self.executor.run('rules.match', self.match_rules, context, size=len(self.plans))
+        return self.match_rules(context)
+
+    def rule_stats(self) -> dict:
+        """ Rule-hit ratio and the model latency those hits saved (estimated at the model's average) """
+        stats = self.stage_stats()
+        rules, model = stats['rules'], stats.get('model.process', {'calls': 0, 'avg_ms': 0.0})
+        return {
+            'rules': len(self.plans),
+            'checked': rules['calls'],
+            'hits': rules['hits'],
+            'hit_ratio': rules['hits'] / rules['calls'] if rules['calls'] else 0.0,
+            'model_calls': model['calls'],
+            'latency_saved_ms': rules['hits'] * max(0.0, model['avg_ms'] - rules['avg_ms']),
+        }
+
+    ##
+    ## COMMANDS
+    ##
+
+    def cmd_help(self, context, args):
+        return (
+            f'### Version: {BotMessage.VERSION}\n'
+            '### Help\n'
+            f'{self.commands.help()}\n'
+        )
+
+    def cmd_info(self, context, args):
+        response = f'### Version: {BotMessage.VERSION}\n'
+        if self.model_provider:
+            response += (
+                f'* provider: {self.model_provider.type}\n'
+                f'* url:      {self.model_provider.base_url}\n'
+                f'* model:    {self.model_provider.model}\n'
+            )
+        else:
+            response += "### No ModelProvider configured\n"
+        if len(self.plans):
+            stats = self.rule_stats()
+            response += (
+                f'* rules:    {stats["rules"]} ({stats["hit_ratio"]:.0%} hit ratio, '
+                f'~{stats["latency_saved_ms"] / 1000:.1f}s model time saved)\n'
             )
+        return response
 
-        elif msg == '/info':
-            context.response = f'### Version: {BotMessage.VERSION}\n'
-            if self.model_provider:
-                context.response += (
-                    f'* provider: {self.model_provider.type}\n'
-                    f'* url:      {self.model_provider.base_url}\n'
-                    f'* model:    {self.model_provider.model}\n'
-                )
-            else:
-                context.response += "### No ModelProvider configured\n"
-
-        elif msg == '/reload':
-            context.response = (
+    def cmd_reload(self, context, args):
+        if not self.rules_path:
+            return (
                 f'### Version: {BotMessage.VERSION}\n'
                 '*Reload not needed in AI-only mode.*\n'
             )
+        with self._rules_lock:
+            self.plans.clear()
+            self.rule_fields.clear()
+            count = self.load(self.rules_path)
+        return f'### Version: {BotMessage.VERSION}\n*Reloaded {count} rules.*\n'
+
+    async def cmd_profile(self, context, args):
+        """ Sampling profile of the whole process for a bounded window (admins only) """
+        try:
+            seconds = parse_duration(args)
+        except ValueError as e:
+            return f'*/profile: {e}.*'
+        if self._profiler:
+            return '*/profile: a profile is already running.*'
+        self._profiler = SamplingProfiler()
+        try:
+            await self._profiler.profile(seconds)
+            path = self._profiler.write(os.path.join(self.profile_dir, time.strftime('profile-%Y%m%d-%H%M%S.collapsed')))
+            return f'{self._profiler.summary(top=10)}\n*Collapsed stacks (speedscope, flamegraph.pl): `{path}`*'
+        finally:
+            self._profiler = None
+
+    ##
+    ## PROCESSING
+    ##
+
+    def run_command(self, context):
+        """ Middleware: answer /commands without going further down the chain """
+        spec, args = self.commands.route(context['message'])
+        if spec and spec.admin and not self.is_admin(context):
+            return f'*{spec.name} is for admins only.*'
+        return spec.handler(context, args) if spec else None
+
+    def is_admin(self, context) -> bool:
+        return str(context.get('layer4')) in self.admins
+
+    def needs_llm(self, context) -> bool:
+        spec, _ = self.commands.route(context['message'])
+        return spec.needs_llm if spec else bool(self.model_provider)
+
+    def respond(self, context: BotMessage):
+        if self.model_provider:
+            # forward everything else to the Llama server (or OpenAI, etc)
+            context.response = self.model_provider.request(context['message'])
+        else:
+            context.response = "!!ERROR!! No model provider configured"
+
+    def process(self, context: BotMessage):
+        """ Synchronous path: command, else rule, else model """
+        with PROCESS_SECONDS.time(engine=self.id):
+            self._process_sync(context)
 
+    def _process_sync(self, context: BotMessage):
+        response = self.run_command(context) or self.match_rules(context)
+        if inspect.iscoroutine(response):
+            response.close()
+            response = '*This command needs the async engine (handle()).*'
+        if response is not None:
+            context.response = response
         else:
-            if self.model_provider:
-                # forward everything else to the Llama server (or OpenAI, etc)
-                context.response = self.model_provider.request(msg)
-            else:
-                context.response = "!!ERROR!! No model provider configured"
+            self.respond(context)
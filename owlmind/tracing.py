@@ -0,0 +1,419 @@
+# owlmind/tracing.py
+
+import json
+import time
+import queue
+import random
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('owlmind_span', default=None)
+
+
+class _NoopSpan:
+    """ Stand-in for spans of unsampled (or absent) traces; falsy, so `if span:` skips attribute work """
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, key, value):
+        return self
+
+    def add(self, key, amount=1):
+        return self
+
+    def child(self, name, **attributes):
+        return self
+
+    def end(self, error=None):
+        return None
+
+NOOP = _NoopSpan()
+
+
+class Trace:
+    """
+    Spans of one sampled trace. Exported once every span has ended, so work that
+    outlives the root span (e.g. queued Discord sends) is still part of the trace.
+    """
+
+    def __init__(self, tracer, trace_id: str, key=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.key = key
+        self.spans = []
+        self._open = 0
+        self._lock = threading.Lock()
+
+    def _opened(self, span):
+        with self._lock:
+            self.spans.append(span)
+            self._open += 1
+
+    def _closed(self):
+        with self._lock:
+            self._open -= 1
+            done = self._open == 0
+        if done:
+            self.tracer._export(self)
+
+
+class Span:
+    """
+    One timed operation in a Trace, with attributes (sizes, counts, ids).
+    Use as a context manager to make it the current span for the block.
+    """
+    __slots__ = ('trace', 'name', 'span_id', 'parent_id', 'start', 'end_time', 'attributes', 'error', '_token')
+
+    def __init__(self, trace: Trace, name: str, parent_id: str = None, attributes: dict = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._token = None
+        trace._opened(self)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+        return self
+
+    def add(self, key, amount=1):
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+        return self
+
+    def child(self, name, **attributes):
+        """ New span under this one, not made current (for work finished elsewhere; call end()) """
+        return Span(self.trace, name, self.span_id, attributes)
+
+    def end(self, error=None):
+        if self.end_time is not None:
+            return
+        self.end_time = time.time()
+        if error is not None:
+            self.error = f'{type(error).__name__}: {error}'
+        self.trace._closed()
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.end(exc)
+        return False
+
+    @property
+    def duration(self) -> float:
+        return (self.end_time or time.time()) - self.start
+
+    def as_dict(self) -> dict:
+        return {
+            'trace_id': self.trace.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'key': self.trace.key,
+            'name': self.name,
+            'start': self.start,
+            'end': self.end_time,
+            'duration_ms': round(1000 * self.duration, 3),
+            'attributes': self.attributes,
+            'error': self.error,
+        }
+
+
+class Tracer:
+    """
+    Head-sampled span tracing.
+    trace(name, key=...) starts a root span; whether the trace is recorded is decided there,
+    once (deterministically from `key`, e.g. the Discord message id, so every process agrees).
+    span(name) opens a child of the current span, or returns NOOP outside a sampled trace,
+    which keeps unsampled messages nearly free.
+
+    Example:
+    tracing.configure(sample_rate=0.05, exporter=tracing.JsonlExporter('traces.jsonl'))
+
+    with tracing.trace('discord.message', key=message.id, command='/adventure quiz'):
+        with tracing.span('quiz.create', subject=subject) as span:
+            ...
+            span.set('source', 'bank')
+    """
+
+    def __init__(self, sample_rate: float = 0.0, exporter=None):
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.stats = {'traces': 0, 'sampled': 0, 'exported': 0}
+
+    def sampled(self, key=None) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0 or self.exporter is None:
+            return False
+        if isinstance(key, int):
+            # multiplicative hash: message ids are increasing, their low bits are not uniform
+            return ((key * 2654435761) & 0xffffffff) / 2**32 < self.sample_rate
+        return random.random() < self.sample_rate
+
+    def trace(self, name: str, key=None, force: bool = False, **attributes):
+        self.stats['traces'] += 1
+        if not (force or self.sampled(key)):
+            return NOOP
+        self.stats['sampled'] += 1
+        trace_id = '%032x' % key if isinstance(key, int) else '%032x' % random.getrandbits(128)
+        return Span(Trace(self, trace_id, key), name, None, attributes)
+
+    def span(self, name: str, **attributes):
+        parent = _current.get()
+        if parent is None:
+            return NOOP
+        return parent.child(name, **attributes)
+
+    def _export(self, trace: Trace):
+        if self.exporter is None:
+            return
+        try:
+            self.exporter.export(trace)
+            self.stats['exported'] += 1
+        except Exception as e:
+            logger.warning('Tracer: export failed: %s', e)
+
+
+TRACER = Tracer()
+
+
+def configure(sample_rate: float = None, exporter=None) -> Tracer:
+    if sample_rate is not None:
+        TRACER.sample_rate = sample_rate
+    if exporter is not None:
+        TRACER.exporter = exporter
+    return TRACER
+
+def trace(name: str, key=None, force: bool = False, **attributes):
+    return TRACER.trace(name, key, force, **attributes)
+
+def span(name: str, **attributes):
+    return TRACER.span(name, **attributes)
+
+def current():
+    """ The current span, or NOOP """
+    return _current.get() or NOOP
+
+
+def traced(name: str = None, **attributes):
+    """
+    Decorator: run each call inside span(name); sync and async functions.
+
+    Example:
+    @tracing.traced('store.save_user')
+    def save_user(user): ...
+    """
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with TRACER.span(span_name, **attributes):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with TRACER.span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+##
+## EXPORTERS
+##
+
+class _BackgroundExporter:
+    """ Hands finished traces to a daemon thread, so exporting never blocks the event loop """
+
+    def __init__(self, max_queue: int = 1000):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        try:
+            self._queue.put_nowait([span.as_dict() for span in trace.spans])
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.write(spans)
+            except Exception as e:
+                logger.warning('%s: %s', self.__class__.__name__, e)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        self._queue.join()
+
+    def write(self, spans: list):
+        raise NotImplementedError
+
+
+class JsonlExporter(_BackgroundExporter):
+    """ One JSON line per span, appended to `path` """
+
+    def __init__(self, path: str, max_queue: int = 1000):
+        self.path = path
+        super().__init__(max_queue)
+
+    def write(self, spans):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span, default=str) + '\n')
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+def _from_otlp_value(value):
+    if 'intValue' in value:
+        return int(value['intValue'])
+    for kind in ('boolValue', 'doubleValue', 'stringValue'):
+        if kind in value:
+            return value[kind]
+    return None
+
+# Trace key (e.g. the Discord message id), carried as a span attribute over OTLP
+_KEY_ATTRIBUTE = 'owlmind.key'
+
+def to_otlp(spans: list, service: str = 'owlmind') -> dict:
+    """ Span dicts -> OTLP/JSON ExportTraceServiceRequest """
+    return {'resourceSpans': [{
+        'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service}}]},
+        'scopeSpans': [{
+            'scope': {'name': 'owlmind.tracing'},
+            'spans': [{
+                'traceId': s['trace_id'],
+                'spanId': s['span_id'],
+                'parentSpanId': s['parent_id'] or '',
+                'name': s['name'],
+                'kind': 1,
+                'startTimeUnixNano': str(int(s['start'] * 1e9)),
+                'endTimeUnixNano': str(int(s['end'] * 1e9)),
+                'attributes': [{'key': k, 'value': _otlp_value(v)}
+                               for k, v in dict(s['attributes'], **{_KEY_ATTRIBUTE: s['key']}).items()
+                               if v is not None],
+                'status': {'code': 2, 'message': s['error']} if s['error'] else {'code': 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+def from_otlp(payload: dict) -> list:
+    """ OTLP/JSON ExportTraceServiceRequest -> span dicts (the Span.as_dict() shape) """
+    spans = []
+    for rs in payload.get('resourceSpans', []):
+        for ss in rs.get('scopeSpans', []):
+            for span in ss.get('spans', []):
+                attributes = {a['key']: _from_otlp_value(a['value']) for a in span.get('attributes', [])}
+                start, end = int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+                status = span.get('status', {})
+                spans.append({
+                    'trace_id': span['traceId'],
+                    'span_id': span['spanId'],
+                    'parent_id': span.get('parentSpanId') or None,
+                    'key': attributes.pop(_KEY_ATTRIBUTE, None),
+                    'name': span['name'],
+                    'start': start / 1e9,
+                    'end': end / 1e9,
+                    'duration_ms': round((end - start) / 1e6, 3),
+                    'attributes': attributes,
+                    'error': status.get('message') if status.get('code') == 2 else None,
+                })
+    return spans
+
+
+class OTLPExporter(_BackgroundExporter):
+    """
+    POSTs each trace as OTLP/JSON to an OTLP HTTP collector (e.g. http://127.0.0.1:4318/v1/traces),
+    or to the stand-in from serve_collector().
+    """
+
+    def __init__(self, url: str = 'http://127.0.0.1:4318/v1/traces', service: str = 'owlmind',
+                 timeout: float = 5.0, max_queue: int = 1000):
+        self.url = url
+        self.service = service
+        self.timeout = timeout
+        super().__init__(max_queue)
+
+    def write(self, spans):
+        body = json.dumps(to_otlp(spans, self.service)).encode()
+        req = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            resp.read()
+
+
+def serve_collector(port: int = 4318, path: str = 'traces.jsonl', host: str = '127.0.0.1'):
+    """
+    OTLP collector stand-in for local runs: accepts OTLP/JSON POSTs on /v1/traces and
+    appends the spans to `path` as JSONL, converted back to the Span.as_dict() shape that
+    JsonlExporter writes. Returns the server; call serve_forever() on it.
+    """
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            try:
+                spans = from_otlp(json.loads(body))
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.send_response(400)
+                self.end_headers()
+                return
+            with lock, open(path, 'a', encoding='utf-8') as f:
+                for span in spans:
+                    f.write(json.dumps(span) + '\n')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='OTLP/JSON collector stand-in: writes received spans to JSONL')
+    parser.add_argument('--port', type=int, default=4318)
+    parser.add_argument('--out', default='traces.jsonl')
+    args = parser.parse_args()
+    print(f'Collecting on http://127.0.0.1:{args.port}/v1/traces -> {args.out}')
+    serve_collector(args.port, args.out).serve_forever()
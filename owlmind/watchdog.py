@@ -0,0 +1,153 @@
+# owlmind/watchdog.py
+
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+import weakref
+from collections import deque
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = metrics.histogram('owlmind_loop_lag_seconds', 'Event-loop lag: how late a heartbeat timer fires')
+LOOP_STALLS = metrics.counter('owlmind_loop_stalls_total', 'Event-loop stalls over the watchdog threshold', ('activity',))
+
+# task -> what it is doing, e.g. 'PersistingBot.on_message /adventure quiz'
+_activities = weakref.WeakKeyDictionary()
+
+
+def set_activity(label: str):
+    """
+    Label the current asyncio task for stall attribution (see LoopWatchdog).
+    discord.py runs each event handler in its own task, so a label set in
+    on_message lasts exactly as long as that handler.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        return
+    if task is not None:
+        _activities[task] = label
+
+def activity_of(task) -> str:
+    return _activities.get(task) if task is not None else None
+
+
+class LoopWatchdog:
+    """
+    Detects a blocked event loop and says who blocked it.
+
+    A heartbeat coroutine wakes every `interval` seconds and records how late it fired
+    (owlmind_loop_lag_seconds). A daemon thread checks the heartbeat; once the loop has been
+    stuck for more than `threshold` seconds, it grabs the loop thread's stack (the blocking
+    callback itself: requests.post, a boto3 call, a long Levenshtein...) and the running
+    task's set_activity() label, and logs one warning per stall. Cost while healthy: one
+    timer per `interval` on the loop and one thread wake-up per `interval / 2`.
+
+    Example:
+    watchdog = LoopWatchdog(threshold=0.25)
+    watchdog.start()                           # from inside the running loop
+    ...
+    watchdog.set_activity('on_message /stats')   # or owlmind.watchdog.set_activity()
+    print(watchdog.stats())
+    """
+
+    def __init__(self, threshold: float = 0.25, interval: float = 0.1, stack_limit: int = 20,
+                 history: int = 20, log=logger.warning):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+        self.log = log
+        self.stalls = deque(maxlen=history)   # recent stalls, newest last
+        self.beats = 0
+        self.lag_max = 0.0
+        self._beat = None
+        self._reported = None     # heartbeat of the stall already sampled
+        self._open = None         # stall record awaiting its final duration
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+        self._task = None
+        self._stop = threading.Event()
+
+    set_activity = staticmethod(set_activity)
+
+    def start(self):
+        """ Start watching the running loop (call from a coroutine, e.g. setup_hook) """
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._beat = time.perf_counter()
+            self._stop.clear()
+            self._task = self._loop.create_task(self._heartbeat(), name='loop-watchdog')
+            threading.Thread(target=self._monitor, name='loop-watchdog', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    ##
+    ## LOOP SIDE
+    ##
+
+    async def _heartbeat(self):
+        while True:
+            due = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - due)
+            LOOP_LAG_SECONDS.observe(lag)
+            with self._lock:
+                self._beat = now
+                self.beats += 1
+                self.lag_max = max(self.lag_max, lag)
+                stall, self._open = self._open, None
+            if stall:
+                stall['blocked_s'] = round(lag, 3)
+                LOOP_STALLS.inc(activity=stall['activity'] or 'unknown')
+
+    ##
+    ## MONITOR THREAD
+    ##
+
+    def _monitor(self):
+        poll = self.interval / 2
+        while not self._stop.wait(poll):
+            beat = self._beat
+            blocked = time.perf_counter() - beat - self.interval
+            if blocked < self.threshold or beat == self._reported:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            task = asyncio.current_task(self._loop)
+            stall = {
+                'at': time.time(),
+                'activity': activity_of(task),
+                'task': task.get_name() if task else None,
+                'blocked_s': round(blocked, 3),
+                'stack': ''.join(traceback.format_stack(frame, limit=self.stack_limit)) if frame else '',
+            }
+            del frame
+            with self._lock:
+                if self._beat != beat:
+                    continue   # the loop woke up while we looked: not this stall's stack
+                self._reported = beat
+                self._open = stall
+                self.stalls.append(stall)
+            self.log('Event loop blocked for %.0fms+ in %s (task %s):\n%s',
+                     1000 * blocked, stall['activity'] or 'an unlabelled callback', stall['task'], stall['stack'])
+
+    def stats(self) -> dict:
+        return {
+            'threshold_ms': 1000 * self.threshold,
+            'beats': self.beats,
+            'lag_max_ms': 1000 * self.lag_max,
+            'lag_p99_ms': 1000 * LOOP_LAG_SECONDS.quantile(0.99),
+            'stalls': len(self.stalls),
+            'recent': [{k: v for k, v in s.items() if k != 'stack'} for s in self.stalls],
+        }
@@ -0,0 +1,196 @@
+# quiz_bank.py
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import Counter, deque
+
+logger = logging.getLogger(__name__)
+
+class QuizBank:
+    """
+    Per-subject pools of pre-generated {'question', 'answer'} items.
+
+    Subjects become 'popular' once requested `popular_after` times (or when warmed);
+    a background worker keeps popular pools between `low_water` and `high_water`
+    by calling `generate(subject)` (normally QuizManager.generate_quiz).
+    take() never blocks on the model: it returns None for cold or drained subjects,
+    and the caller falls back to live generation.
+    """
+
+    def __init__(self, generate, path: str = None, low_water: int = 3, high_water: int = 10,
+                 popular_after: int = 3, seen_limit: int = 500, retry_delay: float = 30.0):
+        self.generate = generate
+        self.path = path
+        self.low_water = low_water
+        self.high_water = high_water
+        self.popular_after = popular_after
+        self.seen_limit = seen_limit
+        self.retry_delay = retry_delay
+
+        self._pools = {}             # subject -> deque of items
+        self._demand = Counter()     # subject -> number of take() calls
+        self._popular = set()
+        self._seen = {}              # uid -> deque of question keys (bounded)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._worker = None
+        self._load()
+
+    @staticmethod
+    def _subject(subject: str) -> str:
+        return ' '.join(subject.lower().split())
+
+    @staticmethod
+    def _key(item: dict) -> str:
+        return ' '.join(item['question'].lower().split())
+
+    def __len__(self):
+        return sum(len(pool) for pool in self._pools.values())
+
+    ##
+    ## SERVING
+    ##
+
+    def take(self, subject: str, uid: str = None):
+        """
+        Pop a pooled quiz for `subject` that `uid` hasn't been served before.
+        Returns None when the pool has nothing suitable.
+        """
+        subject = self._subject(subject)
+        with self._lock:
+            self._demand[subject] += 1
+            if subject not in self._popular and self._demand[subject] >= self.popular_after:
+                self._popular.add(subject)
+
+            pool = self._pools.get(subject)
+            item = None
+            if pool:
+                seen = set(self._seen.get(uid, ())) if uid else ()
+                for i, candidate in enumerate(pool):
+                    if self._key(candidate) not in seen:
+                        item = candidate
+                        del pool[i]
+                        break
+            if item and uid:
+                self._seen.setdefault(uid, deque(maxlen=self.seen_limit)).append(self._key(item))
+
+            needs_refill = subject in self._popular and len(self._pools.get(subject, ())) < self.low_water
+
+        if needs_refill:
+            self._wakeup.set()
+        return item
+
+    def mark_seen(self, uid: str, item: dict):
+        """
+        Record a quiz served outside the bank (e.g. live generation) as seen by `uid`.
+        """
+        with self._lock:
+            self._seen.setdefault(uid, deque(maxlen=self.seen_limit)).append(self._key(item))
+
+    def warm(self, *subjects):
+        """
+        Mark subjects as popular so they're filled ahead of the first request.
+        """
+        with self._lock:
+            self._popular.update(self._subject(s) for s in subjects)
+        self._wakeup.set()
+
+    ##
+    ## REFILL
+    ##
+
+    def _starving(self):
+        with self._lock:
+            return [s for s in self._popular if len(self._pools.get(s, ())) < self.low_water]
+
+    def refill(self, subject: str) -> int:
+        """
+        Generate quizzes for `subject` until its pool reaches high_water.
+        Generic fallback items and duplicates are discarded. Returns the number added.
+        """
+        subject = self._subject(subject)
+        added = 0
+        attempts = 0
+        while len(self._pools.get(subject, ())) < self.high_water and not self._stopping.is_set():
+            attempts += 1
+            if attempts > self.high_water * 2:
+                break
+            try:
+                item = self.generate(subject)
+            except Exception as e:
+                logger.warning("QuizBank: generation failed for %r: %s", subject, e)
+                break
+            if not item or item.get('answer') == 'fallback':
+                continue
+            item = {'question': item['question'], 'answer': item['answer']}
+            with self._lock:
+                pool = self._pools.setdefault(subject, deque())
+                if self._key(item) not in {self._key(i) for i in pool}:
+                    pool.append(item)
+                    added += 1
+        logger.debug("QuizBank: refilled %r with %d item(s)", subject, added)
+        return added
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(timeout=self.retry_delay)
+            self._wakeup.clear()
+            refilled = 0
+            for subject in self._starving():
+                refilled += self.refill(subject)
+            if refilled:
+                self.save()
+
+    def start(self):
+        """ Start the background refill worker """
+        if self._worker and self._worker.is_alive():
+            return self
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run, name='quiz-bank-refill', daemon=True)
+        self._worker.start()
+        self._wakeup.set()
+        return self
+
+    def stop(self, timeout: float = None):
+        """ Stop the background worker and persist the pools """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._worker:
+            self._worker.join(timeout)
+        self.save()
+
+    ##
+    ## PERSISTENCE
+    ##
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                'saved': int(time.time()),
+                'pools': {s: list(pool) for s, pool in self._pools.items() if pool},
+                'popular': sorted(self._popular),
+                'seen': {uid: list(keys) for uid, keys in self._seen.items()},
+            }
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("QuizBank: ignoring unreadable bank %r: %s", self.path, e)
+            return
+        self._pools = {s: deque(items) for s, items in data.get('pools', {}).items()}
+        self._popular = set(data.get('popular', []))
+        self._seen = {uid: deque(keys, maxlen=self.seen_limit) for uid, keys in data.get('seen', {}).items()}
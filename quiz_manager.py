@@ -2,14 +2,35 @@
 
 import json
 import logging
-import re
+from collections import Counter
 from typing import Tuple
 from owlmind.pipeline import ModelProvider
+from owlmind.jsonstream import extract_json
+from owlmind import metrics, tracing
+from quiz_bank import QuizBank
+from answer_matcher import is_match, normalize
 
 logger = logging.getLogger(__name__)
 
+QUIZ_SECONDS = metrics.histogram('owlmind_quiz_seconds', 'Quiz generation, parsing (JSON repair) and answer matching', ('op',))
+QUIZ_SOURCE = metrics.counter('owlmind_quizzes_total', 'Quizzes served, by source and parse path', ('source',))
+
+# JSON Schema handed to backends that support structured output
+QUIZ_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "answer": {"type": "string"},
+    },
+    "required": ["question", "answer"],
+    "additionalProperties": False,
+}
+
 class QuizManager:
     provider: ModelProvider = None  # Will be set when the bot starts
+    bank: QuizBank = None  # Optional pool of pre-generated quizzes, see enable_bank()
+    structured: bool = True  # Use the backend's structured-output mode (Ollama format / OpenAI response_format)
+    stats: Counter = Counter()  # LLM calls and how each generated quiz was parsed
 
     @classmethod
     def initialize(cls, model_provider: ModelProvider):
@@ -18,12 +39,46 @@ class QuizManager:
         logger.debug("✅ QuizManager initialized with provider %r", model_provider)
 
     @classmethod
-    def create_quiz(cls, subject: str) -> dict:
+    def enable_bank(cls, path: str = None, warm=(), **kwargs) -> QuizBank:
+        """
+        Serve quizzes from a background-refilled QuizBank (see quiz_bank.py).
+        `warm` lists subjects to pre-fill before anyone asks for them.
+        """
+        cls.bank = QuizBank(cls.generate_quiz, path=path, **kwargs).start()
+        if warm:
+            cls.bank.warm(*warm)
+        return cls.bank
+
+    @classmethod
+    @tracing.traced('quiz.create')
+    def create_quiz(cls, subject: str, uid: str = None) -> dict:
+        """
+        Return a quiz for `subject`, from the bank when possible (never repeating
+        a question for `uid`), otherwise generated live.
+        Returns a dict: {'question': str, 'answer': str}
+        """
+        if cls.bank:
+            item = cls.bank.take(subject, uid)
+            if item:
+                QUIZ_SOURCE.inc(source='bank')
+                tracing.current().set('source', 'bank')
+                logger.debug("✅ Served quiz for subject=%r from bank", subject)
+                return dict(item)
+
+        tracing.current().set('source', 'model')
+        qa = cls.generate_quiz(subject)
+        if cls.bank and uid:
+            cls.bank.mark_seen(uid, qa)
+        return qa
+
+    @classmethod
+    @metrics.timed(QUIZ_SECONDS, op='generate')
+    def generate_quiz(cls, subject: str) -> dict:
         """
         Generate a quiz question dynamically based on the user's subject.
         Returns a dict: {'question': str, 'answer': str}
         """
-        logger.debug("▶️ Enter create_quiz(subject=%r)", subject)
+        logger.debug("▶️ Enter generate_quiz(subject=%r)", subject)
         if not cls.provider:
             raise ValueError("QuizManager provider is not initialized.")
 
@@ -39,14 +94,53 @@ class QuizManager:
             "}"
         )
 
-        raw = cls.provider.request(prompt)
+        cls.stats['llm_calls'] += 1
+        if cls.structured:
+            # Schema-constrained output, streamed until the first complete object
+            payload, raw = cls.provider.request_json(prompt, schema=QUIZ_SCHEMA)
+            qa = cls._from_payload(payload)
+            if qa:
+                cls.stats['structured'] += 1
+                QUIZ_SOURCE.inc(source='structured')
+                logger.debug("✅ Parsed structured Q/A successfully")
+                return qa
+        else:
+            raw = cls.provider.request(prompt)
         logger.debug("🔍 Raw from LLM:\n%s", raw)
 
+        return cls.parse_quiz(raw or '', subject)
+
+    @staticmethod
+    def _from_payload(payload) -> dict:
+        try:
+            question = payload["question"].strip()
+            answer = payload["answer"].strip()
+        except (TypeError, KeyError, AttributeError):
+            return None
+        if not question or not answer:
+            return None
+        return {"question": question, "answer": answer}
+
+    @classmethod
+    @metrics.timed(QUIZ_SECONDS, op='parse')
+    def parse_quiz(cls, raw: str, subject: str) -> dict:
+        """
+        Best-effort parsing of free-form model output into {'question', 'answer'}.
+        Used when structured output is off or the backend ignored it.
+        """
+        # First complete JSON object anywhere in the text (prose/markdown tolerated)
+        qa = cls._from_payload(extract_json(raw))
+        if qa:
+            cls.stats['extracted'] += 1
+            QUIZ_SOURCE.inc(source='extracted')
+            logger.debug("✅ Extracted JSON Q/A successfully")
+            return qa
+
         # Clean up stray escapes and whitespace
         clean = raw.strip().replace("\\'", "'")
         logger.debug("✨ Cleaned for JSON parsing (before brace-fix):\n%s", clean)
 
-        # Auto-balance braces if needed
+        # Auto-balance braces if needed (truncated output)
         opens = clean.count('{')
         closes = clean.count('}')
         if opens > closes:
@@ -57,74 +151,48 @@ class QuizManager:
 
         # Try parsing JSON
         try:
-            payload = json.loads(clean)
-            question = payload["question"].strip()
-            answer = payload["answer"].strip()
-            logger.debug("✅ Parsed JSON Q/A successfully")
-            return {"question": question, "answer": answer}
-        except (ValueError, KeyError) as e:
+            qa = cls._from_payload(json.loads(clean))
+            if qa:
+                cls.stats['repaired'] += 1
+                QUIZ_SOURCE.inc(source='repaired')
+                logger.debug("✅ Parsed JSON Q/A successfully")
+                return qa
+        except ValueError as e:
             logger.debug("⚠️ JSON parse failed: %s", e)
 
-            # Fallback parsing for free-form text
-            if "Question:" in raw and "Answer:" in raw:
-                try:
-                    part = raw.split("Question:", 1)[1]
-                    q_text, a_text = part.split("Answer:", 1)
-                    logger.debug("✅ Parsed fallback Q/A successfully")
-                    return {
-                        "question": q_text.strip(),
-                        "answer":   a_text.strip()
-                    }
-                except Exception as fallback_error:
-                    logger.debug("⚠️ Free-form fallback parsing also failed: %s", fallback_error)
+        # Fallback parsing for free-form text
+        if "Question:" in raw and "Answer:" in raw:
+            try:
+                part = raw.split("Question:", 1)[1]
+                q_text, a_text = part.split("Answer:", 1)
+                logger.debug("✅ Parsed fallback Q/A successfully")
+                cls.stats['freeform'] += 1
+                QUIZ_SOURCE.inc(source='freeform')
+                return {
+                    "question": q_text.strip(),
+                    "answer":   a_text.strip()
+                }
+            except Exception as fallback_error:
+                logger.debug("⚠️ Free-form fallback parsing also failed: %s", fallback_error)
 
         # Ultimate fallback
         logger.debug("❓ Falling back to generic question for subject=%r", subject)
+        cls.stats['fallback'] += 1
+        QUIZ_SOURCE.inc(source='fallback')
         return {
             "question": f"What is an advanced concept in {subject}?",
             "answer": "fallback"  # Special flag we handle separately
         }
 
     @staticmethod
+    @metrics.timed(QUIZ_SECONDS, op='evaluate')
     def evaluate(user_answer: str, correct_answer: str) -> Tuple[bool, bool]:
         """
         Evaluate the user answer against the correct one.
         Returns (passed: bool, fallback: bool)
         """
-        # Normalize input: remove punctuation, lowercase
-        normalize = lambda s: re.sub(r"[^\w\s]", "", s.lower()).strip()
-
-        user_norm = normalize(user_answer)
-        correct_norm = normalize(correct_answer)
-
-        fallback = correct_norm == "fallback"
-
-        if fallback:
+        if normalize(correct_answer) == "fallback":
             return True, True  # Always correct if fallback question
 
-        if user_norm == correct_norm:
-            return True, False
-
-        # Allow minor typos (Levenshtein distance <= 2)
-        def levenshtein(s1: str, s2: str) -> int:
-            if len(s1) < len(s2):
-                return levenshtein(s2, s1)
-            if len(s2) == 0:
-                return len(s1)
-            previous_row = range(len(s2) + 1)
-            for i, c1 in enumerate(s1):
-                current_row = [i + 1]
-                for j, c2 in enumerate(s2):
-                    insertions = previous_row[j + 1] + 1
-                    deletions = current_row[j] + 1
-                    substitutions = previous_row[j] + (c1 != c2)
-                    current_row.append(min(insertions, deletions, substitutions))
-                previous_row = current_row
-            return previous_row[-1]
-
-        distance = levenshtein(user_norm, correct_norm)
-
-        if distance <= 2:
-            return True, False
-
-        return False, False
+        # Exact match, minor typos (bounded edit distance) or keyword overlap
+        return is_match(user_answer, correct_answer), False
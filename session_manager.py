@@ -0,0 +1,173 @@
+# session_manager.py
+
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+class Session:
+    """
+    Live state for one Discord user: the user record and its adventure state machine.
+    """
+    __slots__ = ('uid', 'user', 'adventure', 'last_seen', 'dropped')
+
+    def __init__(self, uid, user, adventure):
+        self.uid = uid
+        self.user = user
+        self.adventure = adventure
+        self.last_seen = time.monotonic()
+        self.dropped = False     # set by SessionRegistry.drop(): never checkpoint it again
+
+    def checkpoint(self):
+        self.adventure.checkpoint()
+
+
+class SessionRegistry:
+    """
+    In-memory registry of live Sessions keyed by Discord user id.
+
+    A hit is a dict lookup: the user record is loaded (load_user) and the
+    adventure manager built (manager_factory) only on a miss. Sessions idle for
+    longer than `idle_timeout` seconds, or beyond `max_sessions` (LRU), are
+    checkpointed and evicted. An evicted session stays findable until its
+    checkpoint is written, so a message arriving meanwhile gets it back instead
+    of reloading a stale record. On the event loop use aget(): it does the load
+    in a worker thread.
+
+    With cache=False every get() loads a fresh session and nothing is kept: the
+    caller hands it back with release() (arelease() on the loop), which
+    checkpoints it. Use this when another process may write the same users,
+    e.g. a worker that owns only some of the bot's shards.
+    """
+
+    def __init__(self, load_user, manager_factory, idle_timeout: float = 900.0, max_sessions: int = 10_000,
+                 cache: bool = True):
+        self.load_user = load_user
+        self.manager_factory = manager_factory
+        self.cache = cache
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+        self._evicting = {}           # uid -> evicted session whose checkpoint is in flight
+        self._inflight = Counter()    # uid -> checkpoints in flight
+        self._running = Counter()     # uid -> checkpoints being written right now
+        self._lock = threading.Condition()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, uid):
+        return uid in self._sessions
+
+    def get(self, uid) -> Session:
+        """ Return the live session for `uid`, loading it on first use """
+        if not self.cache:
+            user = self.load_user(uid)
+            return Session(uid, user, self.manager_factory(user))
+        with self._lock:
+            session = self._find(uid)
+        if session:
+            return session
+
+        # Load outside the lock: it's a database round-trip
+        user = self.load_user(uid)
+        with self._lock:
+            session = self._find(uid)
+            if not session:
+                session = Session(uid, user, self.manager_factory(user))
+                self._sessions[uid] = session
+            overflow = [self._retire(self._sessions.popitem(last=False)[1])
+                        for _ in range(len(self._sessions) - self.max_sessions)]
+        self._checkpoint_all(overflow)
+        return session
+
+    async def aget(self, uid) -> Session:
+        """ get() for the event loop: a hit stays on the loop, a miss loads in a worker thread """
+        with self._lock:
+            session = self._find(uid)
+        return session or await asyncio.to_thread(self.get, uid)
+
+    def release(self, session):
+        """ Done with a session for this message: persist it unless it stays cached """
+        if not self.cache:
+            self._checkpoint(session)
+
+    async def arelease(self, session):
+        if not self.cache:
+            await asyncio.to_thread(self._checkpoint, session)
+
+    def _find(self, uid):
+        # Caller holds the lock
+        session = self._sessions.get(uid)
+        if session:
+            self._sessions.move_to_end(uid)
+        else:
+            session = self._evicting.get(uid)
+            if not session:
+                return None
+            self._sessions[uid] = session   # back in service; its pending checkpoint still runs
+        session.last_seen = time.monotonic()
+        return session
+
+    def drop(self, uid):
+        """
+        Forget a session without persisting it (e.g. the profile is being deleted).
+        Pending checkpoints of the session are skipped and one already being
+        written is waited for, so none lands after drop() returns. Blocking:
+        on the event loop, call it from a worker thread.
+        """
+        with self._lock:
+            for session in (self._sessions.pop(uid, None), self._evicting.pop(uid, None)):
+                if session:
+                    session.dropped = True
+            self._lock.wait_for(lambda: not self._running[uid])
+
+    def evict_idle(self, now: float = None) -> int:
+        """ Checkpoint and evict sessions idle for longer than idle_timeout """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [uid for uid, s in self._sessions.items() if now - s.last_seen > self.idle_timeout]
+            evicted = [self._retire(self._sessions.pop(uid)) for uid in idle]
+        self._checkpoint_all(evicted)
+        return len(evicted)
+
+    def _retire(self, session):
+        # Caller holds the lock: keep the session findable until _checkpoint_all() is done with it
+        self._evicting[session.uid] = session
+        self._inflight[session.uid] += 1
+        return session
+
+    def _checkpoint_all(self, evicted):
+        for session in evicted:
+            self._checkpoint(session)
+            with self._lock:
+                self._inflight[session.uid] -= 1
+                if not self._inflight[session.uid]:
+                    del self._inflight[session.uid]
+                    self._evicting.pop(session.uid, None)
+
+    def flush(self):
+        """ Checkpoint every live session (e.g. on shutdown) """
+        with self._lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            self._checkpoint(session)
+
+    def _checkpoint(self, session):
+        with self._lock:
+            if session.dropped:
+                return
+            self._running[session.uid] += 1
+        try:
+            session.checkpoint()
+        except Exception as e:
+            logger.warning("SessionRegistry: checkpoint failed for %s: %s", session.uid, e)
+        finally:
+            with self._lock:
+                self._running[session.uid] -= 1
+                if not self._running[session.uid]:
+                    del self._running[session.uid]
+                    self._lock.notify_all()
@@ -0,0 +1,83 @@
+import os
+import pytest
+
+pytestmark = pytest.mark.unit
+
+# adventure_manager imports user_store, which builds its boto3 resources at import time
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+adventure_manager = pytest.importorskip("adventure_manager")
+
+from adventure_manager import AdventureManager
+from session_manager import SessionRegistry
+
+
+@pytest.fixture
+def saves(monkeypatch):
+    saved = []
+    monkeypatch.setattr(adventure_manager, "save_user", lambda user: saved.append(dict(user)))
+    return saved
+
+
+def answering_user(xp):
+    state = {"env": "ruins of Megaton", "step": 1, "awaiting": "quiz", "payload": {"answer": "42"}}
+    return {"discordUserID": "1", "XP": xp, "Level": 1, "Perks": [], "History": [], "AdventureState": state}
+
+
+@pytest.mark.parametrize("xp, phrase", [(9, "gained the perk '"), (19, "gained the perks '")])
+def test_level_up_message_pluralizes_perks(saves, xp, phrase):
+    reply = AdventureManager(answering_user(xp)).handle_answer("42", evaluation=(True, None))
+
+    assert phrase in reply
+    assert len(saves) == 1
+
+
+@pytest.fixture
+def quiz(monkeypatch):
+    monkeypatch.setattr(adventure_manager.QuizManager, "create_quiz",
+                        lambda subject, uid=None: {"question": "Why?", "answer": "42"})
+
+
+def test_next_quiz_stays_in_memory_until_checkpoint(saves, quiz):
+    manager = AdventureManager({"discordUserID": "1", "XP": 0, "Level": 1})
+    manager.start()
+    saves.clear()
+
+    manager.next_quiz("lore")
+
+    assert saves == []
+    assert manager.dirty
+    assert manager.phase == adventure_manager.AWAITING_QUIZ
+
+    manager.checkpoint()
+    manager.checkpoint()
+
+    assert len(saves) == 1
+    assert saves[0]["AdventureState"]["awaiting"] == "quiz"
+    assert not manager.dirty
+
+
+def test_answering_persists_once_and_leaves_nothing_to_checkpoint(saves, quiz):
+    manager = AdventureManager({"discordUserID": "1", "XP": 0, "Level": 1, "History": []})
+    manager.start()
+    manager.next_quiz("lore")
+    saves.clear()
+
+    manager.handle_answer("42", evaluation=(True, None))
+    manager.checkpoint()
+
+    assert len(saves) == 1
+    assert manager.phase == adventure_manager.EXPLORING
+
+
+def test_evicted_session_checkpoints_its_pending_quiz(saves, quiz):
+    registry = SessionRegistry(lambda uid: {"discordUserID": uid, "XP": 0, "Level": 1}, AdventureManager,
+                               idle_timeout=10)
+    session = registry.get("1")
+    session.adventure.start()
+    session.adventure.next_quiz("lore")
+    saves.clear()
+
+    assert registry.evict_idle(now=session.last_seen + 11) == 1
+    assert registry.evict_idle(now=session.last_seen + 11) == 0
+
+    assert [s["AdventureState"]["awaiting"] for s in saves] == ["quiz"]
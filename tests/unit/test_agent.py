@@ -0,0 +1,107 @@
+from owlmind.agent import Agent, Belief, Capability, Command, Plan
+import asyncio
+import time
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_plan_actions_resolve_against_command_context_and_beliefs():
+    printed = []
+    agent = Agent(id="ag-1")
+    agent += Capability(goal="print", action=lambda *args: printed.append(args))
+    agent += Belief(facts={"title": "Intro to AI"})
+    agent += Plan(goal="print_code", condition={"code": "*"}, action="@print($code, $title)")
+
+    trace = agent.process(goal="print_code", context={"code": "COT6930"})
+
+    assert printed == [("COT6930", "Intro to AI")]
+    assert [step.kind for step in trace] == ["deliberate", "act"]
+    assert trace[1].target == ("@print", "COT6930", "Intro to AI")
+
+
+def test_self_reemitting_plan_stops_at_step_limit():
+    agent = Agent(id="loop")
+    agent += Plan(goal="again", condition={"x": "*"}, action="again")
+
+    trace = agent.process(goal="again", context={"x": "1"}, steps=5)
+
+    assert len([s for s in trace if s.kind == "deliberate"]) == 5
+    assert trace[-1].kind == "halt" and "steps" in trace[-1].target
+
+
+def test_independent_actions_run_concurrently():
+    agent = Agent(id="io")
+    agent += Capability(goal="fetch", action=lambda name: time.sleep(0.2) or name)
+    agent += Plan(goal="both", condition={"a": "*"}, action=["@fetch(one)", "@fetch(two)"])
+
+    started = time.perf_counter()
+    trace = agent.process(goal="both", context={"a": "1"})
+    elapsed = time.perf_counter() - started
+
+    assert sorted(s.result for s in trace if s.kind == "act") == ["one", "two"]
+    assert elapsed < 0.35
+
+
+def test_wall_clock_budget_and_missing_capabilities_are_reported():
+    async def slow():
+        await asyncio.sleep(1)
+
+    agent = Agent(id="slow")
+    agent += Capability(goal="slow", action=slow)
+    agent += Plan(goal="work", condition={"a": "*"}, action=["@slow", "@missing"])
+
+    trace = agent.process(goal="work", context={"a": "1"}, budget=0.1)
+    results = {s.target[0]: s.result for s in trace if s.kind == "act"}
+
+    assert isinstance(results["@slow"], asyncio.TimeoutError)
+    assert isinstance(results["@missing"], LookupError)
+
+
+def test_capabilities_can_teach_the_agent():
+    agent = Agent(id="learner")
+    agent += Capability(goal="learn", action=lambda: Belief(facts={"learned": "yes"}))
+
+    agent.process(goal="@learn")
+
+    assert agent.beliefs["learned"] == "yes"
+
+
+def test_repeated_commands_reuse_the_memoized_plan_until_knowledge_changes():
+    said = []
+    agent = Agent(id="memo")
+    agent += Capability(goal="say", action=said.append)
+    agent += Belief(facts={"name": "Owl"})
+    agent += Plan(goal="greet", condition={"who": "*"}, action="@say(hi $who from $name)")
+
+    for _ in range(3):
+        agent.process(goal="greet", context={"who": "Ann"})
+    assert agent.memo_stats == {"hits": 2, "misses": 1, "invalidated": 0}
+
+    agent += Belief(facts={"mood": "sleepy"})  # not read by the plan: memo survives
+    agent.process(goal="greet", context={"who": "Ann"})
+    agent += Belief(facts={"name": "Hoot"})
+    agent.process(goal="greet", context={"who": "Ann"})
+    agent += Plan(goal="greet", condition={"who": "Ann"}, action="@say(welcome back $who)")
+    agent.process(goal="greet", context={"who": "Ann"})
+
+    assert agent.memo_stats == {"hits": 3, "misses": 3, "invalidated": 1}
+    assert said == ["hi Ann from Owl"] * 4 + ["hi Ann from Hoot", "welcome back Ann"]
+
+
+def test_commands_with_colliding_hashes_do_not_share_a_memoized_plan():
+    class Colliding(Command):
+        def __hash__(self):
+            return 0
+
+    said = []
+    agent = Agent(id="memo")
+    agent += Capability(goal="say", action=said.append)
+    agent += Plan(goal="greet", condition={"who": "*"}, action="@say(hi $who)")
+
+    for who in ("Ann", "Bob"):
+        agent += Colliding(goal="greet", context={"who": who})
+        agent.deliberate()
+
+    assert said == ["hi Ann", "hi Bob"]
+    assert agent.memo_stats["misses"] == 2
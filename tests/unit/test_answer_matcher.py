@@ -0,0 +1,54 @@
+from answer_matcher import bounded_levenshtein, is_match, keyword_overlap, normalize
+import random
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def levenshtein(s1, s2):
+    # reference full-matrix implementation
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1):
+        current = [i + 1]
+        for j, c2 in enumerate(s2):
+            current.append(min(previous[j + 1] + 1, current[j] + 1, previous[j] + (c1 != c2)))
+        previous = current
+    return previous[-1]
+
+
+def test_bounded_levenshtein_agrees_with_full_matrix_up_to_k():
+    rng = random.Random(3)
+    for _ in range(500):
+        s1 = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        s2 = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+        for k in (0, 1, 2, 3):
+            assert bounded_levenshtein(s1, s2, k) == min(levenshtein(s1, s2), k + 1)
+
+
+def test_bounded_levenshtein_exits_on_length_difference():
+    assert bounded_levenshtein("a" * 10_000, "a", 2) == 3
+
+
+def test_normalize():
+    assert normalize("  The   N.C.R.,  obviously! ") == "the ncr obviously"
+
+
+@pytest.mark.parametrize(
+    "user, correct, expected",
+    [
+        ("Vault-Tec", "vault tec", True),
+        ("vaulttek", "VaultTec", True),
+        ("Megaton", "Rivet City", False),
+        ("The NCR holds the dam while Caesar's Legion waits east",
+         "The NCR controls Hoover Dam, with Caesar's Legion massing on the east bank.", False),
+        ("NCR controls Hoover Dam and the Legion is massing east",
+         "The NCR controls Hoover Dam, with Caesar's Legion massing on the east bank.", True),
+    ],
+)
+def test_is_match(user, correct, expected):
+    assert is_match(user, correct) == expected
+
+
+def test_keyword_overlap_ignores_stopwords():
+    assert keyword_overlap("the a of", "the a of") == 0.0
+    assert keyword_overlap("hoover dam", "the hoover dam") == 1.0
@@ -0,0 +1,67 @@
+from owlmind.beliefs import BeliefStore, LocalBeliefCheckpoints
+from owlmind.context import Context
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_snapshots_are_isolated_from_later_writes_and_share_untouched_facts():
+    beliefs = BeliefStore({"name": "FK", "user/level": "3", "vault/id": "101"})
+    snap = beliefs.snapshot()
+
+    beliefs["user/level"] = "4"
+
+    assert (snap["user/level"], beliefs["user/level"]) == ("3", "4")
+    assert (snap.version, beliefs.version) == (1, 2)
+    # only the written path was copied
+    assert beliefs["vault"] is snap["vault"]
+    assert beliefs["user"] is not snap["user"]
+
+
+def test_writes_emit_change_sets_and_noops_do_not_bump_the_version():
+    beliefs = BeliefStore()
+    seen = []
+    beliefs.subscribe(seen.append)
+
+    beliefs += {"a": "1", "b/c": "2"}
+    beliefs += {"a": "1"}
+    del beliefs["a"]
+
+    assert beliefs.version == 2
+    assert [(c.version, c.roots()) for c in seen] == [(1, {"a", "b"}), (2, {"a"})]
+    assert seen[1].removed == {"a"}
+    assert [c.version for c in beliefs.changes_since(0)] == [1, 2]
+    assert beliefs.changes_since(2) == []
+
+
+def test_rollback_restores_a_snapshot_as_a_new_version():
+    beliefs = BeliefStore({"mood": "calm"})
+    snap = beliefs.snapshot()
+    beliefs["mood"] = "angry"
+
+    changes = beliefs.rollback(snap)
+
+    assert beliefs["mood"] == "calm"
+    assert changes.version == beliefs.version == 3
+    assert changes.changed == {"mood": "calm"}
+
+
+def test_store_works_as_a_context_for_compile_and_matching():
+    beliefs = BeliefStore({"name": "FK", "api/code": "2345"})
+    local = Context({"code": "4567"}, parent=beliefs.snapshot())
+
+    assert local.compile("$code for $name is ${api/code}") == "4567 for FK is 2345"
+    assert Context({"name": "F*"}) in beliefs
+
+
+def test_checkpoints_persist_and_restore(tmp_path):
+    checkpoints = LocalBeliefCheckpoints(str(tmp_path))
+    beliefs = BeliefStore({"name": "FK"}, checkpoints=checkpoints, key="ag-1")
+
+    assert beliefs.checkpoint() is True
+    assert beliefs.checkpoint() is False  # nothing changed since
+
+    restored = BeliefStore(checkpoints=checkpoints, key="ag-1")
+    assert restored.restore() is True
+    assert restored["name"] == "FK"
+    assert restored.version == 1 and not restored.dirty
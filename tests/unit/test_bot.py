@@ -0,0 +1,114 @@
+from owlmind.bot import BotEngine, BotMessage, LazyBotMessage
+from owlmind.simple import SimpleEngine
+import asyncio
+import contextlib
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_lazy_fields_are_resolved_once_on_first_access():
+    calls = []
+
+    def resolve(ctx, source):
+        calls.append(source)
+        return source.upper()
+
+    ctx = LazyBotMessage("discord-message", {"name": resolve}, message="hi")
+
+    assert "name" in ctx
+    assert calls == []
+    assert ctx["name"] == "DISCORD-MESSAGE"
+    assert ctx.get("name") == "DISCORD-MESSAGE"
+    assert calls == ["discord-message"]
+    assert ctx["message"] == "hi"
+    assert ctx.get("missing", "default") == "default"
+    with pytest.raises(KeyError):
+        ctx["missing"]
+
+
+def test_materialize_resolves_everything():
+    ctx = LazyBotMessage(2, {"double": lambda c, s: s * 2, "triple": lambda c, s: s * 3})
+
+    assert len(ctx) == 0
+    assert dict(ctx.materialize()) == {"double": 4, "triple": 6}
+
+
+class EchoEngine(BotEngine):
+    """ Legacy-style engine: synchronous process() that sets context.response """
+    def __init__(self):
+        super().__init__("echo")
+        self.calls = 0
+
+    def process(self, context):
+        self.calls += 1
+        context.response = f"echo: {context['message']}"
+
+
+def test_sync_engine_runs_unchanged_through_handle():
+    engine = EchoEngine()
+    context = BotMessage(message="hi")
+
+    assert asyncio.run(engine.handle(context)) == "echo: hi"
+    assert context.response == "echo: hi"
+    assert context.handled_by == "model.process"
+    assert engine.stage_stats()["model.process"]["calls"] == 1
+
+
+def test_middleware_short_circuits_before_the_model_and_post_process_always_runs():
+    engine = EchoEngine()
+    order = []
+
+    engine.use("pre_process", lambda ctx: order.append("pre"), name="pre")
+
+    @engine.use("cache")
+    async def cached(ctx):
+        order.append("cache")
+        return "from cache" if ctx["message"] == "known" else None
+
+    engine.use("post_process", lambda ctx: ctx.response.upper(), name="shout")
+
+    hit = BotMessage(message="known")
+    miss = BotMessage(message="new")
+    asyncio.run(engine.handle(hit))
+    asyncio.run(engine.handle(miss))
+
+    assert (hit.response, hit.handled_by) == ("FROM CACHE", "cache.cached")
+    assert (miss.response, miss.handled_by) == ("ECHO: NEW", "model.process")
+    assert engine.calls == 1
+    assert order == ["pre", "cache", "pre", "cache"]
+    assert set(hit.timings) == {"pre", "cache.cached", "shout"}
+    assert engine.stage_stats()["cache.cached"]["hits"] == 1
+
+
+def test_model_gate_is_only_held_for_the_model_stage():
+    engine = EchoEngine()
+    gated = []
+
+    @contextlib.asynccontextmanager
+    async def gate(ctx):
+        gated.append(ctx["message"])
+        yield
+
+    engine.model_gate = gate
+    engine.use("rules", lambda ctx: "rule" if ctx["message"] == "hello" else None)
+
+    asyncio.run(engine.handle(BotMessage(message="hello")))
+    asyncio.run(engine.handle(BotMessage(message="other")))
+
+    assert gated == ["other"]
+
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        EchoEngine().use("later", lambda ctx: None)
+
+
+def test_simple_engine_answers_commands_in_pre_process():
+    engine = SimpleEngine(id="simple")
+    context = BotMessage(message="/help")
+
+    response = asyncio.run(engine.handle(context))
+
+    assert context.handled_by == "commands"
+    assert "/info" in response
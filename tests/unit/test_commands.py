@@ -0,0 +1,60 @@
+from owlmind.commands import CommandRouter
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def router():
+    router = CommandRouter()
+    router.register("/help", "help")
+    router.register("/adventure start", "start", needs_user=True)
+    router.register("/adventure quiz", "quiz", needs_user=True, needs_llm=True)
+    router.register("/reset", "reset", aliases=["/restart"])
+    return router
+
+
+@pytest.mark.parametrize(
+    "text, name, args",
+    [
+        ("/help", "/help", ""),
+        ("/HELP me", "/help", "me"),
+        ("/adventure quiz", "/adventure quiz", ""),
+        ("/Adventure  Quiz  Nuclear Physics", "/adventure quiz", "Nuclear Physics"),
+        ("/adventure start now", "/adventure start", "now"),
+        ("/restart", "/reset", ""),
+    ],
+)
+def test_route_matches_longest_command_and_keeps_argument_case(router, text, name, args):
+    spec, parsed = router.route(text)
+
+    assert spec.name == name
+    assert parsed == args
+
+
+@pytest.mark.parametrize("text", ["hello", "", "/adventure", "/helpme", "/unknown"])
+def test_route_returns_none_for_non_commands(router, text):
+    assert router.route(text) == (None, None)
+
+
+def test_metadata_and_include(router):
+    other = CommandRouter()
+    other.register("/help", "other-help")
+    other.register("/info", "info")
+
+    router.include(other)
+
+    assert router.route("/help")[0].handler == "help"
+    assert router.route("/info")[0].handler == "info"
+    assert router.route("/adventure quiz x")[0].needs_llm
+    assert not router.route("/help")[0].needs_user
+
+
+def test_register_as_decorator_returns_the_function(router):
+    @router.register("/stats", needs_user=True, help="View your stats")
+    def stats(context, args):
+        return "stats"
+
+    assert callable(stats) and stats(None, "") == "stats"
+    assert router.route("/stats")[0].handler is stats
+    assert "* `/stats` – View your stats" in router.help()
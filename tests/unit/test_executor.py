@@ -0,0 +1,49 @@
+from owlmind.executor import INLINE, PROCESS, THREAD, WorkExecutor
+from answer_matcher import is_match
+import asyncio
+import threading
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_small_inputs_run_inline_and_large_ones_in_the_pool():
+    executor = WorkExecutor(policies={"op": (THREAD, 100)})
+
+    assert executor.mode_for("op", size=10) == INLINE
+    assert executor.mode_for("op", size=1000) == THREAD
+    assert executor.mode_for("unknown") == THREAD
+
+
+def test_thread_pool_runs_off_the_loop_thread_and_records_stats():
+    async def main():
+        executor = WorkExecutor(threads=2)
+        loop_thread = threading.get_ident()
+        idents = await asyncio.gather(*[executor.run("engine.process", threading.get_ident) for _ in range(5)])
+        executor.shutdown()
+        return loop_thread, idents, executor.stats()["thread"]
+
+    loop_thread, idents, stats = asyncio.run(main())
+
+    assert loop_thread not in idents
+    assert stats["submitted"] == stats["completed"] == 5
+    assert stats["queued"] == stats["running"] == 0
+
+
+def test_process_pool_runs_picklable_functions():
+    async def main():
+        executor = WorkExecutor(processes=1)
+        executor.configure("match", PROCESS)
+        result = await executor.run("match", is_match, "megatonn", "Megaton")
+        executor.shutdown()
+        return result, executor.op_stats
+
+    result, op_stats = asyncio.run(main())
+
+    assert result is True
+    assert op_stats["match.process"] == 1
+
+
+def test_configure_rejects_unknown_modes():
+    with pytest.raises(ValueError):
+        WorkExecutor().configure("op", "gpu")
@@ -0,0 +1,57 @@
+from history import LocalHistoryArchive, compact, read_history, record_event
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def make_user(events: int):
+    user = {"discordUserID": "42", "History": []}
+    for i in range(events):
+        record_event(user, "quiz", n=i)
+    return user
+
+
+def test_compact_keeps_newest_events_inline_and_spills_the_rest():
+    archive = LocalHistoryArchive()
+    user = make_user(25)
+
+    spilled = compact(user, archive, limit=10)
+
+    assert spilled == 15
+    assert [e["seq"] for e in user["History"]] == list(range(16, 26))
+    assert [e["seq"] for e in archive.read("42", limit=100)] == list(range(15, 0, -1))
+
+
+def test_read_history_pages_across_inline_ring_and_archive():
+    archive = LocalHistoryArchive()
+    user = make_user(25)
+    compact(user, archive, limit=10)
+
+    seen, cursor = [], None
+    while True:
+        events, cursor = read_history(user, archive, limit=7, before=cursor)
+        seen += [e["seq"] for e in events]
+        if cursor is None:
+            break
+
+    assert seen == list(range(25, 0, -1))
+
+
+def test_local_archive_persists_to_disk(tmp_path):
+    user = make_user(5)
+    compact(user, LocalHistoryArchive(str(tmp_path)), limit=2)
+
+    reloaded = LocalHistoryArchive(str(tmp_path))
+
+    assert [e["seq"] for e in reloaded.read("42")] == [3, 2, 1]
+
+
+def test_deleted_archive_takes_a_restarted_history(tmp_path):
+    archive = LocalHistoryArchive(str(tmp_path))
+    compact(make_user(5), archive, limit=2)
+
+    archive.delete("42")
+    # A reset profile numbers its events from 1 again
+    compact(make_user(4), archive, limit=1)
+
+    assert [e["n"] for e in LocalHistoryArchive(str(tmp_path)).read("42")] == [2, 1, 0]
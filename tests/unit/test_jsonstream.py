@@ -0,0 +1,41 @@
+from owlmind.jsonstream import JSONObjectExtractor, extract_json
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"question": "Why?", "answer": "Because"}',
+        'Sure! Here it is:\n```json\n{"question": "Why?", "answer": "Because"}\n```\nAnything else?',
+        '{not json} {"question": "Why?", "answer": "Because"}',
+        '{"question": "Why?", "answer": "Because"} {"question": "second"}',
+    ],
+)
+def test_extract_json_finds_first_complete_object(text):
+    assert extract_json(text) == {"question": "Why?", "answer": "Because"}
+
+
+def test_braces_and_escapes_inside_strings_are_ignored():
+    text = r'{"question": "What does \"{}\" mean in Python?", "answer": "An empty dict, isn\'t it"}'
+
+    assert extract_json(text) == {
+        "question": 'What does "{}" mean in Python?',
+        "answer": "An empty dict, isn't it",
+    }
+
+
+def test_feed_returns_object_as_soon_as_it_completes_across_chunks():
+    text = '{"question": "a\\"b", "answer": {"nested": "}"}} trailing'
+    ex = JSONObjectExtractor()
+
+    results = [ex.feed(ch) for ch in text]
+
+    first = results.index(next(r for r in results if r))
+    assert text[first] == "}" and text[first + 1] == " "
+    assert ex.result == {"question": 'a"b', "answer": {"nested": "}"}}
+
+
+def test_truncated_object_yields_none():
+    assert extract_json('{"question": "Why?", "answer": "Beca') is None
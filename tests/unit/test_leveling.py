@@ -0,0 +1,35 @@
+from leveling import award_xp, level_for_xp
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.mark.parametrize(
+    "xp, expected",
+    [(0, 1), (4, 1), (5, 1), (10, 2), (14, 2), (50, 10), (500, 10)],
+)
+def test_level_for_xp(xp, expected):
+    assert level_for_xp(xp) == expected
+
+
+def test_award_xp_jumps_several_levels_and_grants_one_perk_per_level():
+    user = {"XP": 9, "Level": 1, "SPECIAL": {"Intelligence": 6}, "Perks": []}
+    granted = []
+
+    award = award_xp(user, base_xp=10, perk_hook=lambda u, lvl: granted.append(lvl) or f"perk-{lvl}")
+
+    # 10 base + 6 // 3 bonus
+    assert award.xp == 12
+    assert user["XP"] == 21
+    assert (award.old_level, award.new_level) == (1, 4)
+    assert granted == [2, 3, 4]
+    assert award.perks == ["perk-2", "perk-3", "perk-4"]
+
+
+def test_award_xp_never_demotes():
+    user = {"XP": 0, "Level": 5}
+
+    award = award_xp(user, perk_hook=None)
+
+    assert award.new_level == 5
+    assert award.perks == []
@@ -0,0 +1,65 @@
+from owlmind import metrics
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+@pytest.fixture
+def registry():
+    metrics.enable()
+    yield metrics.Registry()
+    metrics.enable(False)
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.enable(False)
+    reg = metrics.Registry()
+    hist = reg.histogram("t_seconds", "test")
+    count = reg.counter("t_total", "test")
+
+    with hist.time():
+        pass
+    count.inc()
+
+    assert hist.time() is metrics._NULL_TIMER
+    assert reg.render() == ""
+    assert count.total() == 0
+
+
+def test_histogram_buckets_quantiles_and_prometheus_text(registry):
+    hist = registry.histogram("op_seconds", "op latency", ("op",), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.05, 0.05, 0.5):
+        hist.observe(value, op="get")
+
+    text = registry.render()
+
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="get",le="0.01"} 1' in text
+    assert 'op_seconds_bucket{op="get",le="0.1"} 3' in text
+    assert 'op_seconds_bucket{op="get",le="+Inf"} 4' in text
+    assert 'op_seconds_count{op="get"} 4' in text
+    assert 0.01 < hist.quantile(0.5, op="get") <= 0.1
+    assert "op_seconds{op=\"get\"}: n=4" in registry.summary()
+
+
+def test_counters_and_timed_decorator(registry):
+    hits = registry.counter("hits_total", "hits", ("result",))
+    hist = registry.histogram("fn_seconds", "fn")
+
+    @metrics.timed(hist)
+    def work(x):
+        return x * 2
+
+    hits.inc(result="hit")
+    hits.inc(2, result="miss")
+
+    assert work(21) == 42
+    assert (hits.value(result="hit"), hits.total()) == (1, 3)
+    assert 'hits_total{result="miss"} 2' in registry.render()
+    assert "fn_seconds_count 1" in registry.render()
+
+
+def test_registry_returns_the_same_metric_by_name(registry):
+    assert registry.counter("x_total") is registry.counter("x_total")
+    with pytest.raises(ValueError):
+        registry.histogram("x_total")
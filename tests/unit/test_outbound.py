@@ -0,0 +1,116 @@
+from owlmind.outbound import OutboundQueue, chunk_message
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.retry_after = retry_after
+
+
+class FakeChannel:
+    def __init__(self, id=1, fail_first=0):
+        self.id = id
+        self.sent = []
+        self.fail_first = fail_first
+
+    async def send(self, text):
+        if self.fail_first:
+            self.fail_first -= 1
+            raise RateLimited(0.01)
+        self.sent.append(text)
+
+
+def test_chunks_split_on_paragraphs_without_breaking_words():
+    paragraphs = [("word " * 60).strip() for _ in range(10)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = chunk_message(text, limit=1000)
+
+    assert all(len(c) <= 1000 for c in chunks)
+    assert all(c.endswith("word") for c in chunks)
+    assert "\n\n".join(chunks) == text
+
+
+def test_code_blocks_are_closed_and_reopened_across_chunks():
+    code = "\n".join(f"print({i})" for i in range(300))
+    text = f"Here you go:\n\n```python\n{code}\n```\n\nDone."
+
+    chunks = chunk_message(text, limit=500)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 500
+        assert chunk.count("```") % 2 == 0
+    assert all(c.startswith("```python\n") for c in chunks[1:])
+    body = "".join(c.replace("```python\n", "").replace("\n```", "") for c in chunks)
+    assert all(f"print({i})" in body for i in range(300))
+
+
+def test_queue_merges_short_replies_and_keeps_order():
+    async def main():
+        channel = FakeChannel()
+        outbound = OutboundQueue()
+        for n in range(3):
+            outbound.send(channel, f"reply {n}")
+        await outbound.drain()
+        return channel, outbound
+
+    channel, outbound = asyncio.run(main())
+
+    assert channel.sent == ["reply 0\n\nreply 1\n\nreply 2"]
+    assert outbound.stats["merged"] == 2
+
+
+def test_send_does_not_block_and_retries_rate_limited_sends():
+    async def main():
+        channel = FakeChannel(fail_first=2)
+        outbound = OutboundQueue(merge=False)
+        outbound.send(channel, "a")
+        outbound.send(channel, "b")
+        queued_before_any_send = list(channel.sent)
+        await outbound.drain()
+        return channel, outbound, queued_before_any_send
+
+    channel, outbound, before = asyncio.run(main())
+
+    assert before == []
+    assert channel.sent == ["a", "b"]
+    assert outbound.stats["rate_limited"] == 2
+
+
+def test_sends_are_paced_per_channel():
+    async def main():
+        loop = asyncio.get_running_loop()
+        channel = FakeChannel()
+        outbound = OutboundQueue(rate=50.0, burst=1, merge=False)
+        start = loop.time()
+        for n in range(4):
+            outbound.send(channel, str(n))
+        await outbound.drain()
+        return loop.time() - start, channel
+
+    elapsed, channel = asyncio.run(main())
+
+    assert channel.sent == ["0", "1", "2", "3"]
+    assert elapsed >= 0.05
+
+
+def test_idle_channel_state_is_pruned(monkeypatch):
+    monkeypatch.setattr(OutboundQueue, "PRUNE_EVERY", 2)
+
+    async def main():
+        outbound = OutboundQueue(rate=1000.0, burst=1)
+        outbound.send(FakeChannel(id=1), "hi")
+        await outbound.drain()
+        await asyncio.sleep(0.01)          # bucket refills
+        outbound.send(FakeChannel(id=2), "hi")
+        await outbound.drain()
+        return outbound
+
+    outbound = asyncio.run(main())
+
+    assert list(outbound._channels) == [2]
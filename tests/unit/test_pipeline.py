@@ -0,0 +1,102 @@
+import json
+import pytest
+
+pytestmark = pytest.mark.unit
+
+pipeline = pytest.importorskip("owlmind.pipeline")
+
+from owlmind.pipeline import ModelProvider, OllamaRequest, OpenAIRequest, OpenWebUIRequest
+
+SCHEMA = {"type": "object", "properties": {"question": {"type": "string"}}}
+
+
+class FakeStream:
+    """ Streamed requests.Response: records how many lines were read and whether it was closed """
+
+    status_code = 200
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.read = 0
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        for line in self.lines:
+            self.read += 1
+            yield line
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+
+def test_ollama_structured_and_streaming_payload():
+    maker = OllamaRequest()
+
+    assert maker.structured(maker.package("llama3", "hi"))["format"] == "json"
+    payload = maker.streaming(maker.structured(maker.package("llama3", "hi"), SCHEMA))
+    assert payload["format"] == SCHEMA
+    assert payload["stream"] is True
+
+
+@pytest.mark.parametrize("maker", [OpenAIRequest(), OpenWebUIRequest()])
+def test_openai_structured_and_streaming_payload(maker):
+    assert maker.structured(maker.package("gpt", "hi"))["response_format"] == {"type": "json_object"}
+    payload = maker.streaming(maker.structured(maker.package("gpt", "hi"), SCHEMA))
+    assert payload["response_format"] == {
+        "type": "json_schema",
+        "json_schema": {"name": "response", "schema": SCHEMA, "strict": True},
+    }
+    assert payload["stream"] is True
+
+
+def test_request_json_closes_the_stream_after_the_first_object(monkeypatch):
+    fragments = ['{"question": "Wh', 'y?", "answer": ', '"Because"}', ' and then', ' some more']
+    stream = FakeStream([json.dumps({"response": f}) for f in fragments])
+    posted = []
+    monkeypatch.setattr(pipeline.requests, "post", lambda url, **kw: posted.append((url, kw)) or stream)
+
+    provider = ModelProvider("http://127.0.0.1:11434", type="ollama", model="llama3")
+    obj, raw = provider.request_json("quiz me", schema=SCHEMA)
+
+    assert obj == {"question": "Why?", "answer": "Because"}
+    assert stream.read == 3
+    assert stream.closed
+    (url, kwargs), = posted
+    assert url.endswith("/api/generate")
+    assert kwargs["stream"] is True
+    assert kwargs["json"]["format"] == SCHEMA
+
+
+def test_request_json_reads_openai_server_sent_events(monkeypatch):
+    def event(text):
+        return "data: " + json.dumps({"choices": [{"delta": {"content": text}}]})
+
+    stream = FakeStream(["", event('{"question": "Why?",'), event(' "answer": "Because"}'), "data: [DONE]"])
+    monkeypatch.setattr(pipeline.requests, "post", lambda url, **kw: stream)
+
+    provider = ModelProvider("https://api.openai.com", type="openai", api_key="k", model="gpt")
+
+    assert provider.request_json("quiz me")[0] == {"question": "Why?", "answer": "Because"}
+    assert stream.read == 3
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+@pytest.mark.parametrize("type", ["ollama", "openai"])
+def test_request_returns_none_for_a_reply_without_text(monkeypatch, type):
+    # An Ollama reply without 'response', an OpenAI reply without 'choices'
+    provider = ModelProvider("http://127.0.0.1:11434", type=type, api_key="k", model="m")
+    monkeypatch.setattr(provider, "_call", lambda url, payload: FakeResponse({}))
+
+    assert provider.request("hi") is None
@@ -0,0 +1,74 @@
+from owlmind.profiler import SamplingProfiler, parse_duration
+from owlmind.simple import SimpleEngine
+from owlmind.bot import BotMessage
+from owlmind.context import Context
+from owlmind.watchdog import set_activity
+import asyncio
+import time
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def fake_model_call():
+    time.sleep(0.4)
+
+
+def test_parse_duration():
+    assert parse_duration("30s") == 30
+    assert parse_duration("") == 30
+    assert parse_duration("1.5m") == 90
+    assert parse_duration("500ms") == 0.5
+    with pytest.raises(ValueError):
+        parse_duration("forever")
+    with pytest.raises(ValueError):
+        parse_duration("10m")
+
+
+def test_awaiting_the_model_is_told_apart_from_cpu_on_the_loop():
+    async def model_handler():
+        set_activity("on_message /adventure quiz")
+        await asyncio.to_thread(fake_model_call)
+
+    async def rules_handler():
+        set_activity("on_message rules")
+        target = Context({"message": "where is the vault " * 20})
+        test = Context({"message": "*vault*"})
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            for _ in range(200):
+                target.match(test)
+            await asyncio.sleep(0)
+
+    async def main():
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        await asyncio.gather(model_handler(), rules_handler())
+        profiler.stop()
+        return profiler
+
+    profiler = asyncio.run(main())
+    roots = {(stack[0], stack[1]) for stack in profiler.stacks}
+
+    assert ("await", "task on_message /adventure quiz") in roots
+    assert ("cpu", "loop on_message rules") in roots
+    assert any(s[0] == "wait" and any("fake_model_call" in f for f in s) for s in profiler.stacks)
+    assert any(s[0] == "cpu" and any(f.startswith("Context.match") for f in s) for s in profiler.stacks)
+    summary = profiler.summary(top=5)
+    assert "Context.match" in summary.split("**Top Blocked")[0]
+    assert "fake_model_call" in summary.split("**Top Blocked")[1]
+
+
+def test_profile_command_is_admin_only_and_writes_collapsed_stacks(tmp_path):
+    engine = SimpleEngine(id="test")
+    engine.profile_dir = str(tmp_path)
+    engine.admins = {"42"}
+
+    denied = asyncio.run(engine.handle(BotMessage(message="/profile 0.2s", layer4=7)))
+    reply = asyncio.run(engine.handle(BotMessage(message="/profile 0.2s", layer4=42)))
+
+    assert denied == "*/profile is for admins only.*"
+    assert reply.startswith("### Profile: 0.2s")
+    (path,) = tmp_path.iterdir()
+    assert str(path) in reply
+    assert "/profile" not in engine.commands.help()
@@ -0,0 +1,55 @@
+from quiz_bank import QuizBank
+import itertools
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def make_generator():
+    counter = itertools.count(1)
+    return lambda subject: {"question": f"{subject} question {next(counter)}?", "answer": "42"}
+
+
+def test_cold_subject_returns_none_until_popular():
+    bank = QuizBank(make_generator(), popular_after=2)
+
+    assert bank.take("Physics", "u1") is None
+    assert bank.take("physics", "u1") is None
+
+    bank.refill("physics")
+
+    assert len(bank) == bank.high_water
+    assert bank.take("PHYSICS", "u1") is not None
+
+
+def test_never_serves_the_same_question_twice_to_a_user():
+    bank = QuizBank(make_generator(), high_water=3)
+    bank.refill("lore")
+    first = bank.take("lore", "u1")
+
+    # put the same question back in the pool
+    bank._pools["lore"].appendleft(dict(first))
+
+    second = bank.take("lore", "u1")
+    assert second["question"] != first["question"]
+    assert bank.take("lore", "u2")["question"] == first["question"]
+
+
+def test_refill_skips_fallback_items():
+    bank = QuizBank(lambda s: {"question": "generic?", "answer": "fallback"}, high_water=2)
+
+    assert bank.refill("lore") == 0
+    assert len(bank) == 0
+
+
+def test_pools_persist(tmp_path):
+    path = str(tmp_path / "bank.json")
+    bank = QuizBank(make_generator(), path=path, high_water=4)
+    bank.warm("lore")
+    bank.refill("lore")
+    bank.save()
+
+    reloaded = QuizBank(make_generator(), path=path)
+
+    assert len(reloaded) == 4
+    assert reloaded.take("lore", "u1") is not None
@@ -0,0 +1,39 @@
+import pytest
+
+pytestmark = pytest.mark.unit
+
+quiz_manager = pytest.importorskip("quiz_manager")
+
+from quiz_manager import QuizManager
+
+
+@pytest.mark.parametrize(
+    "raw, source, expected",
+    [
+        (
+            'Here you go:\n```json\n{"question": "Why?", "answer": "Because"}\n```',
+            "extracted",
+            {"question": "Why?", "answer": "Because"},
+        ),
+        (
+            '{"question": "Who\\\'s the Overseer?", "answer": "Amata"',
+            "repaired",
+            {"question": "Who's the Overseer?", "answer": "Amata"},
+        ),
+        (
+            "Question: What year did the bombs fall?\nAnswer: 2077",
+            "freeform",
+            {"question": "What year did the bombs fall?", "answer": "2077"},
+        ),
+        (
+            "I cannot help with that.",
+            "fallback",
+            {"question": "What is an advanced concept in fallout lore?", "answer": "fallback"},
+        ),
+    ],
+)
+def test_parse_quiz_fallback_tiers(monkeypatch, raw, source, expected):
+    monkeypatch.setattr(QuizManager, "stats", quiz_manager.Counter())
+
+    assert QuizManager.parse_quiz(raw, "fallout lore") == expected
+    assert QuizManager.stats == {source: 1}
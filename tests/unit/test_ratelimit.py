@@ -0,0 +1,82 @@
+from owlmind.ratelimit import FairScheduler, RateLimiter
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_burst_then_refill():
+    limiter = RateLimiter({"author": (2, 1.0)})
+
+    assert limiter.check(now=0, author=1).allowed
+    assert limiter.check(now=0, author=1).allowed
+    throttled = limiter.check(now=0, author=1)
+    assert not throttled.allowed
+    assert throttled.retry_after == pytest.approx(1.0)
+    assert limiter.check(now=1.0, author=1).allowed
+    # other users are unaffected
+    assert limiter.check(now=0, author=2).allowed
+
+
+def test_all_layers_must_allow_and_throttled_requests_consume_nothing():
+    limiter = RateLimiter({"author": (5, 1.0), "channel": (1, 1.0)})
+
+    assert limiter.check(now=0, author=1, channel=9).allowed
+    assert not limiter.check(now=0, author=2, channel=9).allowed
+    assert limiter.check(now=0, author=2, channel=8).allowed
+
+
+def test_throttled_caller_is_notified_once_per_window():
+    limiter = RateLimiter({"author": (1, 0.5)})
+    limiter.check(now=0, author=1)
+
+    assert limiter.check(now=0, author=1).notify
+    assert not limiter.check(now=1, author=1).notify
+    assert limiter.check(now=2.5, author=1).allowed
+
+
+def test_fair_scheduler_round_robins_between_users():
+    order = []
+
+    async def job(scheduler, user, n):
+        async with scheduler.slot(user):
+            order.append((user, n))
+            await asyncio.sleep(0)
+
+    async def main():
+        scheduler = FairScheduler(concurrency=1)
+        # the hog queues three jobs before anyone else asks
+        jobs = [job(scheduler, "hog", n) for n in range(3)]
+        jobs += [job(scheduler, "a", 0), job(scheduler, "b", 0)]
+        await asyncio.gather(*jobs)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+
+    assert order == [("hog", 0), ("hog", 1), ("a", 0), ("b", 0), ("hog", 2)]
+    assert scheduler.active == 0 and scheduler.waiting == 0
+
+
+def test_fair_scheduler_respects_concurrency_and_cancellation():
+    async def main():
+        scheduler = FairScheduler(concurrency=2, per_key=2)
+        release = asyncio.Event()
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            async with scheduler.slot("u"):
+                peak = max(peak, scheduler.active)
+                await release.wait()
+
+        tasks = [asyncio.create_task(job()) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks[3].cancel()
+        release.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return scheduler, peak
+
+    scheduler, peak = asyncio.run(main())
+
+    assert peak == 2
+    assert scheduler.active == 0 and scheduler.waiting == 0
@@ -0,0 +1,104 @@
+from owlmind.agent import Agent, Capability, Plan
+from owlmind.scheduler import AgentScheduler, Mailbox
+import asyncio
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def counting_agent(id, log):
+    agent = Agent(id=id)
+    agent += Capability(goal="tick", action=lambda: log.append(id))
+    # each tick re-emits the goal until the step limit cuts it off
+    agent += Plan(goal="spin", condition={"n": "*"}, action=["@tick", "spin"])
+    return agent
+
+
+def test_busy_agents_share_the_loop_in_slices():
+    log = []
+
+    async def main():
+        scheduler = AgentScheduler(slice_steps=4)
+        scheduler.add(counting_agent("a", log))
+        scheduler.add(counting_agent("b", log))
+        await scheduler.start()
+        scheduler.post("a", "spin", {"n": "1"})
+        scheduler.post("b", "spin", {"n": "1"})
+        await scheduler.join()
+        await scheduler.stop()
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+
+    # neither agent runs to its step limit before the other gets a turn
+    first_b = log.index("b")
+    assert first_b < log.count("a")
+    assert stats["halted"] == 2
+    assert stats["steps"] == 2 * Agent.STEPS
+    assert stats["slices"] >= 2 * Agent.STEPS // 4
+
+
+def test_agents_exchange_messages_through_send():
+    heard = []
+
+    async def main():
+        scheduler = AgentScheduler()
+        alice, bob = Agent(id="alice"), Agent(id="bob")
+        alice += Plan(goal="greet", condition={"who": "*"}, action="@send($who, hello, topic=owls)")
+        bob += Capability(goal="hear", action=lambda sender, topic: heard.append((sender, topic)))
+        bob += Plan(goal="hello", condition={"sender": "*"}, action="@hear($sender, $topic)")
+        scheduler.add(alice)
+        scheduler.add(bob)
+        await scheduler.start()
+        scheduler.post("alice", "greet", {"who": "bob"})
+        await scheduler.join()
+        await scheduler.stop()
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+
+    assert heard == [("alice", "owls")]
+    assert stats["messages"] == stats["received"] == 2
+
+
+def test_full_mailbox_pushes_back():
+    async def main():
+        mailbox = Mailbox(size=2)
+        accepted = [mailbox.offer(f"cmd-{i}") for i in range(3)]
+        waited = await mailbox.put("late", timeout=0.01)
+        return mailbox, accepted, waited
+
+    mailbox, accepted, waited = asyncio.run(main())
+
+    assert accepted == [True, True, False]
+    assert waited is False
+    assert (mailbox.received, mailbox.dropped, mailbox.high_water, len(mailbox)) == (2, 2, 2, 2)
+
+
+def test_a_failing_message_does_not_stop_the_agent():
+    class Fragile(Agent):
+        def _plan(self, cmd):
+            if cmd.namespace == "boom":
+                raise ValueError("plan failed to compile")
+            return super()._plan(cmd)
+
+    log = []
+
+    async def main():
+        scheduler = AgentScheduler()
+        agent = Fragile(id="a")
+        agent += Capability(goal="tick", action=lambda: log.append("tick"))
+        agent += Plan(goal="ping", condition={"n": "*"}, action="@tick")
+        scheduler.add(agent)
+        await scheduler.start()
+        scheduler.post("a", "boom", {"n": "1"})
+        scheduler.post("a", "ping", {"n": "2"})
+        await asyncio.wait_for(scheduler.join(), timeout=2)
+        await scheduler.stop()
+        return scheduler.stats()
+
+    stats = asyncio.run(main())
+
+    assert log == ["tick"]
+    assert stats["failed"] == 1
+    assert stats["messages"] == 2
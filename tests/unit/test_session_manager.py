@@ -0,0 +1,150 @@
+from session_manager import SessionRegistry
+import asyncio
+import threading
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+class FakeManager:
+    def __init__(self, user):
+        self.user = user
+        self.checkpoints = 0
+
+    def checkpoint(self):
+        self.checkpoints += 1
+
+
+def make_registry(**kwargs):
+    loads = []
+
+    def load_user(uid):
+        loads.append(uid)
+        return {"discordUserID": uid}
+
+    return SessionRegistry(load_user, FakeManager, **kwargs), loads
+
+
+def test_user_is_loaded_once_per_session():
+    registry, loads = make_registry()
+
+    first = registry.get("1")
+    second = registry.get("1")
+
+    assert first is second
+    assert loads == ["1"]
+
+
+def test_idle_sessions_are_checkpointed_and_evicted():
+    registry, loads = make_registry(idle_timeout=10)
+    session = registry.get("1")
+
+    assert registry.evict_idle(now=session.last_seen + 5) == 0
+    assert registry.evict_idle(now=session.last_seen + 11) == 1
+    assert session.adventure.checkpoints == 1
+    assert "1" not in registry
+
+
+def test_least_recently_used_session_is_evicted_over_capacity():
+    registry, _ = make_registry(max_sessions=2)
+    one = registry.get("1")
+    registry.get("2")
+    registry.get("1")
+    registry.get("3")
+
+    assert "2" not in registry
+    assert "1" in registry and "3" in registry
+    assert one.adventure.checkpoints == 0
+
+
+def test_drop_does_not_checkpoint():
+    registry, _ = make_registry()
+    session = registry.get("1")
+
+    registry.drop("1")
+
+    assert "1" not in registry
+    assert session.adventure.checkpoints == 0
+
+
+def test_drop_skips_a_pending_eviction_checkpoint():
+    registry, _ = make_registry(idle_timeout=10)
+    one, two = registry.get("1"), registry.get("2")
+    # "2" is deleted while the eviction batch is still checkpointing "1"
+    one.adventure.checkpoint = lambda: registry.drop("2")
+
+    assert registry.evict_idle(now=two.last_seen + 11) == 2
+
+    assert two.dropped
+    assert two.adventure.checkpoints == 0
+
+
+def test_drop_waits_for_a_checkpoint_being_written():
+    registry, _ = make_registry(idle_timeout=10)
+    session = registry.get("1")
+    writing, release, order = threading.Event(), threading.Event(), []
+
+    def checkpoint():
+        writing.set()
+        release.wait(5)
+        order.append("checkpoint")
+
+    session.adventure.checkpoint = checkpoint
+    evictor = threading.Thread(target=registry.evict_idle, args=(session.last_seen + 11,))
+    evictor.start()
+    writing.wait(5)
+    dropper = threading.Thread(target=lambda: (registry.drop("1"), order.append("drop")))
+    dropper.start()
+    dropper.join(0.1)
+
+    assert dropper.is_alive()
+    release.set()
+    evictor.join(5)
+    dropper.join(5)
+    assert order == ["checkpoint", "drop"]
+
+
+def test_session_is_found_while_its_eviction_checkpoint_runs():
+    registry, loads = make_registry(idle_timeout=10)
+    session = registry.get("1")
+    seen = []
+    # A message arriving mid-checkpoint must get the live session, not reload the stale record
+    session.adventure.checkpoint = lambda: seen.append(registry.get("1"))
+
+    assert registry.evict_idle(now=session.last_seen + 11) == 1
+
+    assert seen == [session]
+    assert loads == ["1"]
+    assert "1" in registry
+
+
+def test_aget_loads_off_the_event_loop():
+    threads = []
+
+    def load_user(uid):
+        threads.append(threading.current_thread())
+        return {"discordUserID": uid}
+
+    registry = SessionRegistry(load_user, FakeManager)
+
+    async def main():
+        return await registry.aget("1"), await registry.aget("1")
+
+    first, second = asyncio.run(main())
+
+    assert first is second
+    assert len(threads) == 1 and threads[0] is not threading.main_thread()
+
+
+def test_uncached_registry_loads_every_time_and_checkpoints_on_release():
+    registry, loads = make_registry(cache=False)
+
+    first = registry.get("1")
+    registry.release(first)
+    second = asyncio.run(registry.aget("1"))
+    asyncio.run(registry.arelease(second))
+
+    assert first is not second
+    assert loads == ["1", "1"]
+    assert "1" not in registry
+    assert first.adventure.checkpoints == second.adventure.checkpoints == 1
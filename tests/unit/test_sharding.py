@@ -0,0 +1,41 @@
+from owlmind.sharding import HealthServer, ShardConfig
+import json
+import urllib.error
+import urllib.request
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def test_config_defaults_to_unsharded_single_worker():
+    config = ShardConfig.from_config({"DISCORD_TOKEN": "x"})
+
+    assert not config.sharded
+    assert config.assignments() == [None]
+
+
+def test_config_spreads_shard_ids_across_processes():
+    config = ShardConfig.from_config({"SHARD_COUNT": "8", "SHARD_IDS": "0-4,7", "SHARD_PROCESSES": "2"})
+
+    assert config.assignments() == [[0, 2, 4], [1, 3, 7]]
+
+
+def test_config_rejects_out_of_range_ids():
+    with pytest.raises(ValueError):
+        ShardConfig.from_config({"SHARD_COUNT": "2", "SHARD_IDS": "0-2"})
+
+
+def test_health_server_serves_health_and_metrics():
+    state = {"ready": False}
+    server = HealthServer(0, lambda: dict(state), lambda: "owlmind_up 1\n").start()
+    base = f"http://127.0.0.1:{server.port}"
+    try:
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"{base}/health")
+        assert err.value.code == 503
+
+        state["ready"] = True
+        assert json.load(urllib.request.urlopen(f"{base}/health")) == {"ready": True}
+        assert urllib.request.urlopen(f"{base}/metrics").read() == b"owlmind_up 1\n"
+    finally:
+        server.stop()
@@ -1,5 +1,7 @@
 from owlmind.simple import SimpleEngine
 from owlmind.context import Context
+from owlmind.bot import BotMessage, LazyBotMessage
+import asyncio
 import pytest
 
 pytestmark = pytest.mark.unit
@@ -36,3 +38,58 @@ def test_load():
 
     # this is the generic wildcard match for when a message is received with no better match
     assert ctx3.result is None
+
+
+class FakeProvider:
+    type, base_url, model = "fake", "http://fake", "fake-model"
+
+    def __init__(self):
+        self.prompts = []
+
+    def request(self, prompt):
+        self.prompts.append(prompt)
+        return f"model: {prompt}"
+
+
+def test_rules_answer_first_and_weak_matches_fall_through_to_the_model():
+    engine = SimpleEngine(id="hybrid")
+    engine.model_provider = FakeProvider()
+    assert engine.load(FAKE_RULES_PATH) == 10
+
+    greeting = BotMessage(message="Good morning")
+    # *hi* matches inside "this", but far below the threshold
+    question = BotMessage(message="can you explain how this works in detail")
+    asyncio.run(engine.handle(greeting))
+    asyncio.run(engine.handle(question))
+
+    assert greeting.response == "Good morning! How can I make your day better?"
+    assert greeting.handled_by == "rules"
+    assert question.response == "model: can you explain how this works in detail"
+    assert engine.model_provider.prompts == [question["message"]]
+
+    stats = engine.rule_stats()
+    assert (stats["rules"], stats["checked"], stats["hits"], stats["model_calls"]) == (10, 2, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_sync_process_uses_the_same_rule_first_path():
+    engine = SimpleEngine(id="hybrid")
+    engine.model_provider = FakeProvider()
+    engine.load(FAKE_RULES_PATH)
+    engine.rule_threshold = 0.9  # (near-)whole-message matches only
+
+    hello, hello_you = BotMessage(message="howdy"), BotMessage(message="howdy partner")
+    engine.process(hello)
+    engine.process(hello_you)
+
+    assert hello.response == "Howdy! What can I do for you?"
+    assert hello_you.response == "model: howdy partner"
+
+
+def test_rules_match_on_a_lazy_field():
+    engine = SimpleEngine(id="hybrid")
+    engine.load(FAKE_RULES_PATH)
+    # The rule test is built with context.get(), which resolves the field on demand
+    ctx = LazyBotMessage("Good morning", {"message": lambda c, source: source})
+
+    assert engine.match_rules(ctx) == "Good morning! How can I make your day better?"
@@ -0,0 +1,140 @@
+from owlmind import tracing
+from owlmind.executor import WorkExecutor
+from owlmind.outbound import OutboundQueue
+import asyncio
+import json
+import threading
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, trace):
+        self.traces.append([span.as_dict() for span in trace.spans])
+
+
+class FlakyChannel:
+    def __init__(self):
+        self.id = 7
+        self.failed = False
+        self.sent = []
+
+    async def send(self, text):
+        if not self.failed:
+            self.failed = True
+            err = Exception("429")
+            err.retry_after = 0.01
+            raise err
+        self.sent.append(text)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracer = tracing.TRACER
+    saved = tracer.sample_rate, tracer.exporter
+    tracing.configure(sample_rate=1.0, exporter=exporter)
+    yield exporter
+    tracer.sample_rate, tracer.exporter = saved
+
+
+def test_unsampled_messages_get_noop_spans():
+    tracer = tracing.Tracer(sample_rate=0.0, exporter=ListExporter())
+
+    with tracer.trace("discord.message", key=123) as root:
+        assert not root
+        assert tracer.span("child") is tracing.NOOP
+
+    assert tracer.exporter.traces == []
+    assert tracing.current() is tracing.NOOP
+
+
+def test_head_sampling_is_deterministic_per_message_id():
+    tracer = tracing.Tracer(sample_rate=0.25, exporter=ListExporter())
+    ids = range(1_000_000_000_000, 1_000_000_004_000)
+
+    decisions = [tracer.sampled(i) for i in ids]
+
+    assert decisions == [tracer.sampled(i) for i in ids]
+    assert 0.2 < sum(decisions) / len(decisions) < 0.3
+
+
+def test_span_tree_follows_the_call_path_across_threads(exporter):
+    @tracing.traced("store.save_user")
+    def save_user(user):
+        tracing.current().set("item_bytes", len(json.dumps(user)))
+
+    async def handle():
+        with tracing.trace("discord.message", key=42) as root:
+            with tracing.span("quiz.create", subject="lore"):
+                await WorkExecutor(threads=1, processes=1).run("quiz.generate", save_user, {"XP": 1})
+            root.set("outcome", "replied")
+
+    asyncio.run(handle())
+
+    (spans,) = exporter.traces
+    by_name = {s["name"]: s for s in spans}
+    assert set(by_name) == {"discord.message", "quiz.create", "store.save_user"}
+    assert all(s["trace_id"] == "%032x" % 42 for s in spans)
+    assert by_name["quiz.create"]["parent_id"] == by_name["discord.message"]["span_id"]
+    assert by_name["store.save_user"]["parent_id"] == by_name["quiz.create"]["span_id"]
+    assert by_name["store.save_user"]["attributes"] == {"item_bytes": len('{"XP": 1}')}
+    assert by_name["discord.message"]["attributes"]["outcome"] == "replied"
+
+
+def test_trace_waits_for_queued_sends_and_records_retries(exporter):
+    channel = FlakyChannel()
+
+    async def handle():
+        outbound = OutboundQueue(rate=100, burst=100)
+        with tracing.trace("discord.message", key=7):
+            outbound.send(channel, "hello")
+        assert exporter.traces == []        # send still pending: trace not finished
+        await outbound.drain(timeout=2)
+
+    asyncio.run(handle())
+
+    (spans,) = exporter.traces
+    send = next(s for s in spans if s["name"] == "discord.send")
+    assert channel.sent == ["hello"]
+    assert send["attributes"] == {"chars": 5, "chunks": 1, "merged": 0, "retries": 1}
+
+
+def test_errors_are_recorded_on_the_span(exporter):
+    with pytest.raises(ValueError):
+        with tracing.trace("discord.message", key=1):
+            with tracing.span("model.request"):
+                raise ValueError("boom")
+
+    (spans,) = exporter.traces
+    assert spans[1]["error"] == "ValueError: boom"
+
+
+def test_otlp_exporter_posts_to_collector_stand_in(tmp_path):
+    out = tmp_path / "spans.jsonl"
+    server = serve = None
+    try:
+        server = tracing.serve_collector(port=0, path=str(out))
+        serve = threading.Thread(target=server.serve_forever, daemon=True)
+        serve.start()
+        exporter = tracing.OTLPExporter(f"http://127.0.0.1:{server.server_port}/v1/traces")
+        tracer = tracing.Tracer(sample_rate=1.0, exporter=exporter)
+
+        with tracer.trace("discord.message", key=99, channel=3) as root:
+            root.child("model.request", prompt_chars=12).end()
+        exporter.flush()
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    spans = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [s["name"] for s in spans] == ["discord.message", "model.request"]
+    assert spans[1]["parent_id"] == spans[0]["span_id"]
+    assert spans[0]["key"] == 99 and spans[0]["attributes"] == {"channel": 3}
+    assert spans[1]["attributes"] == {"prompt_chars": 12}
+    assert spans[1]["duration_ms"] >= 0 and spans[1]["error"] is None
@@ -0,0 +1,168 @@
+import os
+import threading
+from types import SimpleNamespace
+import pytest
+
+pytestmark = pytest.mark.unit
+
+# user_store builds its boto3 resources at import time; no calls are made until used
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+user_store = pytest.importorskip("user_store")
+
+from history import LocalHistoryArchive
+
+
+class FakeTable:
+    name = "VaultUsers"
+
+    def __init__(self):
+        self.deleted = []
+
+    def delete_item(self, Key):
+        self.deleted.append(Key["discordUserID"])
+
+
+class FakeClient:
+    """ Low-level client Scan over `segments` pages (the bulk helpers' only use of the table) """
+
+    def __init__(self, segments=None, fail_segment=None):
+        self.segments = segments or {}     # segment -> list of pages
+        self.fail_segment = fail_segment
+        self.scans = []
+
+    def scan(self, TableName, Segment, TotalSegments, ExclusiveStartKey=0, **kwargs):
+        assert TableName == "VaultUsers"
+        self.scans.append((Segment, ExclusiveStartKey))
+        if Segment == self.fail_segment:
+            raise RuntimeError("segment failed")
+        pages = self.segments.get(Segment, [[]])
+        response = {"Items": pages[ExclusiveStartKey]}
+        if ExclusiveStartKey + 1 < len(pages):
+            response["LastEvaluatedKey"] = ExclusiveStartKey + 1
+        return response
+
+
+class FakeDynamo:
+    """ BatchGetItem / BatchWriteItem that leave the first `unprocessed` responses partly undone """
+
+    def __init__(self, unprocessed=0):
+        self.meta = SimpleNamespace(client=self)   # bulk helpers go through the resource's client
+        self.unprocessed = unprocessed
+        self.gets, self.writes = [], []
+        self._lock = threading.Lock()
+
+    def _defer(self):
+        with self._lock:
+            if self.unprocessed:
+                self.unprocessed -= 1
+                return True
+            return False
+
+    def batch_get_item(self, RequestItems):
+        keys = RequestItems["VaultUsers"]["Keys"]
+        with self._lock:
+            self.gets.append(len(keys))
+        if self._defer():
+            return {"Responses": {"VaultUsers": []}, "UnprocessedKeys": RequestItems}
+        return {"Responses": {"VaultUsers": [dict(k, XP=0) for k in keys]}}
+
+    def batch_write_item(self, RequestItems):
+        with self._lock:
+            self.writes.append(len(RequestItems["VaultUsers"]))
+        if self._defer():
+            return {"UnprocessedItems": RequestItems}
+        return {}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    def install(dynamo=None, client=None):
+        if client:
+            dynamo = SimpleNamespace(meta=SimpleNamespace(client=client))
+        monkeypatch.setattr(user_store, "dynamodb", dynamo or FakeDynamo())
+        monkeypatch.setattr(user_store, "table", FakeTable())
+        monkeypatch.setattr(user_store, "history_archive", LocalHistoryArchive())
+        monkeypatch.setattr(user_store, "BATCH_BACKOFF_BASE", 0)
+        return user_store
+    return install
+
+
+def test_batch_get_chunks_at_100_keys_and_dedupes_ids(store):
+    dynamo = FakeDynamo()
+    users = store(dynamo).batch_get_users([str(i) for i in range(250)] + ["1", "2"])
+
+    assert sorted(dynamo.gets) == [50, 100, 100]
+    assert len(users) == 250
+    assert users["7"]["discordUserID"] == "7"
+
+
+def test_batch_save_chunks_at_25_items_last_record_wins(store):
+    dynamo = FakeDynamo()
+    records = [{"discordUserID": str(i), "XP": 0} for i in range(60)] + [{"discordUserID": "3", "XP": 9}]
+
+    assert store(dynamo).batch_save_users(records) == 60
+    assert sorted(dynamo.writes) == [10, 25, 25]
+
+
+def test_unprocessed_keys_and_items_are_retried(store):
+    dynamo = FakeDynamo(unprocessed=2)
+    assert len(store(dynamo).batch_get_users(["1", "2"])) == 2
+    assert dynamo.gets == [2, 2, 2]
+
+    dynamo = FakeDynamo(unprocessed=2)
+    assert store(dynamo).batch_save_users([{"discordUserID": "1"}]) == 1
+    assert dynamo.writes == [1, 1, 1]
+
+
+def test_batch_helpers_raise_once_retries_run_out(store, monkeypatch):
+    monkeypatch.setattr(user_store, "BATCH_MAX_RETRIES", 2)
+
+    with pytest.raises(RuntimeError, match="still unprocessed after 2 retries"):
+        store(FakeDynamo(unprocessed=100)).batch_get_users(["1"])
+    with pytest.raises(RuntimeError, match="still unprocessed after 2 retries"):
+        store(FakeDynamo(unprocessed=100)).batch_save_users([{"discordUserID": "1"}])
+
+
+def test_scan_fans_out_segments_and_follows_pages(store):
+    client = FakeClient({0: [[{"id": 1}], [{"id": 2}]], 1: [[{"id": 3}]], 2: [[]]})
+
+    items = list(store(client=client).scan_users(segments=3))
+
+    assert sorted(item["id"] for item in items) == [1, 2, 3]
+    assert sorted(client.scans) == [(0, 0), (0, 1), (1, 0), (2, 0)]
+
+
+def test_scan_stops_early_when_the_consumer_does(store):
+    client = FakeClient({0: [[{"id": i}] for i in range(1000)]})
+
+    for item in store(client=client).scan_users(segments=2):
+        break
+
+    # Segment threads are joined before the generator returns, well short of 1000 pages
+    assert len(client.scans) < 100
+
+
+def test_scan_propagates_a_segment_error(store):
+    client = FakeClient({0: [[{"id": 1}]]}, fail_segment=1)
+
+    with pytest.raises(RuntimeError, match="segment failed"):
+        list(store(client=client).scan_users(segments=2))
+
+
+def test_award_xp_wrapper_keeps_the_three_tuple():
+    user = {"XP": 9, "Level": 1, "SPECIAL": {"Intelligence": 3}}
+
+    xp, old, new = user_store.award_xp(user)
+
+    assert (xp, old, new) == (2, 1, 2)
+    assert "Perks" not in user
+
+
+def test_delete_user_clears_the_history_archive(store):
+    store = store()
+    store.history_archive.append("1", [{"seq": 1, "type": "quiz"}])
+
+    store.delete_user("1")
+
+    assert store.table.deleted == ["1"]
+    assert store.history_archive.read("1") == []
@@ -0,0 +1,53 @@
+from owlmind.watchdog import LoopWatchdog, set_activity
+import asyncio
+import time
+import pytest
+
+pytestmark = pytest.mark.unit
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+def test_stall_is_attributed_to_the_blocking_task_and_stack():
+    logged = []
+
+    async def handle():
+        set_activity("PersistingBot.on_message /adventure quiz")
+        await asyncio.sleep(0.05)
+        blocking_handler()
+
+    async def main():
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.02, log=lambda *args: logged.append(args))
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(handle(), name="on_message")
+        await asyncio.sleep(0.1)
+        watchdog.stop()
+        return watchdog
+
+    watchdog = asyncio.run(main())
+
+    (stall,) = watchdog.stalls
+    assert stall["activity"] == "PersistingBot.on_message /adventure quiz"
+    assert stall["task"] == "on_message"
+    assert "blocking_handler" in stall["stack"]
+    assert stall["blocked_s"] >= 0.25
+    assert len(logged) == 1
+    assert watchdog.stats()["stalls"] == 1
+
+
+def test_healthy_loop_reports_no_stalls():
+    async def main():
+        watchdog = LoopWatchdog(threshold=0.1, interval=0.01, log=lambda *args: None)
+        watchdog.start()
+        for _ in range(20):
+            await asyncio.sleep(0.005)
+        watchdog.stop()
+        return watchdog
+
+    watchdog = asyncio.run(main())
+
+    assert watchdog.beats > 5
+    assert not watchdog.stalls
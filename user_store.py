@@ -1,26 +1,50 @@
+import json
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import boto3
 from boto3.dynamodb.conditions import Key
 
+# Leveling lives in its own module; LEVEL_THRESHOLDS and award_xp stay here for existing callers
+from leveling import LEVEL_THRESHOLDS
+import leveling
+import history
+from owlmind import metrics, tracing
+
+__all__ = ['LEVEL_THRESHOLDS', 'get_or_create_user', 'save_user', 'award_xp', 'delete_user', 'get_history',
+           'DynamoHistoryArchive', 'history_archive', 'DynamoBeliefCheckpoints', 'belief_checkpoints',
+           'batch_get_users', 'batch_save_users', 'scan_users']
+
+STORE_SECONDS = metrics.histogram('owlmind_store_seconds', 'User store (DynamoDB) call latency', ('op',))
+
 dynamodb = boto3.resource('dynamodb')
 table = dynamodb.Table('VaultUsers')
 
-# LEVEL_THRESHOLDS: The XP thresholds required for each level.
-LEVEL_THRESHOLDS = {
-     1:    5,
-     2:   10,
-     3:   15,
-     4:   20,
-     5:   25,
-     6:   30,
-     7:   35,
-     8:   40,
-     9:   45,
-    10:   50,
-    
-}
+# Append-only archive for History events spilled off the user item.
+# Key schema: discordUserID (HASH, S) + seq (RANGE, N)
+history_table = dynamodb.Table('VaultUserHistory')
+
+# Durable checkpoints of agent beliefs (owlmind.beliefs.BeliefStore).
+# Key schema: agentID (HASH, S)
+belief_table = dynamodb.Table('VaultAgentBeliefs')
+
+# DynamoDB hard limits for a single BatchGetItem / BatchWriteItem call
+BATCH_GET_LIMIT = 100
+BATCH_WRITE_LIMIT = 25
+# Retry policy for UnprocessedKeys / UnprocessedItems (exponential backoff)
+BATCH_MAX_RETRIES = 8
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_CAP = 2.0
+# Number of chunks processed concurrently by the batch helpers
+BATCH_WORKERS = 4
 
+@tracing.traced('store.get_user')
+@metrics.timed(STORE_SECONDS, op='get_user')
 def get_or_create_user(uid):
     response = table.get_item(Key={"discordUserID": uid})
+    tracing.current().set('created', 'Item' not in response)
     if 'Item' in response:
         return response['Item']
     else:
@@ -35,25 +59,236 @@ def get_or_create_user(uid):
         table.put_item(Item=user)
         return user
 
+@tracing.traced('store.save_user')
+@metrics.timed(STORE_SECONDS, op='save_user')
 def save_user(user):
+    # Keep the hot user item small: spill old History before writing it
+    history.compact(user, history_archive)
+    span = tracing.current()
+    if span:
+        span.set('item_bytes', len(json.dumps(user, default=str)))
     table.put_item(Item=user)
 
 def award_xp(user: dict, base_xp: int = 1):
     """
-    Grants XP = base_xp + (Intelligence // 3), updates Level, returns:
-    (xp_awarded, old_level, new_level)
+    Compatibility wrapper around leveling.award_xp(), returning the original 3-tuple:
+    (xp_awarded, old_level, new_level). No perks are granted; use leveling.award_xp() for those.
+    """
+    award = leveling.award_xp(user, base_xp, perk_hook=None)
+    return award.xp, award.old_level, award.new_level
+
+@metrics.timed(STORE_SECONDS, op='delete_user')
+def delete_user(uid):
+    table.delete_item(Key={"discordUserID": uid})
+    # A new profile restarts HistorySeq at 1: archived events would collide with its seqs
+    history_archive.delete(uid)
+
+@metrics.timed(STORE_SECONDS, op='get_history')
+def get_history(user, limit: int = history.HISTORY_PAGE_SIZE, before: int = None):
+    """
+    Page through a user's History, newest first.
+    Returns (events, cursor); pass cursor back as `before` for the next page.
+    """
+    return history.read_history(user, history_archive, limit=limit, before=before)
+
+
+# --- History archive ---
+
+class DynamoHistoryArchive:
+    """
+    History archive stored as one item per event under the user's partition key.
+    """
+    def __init__(self, archive_table):
+        self.table = archive_table
+
+    @metrics.timed(STORE_SECONDS, op='history_append')
+    def append(self, uid, events):
+        # seq is the sort key, so re-appending the same event just overwrites it
+        with self.table.batch_writer(overwrite_by_pkeys=['discordUserID', 'seq']) as batch:
+            for event in events:
+                batch.put_item(Item=dict(event, discordUserID=uid))
+
+    @metrics.timed(STORE_SECONDS, op='history_read')
+    def read(self, uid, before: int = None, limit: int = history.HISTORY_PAGE_SIZE):
+        condition = Key('discordUserID').eq(uid)
+        if before is not None:
+            condition &= Key('seq').lt(before)
+        response = self.table.query(
+            KeyConditionExpression=condition,
+            ScanIndexForward=False,
+            Limit=limit,
+        )
+        return response.get('Items', [])
+
+    @metrics.timed(STORE_SECONDS, op='history_delete')
+    def delete(self, uid):
+        query = dict(KeyConditionExpression=Key('discordUserID').eq(uid),
+                     ProjectionExpression='#seq', ExpressionAttributeNames={'#seq': 'seq'})
+        with self.table.batch_writer() as batch:
+            while True:
+                response = self.table.query(**query)
+                for item in response.get('Items', []):
+                    batch.delete_item(Key={'discordUserID': uid, 'seq': item['seq']})
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+# Swap for history.LocalHistoryArchive(path) to keep the archive on local disk
+history_archive = DynamoHistoryArchive(history_table)
+
+class DynamoBeliefCheckpoints:
+    """
+    Latest BeliefStore checkpoint per agent, one item each.
+    Facts are stored as a JSON string: beliefs may hold floats, which DynamoDB rejects.
+    """
+    def __init__(self, checkpoint_table):
+        self.table = checkpoint_table
+
+    @metrics.timed(STORE_SECONDS, op='beliefs_save')
+    def save(self, key, version, facts):
+        self.table.put_item(Item={
+            'agentID': key,
+            'version': version,
+            'facts': json.dumps(facts, default=str),
+            'savedAt': int(time.time()),
+        })
+
+    @metrics.timed(STORE_SECONDS, op='beliefs_load')
+    def load(self, key):
+        item = self.table.get_item(Key={'agentID': key}).get('Item')
+        if not item:
+            return None
+        return int(item['version']), json.loads(item['facts'])
+
+# Pass as Agent(id, checkpoints=belief_checkpoints); owlmind.beliefs.LocalBeliefCheckpoints keeps them on disk
+belief_checkpoints = DynamoBeliefCheckpoints(belief_table)
+
+# --- Bulk operations ---
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _backoff(attempt):
+    time.sleep(min(BATCH_BACKOFF_CAP, BATCH_BACKOFF_BASE * (2 ** attempt)))
+
+def _client():
+    # Bulk helpers fan out over threads: boto3 resources are not thread-safe, their low-level
+    # client is (and the resource registered its Python <-> DynamoDB type conversions on it)
+    return dynamodb.meta.client
+
+def _batch_get_chunk(keys):
+    """
+    Fetch one chunk (<= BATCH_GET_LIMIT keys), retrying UnprocessedKeys.
+    """
+    found = []
+    request = {table.name: {'Keys': keys}}
+    for attempt in range(BATCH_MAX_RETRIES + 1):
+        response = _client().batch_get_item(RequestItems=request)
+        found.extend(response.get('Responses', {}).get(table.name, []))
+        request = response.get('UnprocessedKeys') or {}
+        if not request:
+            return found
+        _backoff(attempt)
+    raise RuntimeError(
+        f"batch_get_users: {len(request[table.name]['Keys'])} key(s) still unprocessed "
+        f"after {BATCH_MAX_RETRIES} retries"
+    )
+
+def _batch_write_chunk(requests):
+    """
+    Write one chunk (<= BATCH_WRITE_LIMIT requests), retrying UnprocessedItems.
+    """
+    request = {table.name: requests}
+    for attempt in range(BATCH_MAX_RETRIES + 1):
+        response = _client().batch_write_item(RequestItems=request)
+        request = response.get('UnprocessedItems') or {}
+        if not request:
+            return len(requests)
+        _backoff(attempt)
+    raise RuntimeError(
+        f"batch_save_users: {len(request[table.name])} item(s) still unprocessed "
+        f"after {BATCH_MAX_RETRIES} retries"
+    )
+
+@metrics.timed(STORE_SECONDS, op='batch_get')
+def batch_get_users(uids, workers: int = BATCH_WORKERS) -> dict:
+    """
+    Fetch many users at once. Missing users are NOT created.
+    Returns a dict: {discordUserID: user_record}
+    """
+    # BatchGetItem rejects duplicate keys within one request
+    keys = [{"discordUserID": uid} for uid in dict.fromkeys(uids)]
+    if not keys:
+        return {}
+
+    users = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for items in pool.map(_batch_get_chunk, _chunks(keys, BATCH_GET_LIMIT)):
+            for item in items:
+                users[item['discordUserID']] = item
+    return users
+
+@metrics.timed(STORE_SECONDS, op='batch_save')
+def batch_save_users(users, workers: int = BATCH_WORKERS) -> int:
+    """
+    Persist many user records at once (last record wins on duplicate ids).
+    Returns the number of records written.
+    """
+    # BatchWriteItem rejects two operations on the same key within one request
+    latest = {user['discordUserID']: user for user in users}
+    for user in latest.values():
+        history.compact(user, history_archive)
+    requests = [{'PutRequest': {'Item': user}} for user in latest.values()]
+    if not requests:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(_batch_write_chunk, _chunks(requests, BATCH_WRITE_LIMIT)))
+
+def scan_users(segments: int = BATCH_WORKERS, **scan_kwargs):
+    """
+    Iterate over every user in the table using a parallel scan.
+    Each segment is paginated by its own thread; items are yielded as pages arrive.
+    Extra keyword arguments (e.g. FilterExpression) are passed through to Table.scan().
     """
-    intel = user.get("SPECIAL", {}).get("Intelligence", 0)
-    bonus = intel // 3
-    total = base_xp + bonus
+    pages = queue.Queue(maxsize=segments * 2)
+    done = object()
+    stop = threading.Event()
+    client = _client()
 
-    user["XP"] = user.get("XP", 0) + total
+    def scan_segment(segment):
+        try:
+            kwargs = dict(scan_kwargs, TableName=table.name, Segment=segment, TotalSegments=segments)
+            while not stop.is_set():
+                response = client.scan(**kwargs)
+                pages.put(response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except Exception as e:
+            pages.put(e)
+        finally:
+            pages.put(done)
 
-    old = user.get("Level", 1)
-    new = old
-    for lvl, req in sorted(LEVEL_THRESHOLDS.items()):
-        if user["XP"] >= req:
-            new = lvl
+    pool = ThreadPoolExecutor(max_workers=segments)
+    for segment in range(segments):
+        pool.submit(scan_segment, segment)
 
-    user["Level"] = new
-    return total, old, new
+    try:
+        remaining = segments
+        while remaining:
+            page = pages.get()
+            if page is done:
+                remaining -= 1
+            elif isinstance(page, Exception):
+                raise page
+            else:
+                yield from page
+    finally:
+        # Early exit from the consumer: let the segment threads wind down
+        stop.set()
+        while remaining:
+            if pages.get() is done:
+                remaining -= 1
+        pool.shutdown(wait=True)